@@ -0,0 +1,61 @@
+import collections
+import time
+from typing import Optional
+
+
+class EventLog:
+    """Numbered, bounded history of the download events broadcast to clients.
+
+    Every event gets the next sequence number and is kept, already encoded, in
+    a ring buffer of the last ``maxlen`` events. A client reports the cursor of
+    the last event it saw when it reconnects; ``since`` then returns what it
+    missed, or None when that is no longer in the buffer and the client needs
+    a full snapshot instead.
+
+    Cursors are ``"<epoch>:<seq>"``. The epoch is fixed per process, so a
+    cursor handed out before a restart never matches the new sequence.
+    """
+
+    def __init__(self, maxlen: int, epoch: Optional[str] = None):
+        self.epoch = epoch or f'{time.time_ns():x}'
+        self.seq = 0
+        self._events: collections.deque[tuple[int, str, str]] = collections.deque(maxlen=maxlen)
+
+    @property
+    def cursor(self) -> str:
+        return self._cursor(self.seq)
+
+    def _cursor(self, seq: int) -> str:
+        return f'{self.epoch}:{seq}'
+
+    def append(self, event: str, payload: str) -> str:
+        """Record *event* with its encoded *payload* and return its cursor."""
+        self.seq += 1
+        self._events.append((self.seq, event, payload))
+        return self._cursor(self.seq)
+
+    def since(self, cursor: Optional[str]) -> Optional[list[tuple[str, str, str]]]:
+        """Return ``(event, payload, cursor)`` for every event after *cursor*.
+
+        None means the gap cannot be replayed: the cursor is malformed, from
+        another process, or older than the oldest buffered event.
+        """
+        if not isinstance(cursor, str):
+            return None
+        epoch, _, raw_seq = cursor.rpartition(':')
+        if epoch != self.epoch:
+            return None
+        try:
+            seq = int(raw_seq)
+        except ValueError:
+            return None
+        if seq < 0 or seq > self.seq:
+            return None
+        oldest = self._events[0][0] if self._events else self.seq + 1
+        if seq < oldest - 1:
+            return None
+        return [
+            (event, payload, self._cursor(event_seq))
+            for event_seq, event, payload in self._events
+            if event_seq > seq
+        ]
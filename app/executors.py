@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Sequence
+
+# Named pools for blocking work done on behalf of the event loop, kept apart
+# so one kind of work cannot starve another:
+#
+# * extract: extractions a user is waiting on (add, retry, new subscription)
+# * background: subscription scans and live probes
+# * dns: validate_url lookups
+# * fs: directory walks, file stats and feed metadata files
+#
+# They are threads, except that EXTRACTION_MODE=process makes the two
+# extraction pools process pools, keeping yt-dlp's CPU-heavy work off the
+# server's GIL.
+DEFAULT_THREADS = {'extract': 4, 'background': 2, 'dns': 8, 'fs': 2}
+
+_pools: dict[str, 'BoundedExecutor'] = {}
+
+
+def _timed(fn, args, kwargs):
+    # Runs in the pool, so it reports when the work actually started.
+    return time.time(), fn(*args, **kwargs)
+
+
+class BoundedExecutor:
+    """A pool of fixed size that keeps count of the work waiting for it and
+    how long that work waited to start.
+
+    The pool is threads, or with *processes* worker processes forked from the
+    forkserver, each replaced after *max_tasks* calls. Work for a process pool
+    must be a picklable function of plain arguments.
+    """
+
+    def __init__(self, name: str, workers: int, processes: bool = False, max_tasks: Optional[int] = None):
+        self.name = name
+        self.workers = workers
+        self.processes = processes
+        self.in_flight = 0
+        self.completed = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+        if processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('forkserver'),
+                max_tasks_per_child=max_tasks,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, fn, *args, **kwargs):
+        submitted = time.time()
+        self.in_flight += 1
+        try:
+            started, result = await asyncio.wrap_future(self._executor.submit(_timed, fn, args, kwargs))
+        finally:
+            self.in_flight -= 1
+        waited = max(0.0, started - submitted)
+        self.completed += 1
+        self._total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            'workers': self.workers,
+            'processes': self.processes,
+            'queued': max(0, self.in_flight - self.workers),
+            'running': min(self.in_flight, self.workers),
+            'completed': self.completed,
+            'avg_wait': self._total_wait / self.completed if self.completed else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def configure(sizes: dict[str, int], processes: Sequence[str] = (), max_tasks: Optional[int] = None):
+    """Size the pools, DEFAULT_THREADS filling in any not named in *sizes*.
+    The pools named in *processes* are process pools."""
+    shutdown()
+    for name, workers in {**DEFAULT_THREADS, **sizes}.items():
+        _pools[name] = BoundedExecutor(name, workers, name in processes, max_tasks)
+
+
+def get(name: str) -> BoundedExecutor:
+    if name not in _pools:
+        _pools[name] = BoundedExecutor(name, DEFAULT_THREADS[name])
+    return _pools[name]
+
+
+async def run(name: str, fn, *args, **kwargs):
+    """Run *fn* on the *name* pool and return its result."""
+    return await get(name).run(fn, *args, **kwargs)
+
+
+def metrics() -> dict:
+    return {name: pool.metrics() for name, pool in _pools.items()}
+
+
+def shutdown():
+    while _pools:
+        _pools.popitem()[1].shutdown()
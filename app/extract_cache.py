@@ -0,0 +1,98 @@
+import collections
+import copy
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Optional
+
+
+class ExtractionCache:
+    """In-memory LRU cache of yt-dlp extraction results.
+
+    Entries are keyed by URL and a digest of the yt-dlp options they were
+    extracted with, so the same URL under different options is extracted
+    separately. An entry is served for *ttl* seconds; the least recently used
+    entries are evicted to stay within *max_entries* and *max_bytes*, the
+    latter measured on the JSON form of the result. Extraction runs on
+    executor threads, hence the lock. Results are copied in and out, since
+    callers modify the entries they are handed.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: collections.OrderedDict[str, tuple[float, int, Any]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def key_for(url: str, options: dict) -> str:
+        digest = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+        return f'{url}\0{digest}'
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] <= now:
+                self._drop(key)
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = cached[2]
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Any, now: Optional[float] = None):
+        if not self.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        if isinstance(result, dict) and not isinstance(result.get('entries', []), (list, tuple)):
+            # A lazily evaluated playlist can only be walked once.
+            return
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (now + self.ttl, size, result)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str):
+        _expires, size, _result = self._entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
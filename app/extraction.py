@@ -0,0 +1,38 @@
+import collections.abc
+import pickle
+
+import yt_dlp
+
+# Bulky parts of an info-dict that nothing downstream of an extraction reads:
+# the download process extracts again and picks its own formats.
+_DROPPED_KEYS = frozenset(('formats', 'requested_formats', 'automatic_captions', 'subtitles', 'heatmap'))
+
+_MAX_DEPTH = 64
+
+
+def compact(obj, _depth=0):
+    """Reduce an info-dict to plain dicts, lists and scalars without the
+    _DROPPED_KEYS, so it can be sent back from a worker process cheaply.
+    Lazy playlists are read out; anything that cannot be pickled becomes None.
+    """
+    if _depth > _MAX_DEPTH:
+        return None
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return obj
+    if isinstance(obj, collections.abc.Mapping):
+        return {k: compact(v, _depth + 1) for k, v in obj.items() if k not in _DROPPED_KEYS}
+    if isinstance(obj, collections.abc.Iterable):
+        try:
+            return [compact(x, _depth + 1) for x in obj]
+        except Exception:
+            return None
+    try:
+        pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return obj
+    except Exception:
+        return None
+
+
+def extract_info(params, url):
+    """Extraction as run in a worker process, from plain parameters."""
+    return compact(yt_dlp.YoutubeDL(params=params).extract_info(url, download=False))
@@ -4,6 +4,7 @@
 import os
 import sys
 import asyncio
+import copy
 from datetime import datetime, timedelta
 from pathlib import Path
 from aiohttp import web
@@ -21,7 +22,10 @@ from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from watchfiles import DefaultFilter, Change, awatch
 
 import bg_tasks
-from ytdl import DownloadQueueNotifier, DownloadQueue, Download
+import executors
+import worker_pool
+from event_log import EventLog
+from ytdl import DownloadQueueNotifier, DownloadQueue
 from subscriptions import SubscriptionManager, SubscriptionNotifier, SubscriptionInfo, coerce_optional_bool
 from yt_dlp.version import __version__ as yt_dlp_version
 
@@ -65,6 +69,9 @@ class Config:
         'DEFAULT_FOLDER': '',
         'DELETE_FILE_ON_TRASHCAN': 'false',
         'STATE_DIR': '.',
+        'STATE_BACKEND': 'json',
+        'STATE_COMMIT_MAX_DELAY_MS': '10',
+        'STATE_COMMIT_MAX_BATCH': '256',
         'URL_PREFIX': '',
         'PUBLIC_HOST_URL': 'download/',
         'PUBLIC_HOST_AUDIO_URL': 'audio_download/',
@@ -93,12 +100,31 @@ class Config:
         'BASE_DIR': '',
         'DEFAULT_THEME': 'auto',
         'MAX_CONCURRENT_DOWNLOADS': '3',
+        'MAX_CONCURRENT_DOWNLOADS_PER_HOST': '{}',
+        'MAX_CONCURRENT_DOWNLOADS_FILE': '',
+        'ADAPTIVE_CONCURRENCY': 'false',
+        'ADAPTIVE_CONCURRENCY_MIN': '1',
+        'ADAPTIVE_CONCURRENCY_MAX': '10',
+        'DOWNLOAD_BANDWIDTH_LIMIT': '',
+        'DOWNLOAD_BANDWIDTH_SCHEDULE': '{}',
+        'DOWNLOAD_WORKERS': '0',
+        'DOWNLOAD_WORKER_MAX_JOBS': '25',
+        'EXECUTOR_THREADS': '{}',
+        'EXTRACTION_MODE': 'thread',
+        'EXTRACTION_WORKER_MAX_JOBS': '50',
+        'POSTPROCESS_WORKERS': '0',
+        'EXTRACT_CACHE_TTL': '300',
+        'EXTRACT_CACHE_MAX_ENTRIES': '256',
+        'EXTRACT_CACHE_MAX_MB': '64',
+        'SOCKET_REPLAY_EVENTS': '1000',
+        'SOCKET_UPDATE_INTERVAL_MS': '250',
         'LOGLEVEL': 'INFO',
         'ENABLE_ACCESSLOG': 'false',
         'YTDL_NIGHTLY_UPDATE_TIME': '',
+        'DRAIN_TIMEOUT': '300',
     }
 
-    _BOOLEAN = ('DOWNLOAD_DIRS_INDEXABLE', 'CUSTOM_DIRS', 'CREATE_CUSTOM_DIRS', 'DELETE_FILE_ON_TRASHCAN', 'HTTPS', 'ENABLE_ACCESSLOG', 'ALLOW_YTDL_OPTIONS_OVERRIDES', 'ALLOW_PRIVATE_ADDRESSES')
+    _BOOLEAN = ('ADAPTIVE_CONCURRENCY', 'DOWNLOAD_DIRS_INDEXABLE', 'CUSTOM_DIRS', 'CREATE_CUSTOM_DIRS', 'DELETE_FILE_ON_TRASHCAN', 'HTTPS', 'ENABLE_ACCESSLOG', 'ALLOW_YTDL_OPTIONS_OVERRIDES', 'ALLOW_PRIVATE_ADDRESSES')
 
     def __init__(self):
         for k, v in self._DEFAULTS.items():
@@ -156,6 +182,8 @@ class Config:
             self.YTDL_OPTIONS_FILE = str(Path(self.YTDL_OPTIONS_FILE).resolve())
         if self.YTDL_OPTIONS_PRESETS_FILE and self.YTDL_OPTIONS_PRESETS_FILE.startswith('.'):
             self.YTDL_OPTIONS_PRESETS_FILE = str(Path(self.YTDL_OPTIONS_PRESETS_FILE).resolve())
+        if self.MAX_CONCURRENT_DOWNLOADS_FILE:
+            self.MAX_CONCURRENT_DOWNLOADS_FILE = str(Path(self.MAX_CONCURRENT_DOWNLOADS_FILE).resolve())
 
         if self.YTDL_NIGHTLY_UPDATE_TIME and not _NIGHTLY_TIME_RE.match(self.YTDL_NIGHTLY_UPDATE_TIME):
             log.error(
@@ -165,12 +193,31 @@ class Config:
             sys.exit(1)
 
         self._validate_int('MAX_CONCURRENT_DOWNLOADS', minimum=1)
+        self._validate_int('DRAIN_TIMEOUT', minimum=0)
+        self._parse_host_limits()
+        self._validate_int('ADAPTIVE_CONCURRENCY_MIN', minimum=1)
+        self._validate_int('ADAPTIVE_CONCURRENCY_MAX', minimum=int(self.ADAPTIVE_CONCURRENCY_MIN))
+        self._parse_bandwidth()
+        self._validate_int('DOWNLOAD_WORKERS', minimum=0)
+        self._validate_int('DOWNLOAD_WORKER_MAX_JOBS', minimum=1)
+        self._parse_executor_threads()
+        self._validate_choice('EXTRACTION_MODE', ('thread', 'process'))
+        self._validate_int('EXTRACTION_WORKER_MAX_JOBS', minimum=1)
+        self._validate_int('POSTPROCESS_WORKERS', minimum=0)
+        self._validate_int('EXTRACT_CACHE_TTL', minimum=0)
+        self._validate_int('EXTRACT_CACHE_MAX_ENTRIES', minimum=0)
+        self._validate_int('EXTRACT_CACHE_MAX_MB', minimum=0)
         self._validate_int('PORT', minimum=1, maximum=65535)
         self._validate_int('CLEAR_COMPLETED_AFTER', minimum=0)
         self._validate_int('DEFAULT_OPTION_PLAYLIST_ITEM_LIMIT', minimum=0)
         self._validate_int('SUBSCRIPTION_DEFAULT_CHECK_INTERVAL', minimum=1)
         self._validate_int('SUBSCRIPTION_SCAN_PLAYLIST_END', minimum=1)
         self._validate_int('SUBSCRIPTION_MAX_SEEN_IDS', minimum=1)
+        self._validate_int('SOCKET_REPLAY_EVENTS', minimum=0)
+        self._validate_int('SOCKET_UPDATE_INTERVAL_MS', minimum=0)
+        self._validate_choice('STATE_BACKEND', ('json', 'journal', 'sqlite'))
+        self._validate_int('STATE_COMMIT_MAX_DELAY_MS', minimum=0)
+        self._validate_int('STATE_COMMIT_MAX_BATCH', minimum=1)
 
         self._runtime_overrides = {}
 
@@ -181,6 +228,71 @@ class Config:
         if not success:
             sys.exit(1)
 
+    def _parse_host_limits(self):
+        raw = self.MAX_CONCURRENT_DOWNLOADS_PER_HOST
+        try:
+            limits = json.loads(raw) if isinstance(raw, str) else raw
+            assert isinstance(limits, dict)
+            assert all(isinstance(v, int) and not isinstance(v, bool) and v >= 1 for v in limits.values())
+        except (json.decoder.JSONDecodeError, AssertionError):
+            log.error('Environment variable "MAX_CONCURRENT_DOWNLOADS_PER_HOST" must be a JSON object '
+                      f'mapping hosts or extractors to positive integers, got "{raw}"')
+            sys.exit(1)
+        self.MAX_CONCURRENT_DOWNLOADS_PER_HOST = limits
+
+    def _parse_executor_threads(self):
+        raw = self.EXECUTOR_THREADS
+        try:
+            threads = json.loads(raw) if isinstance(raw, str) else raw
+            assert isinstance(threads, dict)
+            assert all(k in executors.DEFAULT_THREADS for k in threads)
+            assert all(isinstance(v, int) and not isinstance(v, bool) and v >= 1 for v in threads.values())
+        except (json.decoder.JSONDecodeError, AssertionError):
+            log.error('Environment variable "EXECUTOR_THREADS" must be a JSON object mapping '
+                      f'{", ".join(executors.DEFAULT_THREADS)} to positive integers, got "{raw}"')
+            sys.exit(1)
+        self.EXECUTOR_THREADS = threads
+
+    @staticmethod
+    def _parse_rate(value):
+        # Bytes per second, as a number or with a yt-dlp style binary suffix
+        # ("500K", "4.2M"). Empty, null or 0 means no limit.
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool):
+            raise ValueError(value)
+        if isinstance(value, (int, float)):
+            rate = float(value)
+        else:
+            m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', value, re.IGNORECASE)
+            if not m:
+                raise ValueError(value)
+            rate = float(m.group(1)) * 1024 ** ' KMGT'.index(m.group(2).upper() or ' ')
+        if rate < 0:
+            raise ValueError(value)
+        return rate or None
+
+    def _parse_bandwidth(self):
+        try:
+            self.DOWNLOAD_BANDWIDTH_LIMIT = self._parse_rate(self.DOWNLOAD_BANDWIDTH_LIMIT)
+        except ValueError:
+            log.error('Environment variable "DOWNLOAD_BANDWIDTH_LIMIT" must be a rate in bytes per second '
+                      f'such as "500K" or "4M", got "{self.DOWNLOAD_BANDWIDTH_LIMIT}"')
+            sys.exit(1)
+        raw = self.DOWNLOAD_BANDWIDTH_SCHEDULE
+        try:
+            entries = json.loads(raw) if isinstance(raw, str) else raw
+            assert isinstance(entries, dict)
+            schedule = {}
+            for at, rate in entries.items():
+                start = datetime.strptime(at, '%H:%M')
+                schedule[start.hour * 60 + start.minute] = self._parse_rate(rate)
+        except (json.decoder.JSONDecodeError, AssertionError, TypeError, ValueError):
+            log.error('Environment variable "DOWNLOAD_BANDWIDTH_SCHEDULE" must be a JSON object mapping '
+                      f'times of day ("HH:MM") to rates such as "4M", got "{raw}"')
+            sys.exit(1)
+        self.DOWNLOAD_BANDWIDTH_SCHEDULE = schedule
+
     def _validate_int(self, key, *, minimum=None, maximum=None):
         raw = getattr(self, key)
         try:
@@ -195,6 +307,12 @@ class Config:
             log.error('Environment variable "%s" must be <= %d, got "%s"', key, maximum, raw)
             sys.exit(1)
 
+    def _validate_choice(self, key, choices):
+        raw = getattr(self, key)
+        if raw not in choices:
+            log.error('Environment variable "%s" must be one of %s, got "%s"', key, ', '.join(choices), raw)
+            sys.exit(1)
+
     def set_runtime_override(self, key, value):
         self._runtime_overrides[key] = value
         self.YTDL_OPTIONS[key] = value
@@ -572,41 +690,164 @@ def _migrate_legacy_request(post: dict) -> dict:
 
     return post
 
+# Download events are numbered and kept so a reconnecting client can catch up
+# on what it missed instead of being sent the whole queue again.
+event_log = EventLog(int(config.SOCKET_REPLAY_EVENTS))
+# Held while an event is numbered and emitted, and while a connecting client
+# is brought up to date, so a client never sees a live event ahead of the
+# snapshot or replayed events it follows.
+_broadcast_lock = asyncio.Lock()
+
+
+async def _broadcast(event, data):
+    payload = serializer.encode(data)
+    async with _broadcast_lock:
+        await _emit_locked(event, payload)
+
+
+async def _emit_locked(event, payload):
+    """Number and send an encoded event; the caller holds _broadcast_lock."""
+    cursor = event_log.append(event, payload)
+    # A tuple is sent as separate arguments: handlers that only take the
+    # payload keep working, and the client tracks the cursor on the side.
+    await sio.emit(event, (payload, cursor))
+
+
+def _public_view_copy(view):
+    # Lists such as chapter_files grow in place, so the remembered view needs
+    # its own copy of them to notice.
+    return {k: copy.copy(v) if isinstance(v, (list, dict)) else v for k, v in view.items()}
+
+
 class Notifier(DownloadQueueNotifier):
+    def __init__(self):
+        # Bumped on every event. Progress updates change a download in place
+        # without touching its queue, so together with DownloadQueue.revision
+        # this tells whether anything /history returns can have changed.
+        self.revision = 0
+        # Progress updates are coalesced: each marks its download dirty, and
+        # every update_interval seconds the dirty downloads go out, in their
+        # latest state, as one 'updated_batch' event. Everything else is sent
+        # at once. An interval of 0 sends every update as its own 'updated'.
+        self.update_interval = int(config.SOCKET_UPDATE_INTERVAL_MS) / 1000
+        self._dirty = {}
+        self._flush_task = None
+        # The public view last broadcast per queued download. Updates carry
+        # only the keys that changed since, plus the url that identifies the
+        # row; every client holds that view already, from the 'added' event or
+        # from a snapshot (see take_updates).
+        self._sent = {}
+
+    def _delta(self, dl):
+        view = dl.to_public_dict()
+        last = self._sent.get(dl.url)
+        self._sent[dl.url] = _public_view_copy(view)
+        if last is None:
+            return view
+        delta = {k: v for k, v in view.items() if k not in last or last[k] != v}
+        if not delta:
+            return None
+        delta['url'] = dl.url
+        return delta
+
+    def take_updates(self):
+        """Return the encoded 'updated_batch' for the dirty downloads, or None.
+
+        Used before a snapshot: once the batch is sent, every remembered view
+        matches the live one, so the snapshot and later deltas agree for new
+        and existing clients alike.
+        """
+        deltas = [delta for delta in map(self._delta, self._dirty.values()) if delta is not None]
+        self._dirty.clear()
+        return serializer.encode(deltas) if deltas else None
+
     async def added(self, dl):
+        self.revision += 1
         log.info(f"Notifier: Download added - {dl.title}")
-        await sio.emit('added', serializer.encode(dl))
+        self._sent[dl.url] = _public_view_copy(dl.to_public_dict())
+        await _broadcast('added', dl)
+
+    async def added_bulk(self, dls):
+        self.revision += 1
+        log.info(f"Notifier: {len(dls)} downloads added")
+        for dl in dls:
+            self._sent[dl.url] = _public_view_copy(dl.to_public_dict())
+        await _broadcast('added_bulk', dls)
 
     async def updated(self, dl):
+        self.revision += 1
         log.debug(f"Notifier: Download updated - {dl.title}")
-        await sio.emit('updated', serializer.encode(dl))
+        if self.update_interval <= 0:
+            delta = self._delta(dl)
+            if delta is not None:
+                await _broadcast('updated', delta)
+            return
+        self._dirty[dl.url] = dl
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = bg_tasks.create_task(self._flush_updates(), name="flush_updates")
+
+    async def _flush_updates(self):
+        await asyncio.sleep(self.update_interval)
+        async with _broadcast_lock:
+            payload = self.take_updates()
+            if payload is not None:
+                await _emit_locked('updated_batch', payload)
+
+    def _forget(self, url):
+        self._dirty.pop(url, None)
+        self._sent.pop(url, None)
 
     async def completed(self, dl):
+        self.revision += 1
         log.info(f"Notifier: Download completed - {dl.title}")
-        await sio.emit('completed', serializer.encode(dl))
+        # The terminal event carries the final state; a pending update sent
+        # after it would only be ignored by clients.
+        self._forget(dl.url)
+        await _broadcast('completed', dl)
 
     async def canceled(self, id):
+        self.revision += 1
         log.info(f"Notifier: Download canceled - {id}")
-        await sio.emit('canceled', serializer.encode(id))
+        self._forget(id)
+        await _broadcast('canceled', id)
 
     async def cleared(self, id):
+        self.revision += 1
         log.info(f"Notifier: Download cleared - {id}")
-        await sio.emit('cleared', serializer.encode(id))
+        self._forget(id)
+        await _broadcast('cleared', id)
+
+    async def concurrency_changed(self):
+        log.info(f"Notifier: Download concurrency changed to {dqueue.scheduler.limit}")
+        await sio.emit('concurrency', serializer.encode(_concurrency_status()))
 
-dqueue = DownloadQueue(config, Notifier())
+    async def drain_changed(self):
+        await sio.emit('drain', serializer.encode(dqueue.drain_status()))
+
+    async def add_progress(self, progress):
+        await sio.emit('add_progress', serializer.encode(progress))
+
+notifier = Notifier()
+extraction_processes = ()
+if config.EXTRACTION_MODE == 'process':
+    if worker_pool.available():
+        extraction_processes = ('extract', 'background')
+    else:
+        log.warning("EXTRACTION_MODE is process but this platform has no forkserver; extracting in threads")
+executors.configure(config.EXECUTOR_THREADS, extraction_processes, int(config.EXTRACTION_WORKER_MAX_JOBS))
+dqueue = DownloadQueue(config, notifier)
 
 
 async def _download_queue_startup(app):
     await dqueue.initialize()
 
 
-async def _shutdown_download_manager(app):
+async def _shutdown_download_queue(app):
     dqueue.close()
-    Download.shutdown_manager()
 
 
 app.on_startup.append(_download_queue_startup)
-app.on_cleanup.append(_shutdown_download_manager)
+app.on_cleanup.append(_shutdown_download_queue)
 
 
 class MetubeSubscriptionNotifier(SubscriptionNotifier):
@@ -632,7 +873,12 @@ async def _shutdown_subscriptions(app):
     submgr.close()
 
 
+async def _shutdown_executors(app):
+    executors.shutdown()
+
+
 app.on_cleanup.append(_shutdown_subscriptions)
+app.on_cleanup.append(_shutdown_executors)
 
 
 async def _subscription_loop_startup(app):
@@ -651,8 +897,10 @@ async def _schedule_nightly_update() -> None:
     delay = seconds_until_next_daily_time(time_hhmm)
     log.info('Next yt-dlp nightly update in %.0f seconds (at %s local time)', delay, time_hhmm)
     await asyncio.sleep(delay)
-    log.info('Scheduled yt-dlp nightly update: requesting restart')
+    log.info('Scheduled yt-dlp nightly update: draining downloads before restart')
     _RESTART_FOR_UPDATE = True
+    await dqueue.drain(int(config.DRAIN_TIMEOUT))
+    log.info('Scheduled yt-dlp nightly update: requesting restart')
     asyncio.get_running_loop().call_soon(_request_graceful_exit)
 
 
@@ -663,19 +911,23 @@ async def _start_nightly_update_schedule(app):
 app.on_startup.append(_start_nightly_update_schedule)
 
 class FileOpsFilter(DefaultFilter):
+    def __init__(self, watched_path: str):
+        super().__init__()
+        self.watched_path = watched_path
+
     def __call__(self, change_type: int, path: str) -> bool:
-        # Check if this path matches our YTDL_OPTIONS_FILE
-        if path != config.YTDL_OPTIONS_FILE:
+        # Check if this path matches the watched file
+        if path != self.watched_path:
             return False
 
         # For existing files, use samefile comparison to handle symlinks correctly
-        if os.path.exists(config.YTDL_OPTIONS_FILE):
+        if os.path.exists(self.watched_path):
             try:
-                if not os.path.samefile(path, config.YTDL_OPTIONS_FILE):
+                if not os.path.samefile(path, self.watched_path):
                     return False
             except (OSError, IOError):
                 # If samefile fails, fall back to string comparison
-                if path != config.YTDL_OPTIONS_FILE:
+                if path != self.watched_path:
                     return False
 
         # Accept all change types for our file: modified, added, deleted
@@ -700,7 +952,7 @@ def get_options_update_time(success=True, msg=''):
 
 async def watch_files():
     async def _watch_files():
-        async for changes in awatch(config.YTDL_OPTIONS_FILE, watch_filter=FileOpsFilter()):
+        async for changes in awatch(config.YTDL_OPTIONS_FILE, watch_filter=FileOpsFilter(config.YTDL_OPTIONS_FILE)):
             success, msg = config.load_ytdl_options()
             result = get_options_update_time(success, msg)
             await sio.emit('ytdl_options_changed', serializer.encode(result))
@@ -716,6 +968,67 @@ if config.YTDL_OPTIONS_FILE:
     app.on_startup.append(_watch_files_startup)
 
 
+def _concurrency_status() -> dict:
+    status = {
+        'limit': dqueue.scheduler.limit,
+        'running': dqueue.scheduler.running,
+        'waiting': dqueue.scheduler.waiting,
+    }
+    if dqueue.adaptive is not None:
+        status['adaptive'] = dqueue.adaptive.metrics()
+    return status
+
+
+async def _set_concurrency(limit: int):
+    dqueue.set_concurrency(limit)
+    await notifier.concurrency_changed()
+
+
+def _read_concurrency_file() -> int | None:
+    """The limit in MAX_CONCURRENT_DOWNLOADS_FILE, or None (logged) if the
+    file is missing or does not hold a positive integer."""
+    path = config.MAX_CONCURRENT_DOWNLOADS_FILE
+    try:
+        with open(path) as f:
+            limit = int(f.read().strip())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        log.error(f'Could not read a concurrency limit from "{path}": {exc}')
+        return None
+    if limit < 1:
+        log.error(f'Ignoring concurrency limit {limit} from "{path}": it must be at least 1')
+        return None
+    return limit
+
+
+async def _watch_concurrency_file(app):
+    # Written by hand or by tooling to retune a running server; the file wins
+    # over the environment variable whenever it holds a valid limit.
+    path = config.MAX_CONCURRENT_DOWNLOADS_FILE
+    if dqueue.adaptive is not None:
+        log.warning(f'Ignoring "{path}": with ADAPTIVE_CONCURRENCY on, the controller sets the limit')
+        return
+    limit = _read_concurrency_file()
+    if limit is not None:
+        await _set_concurrency(limit)
+
+    async def _watch():
+        # The directory is watched, not the file, so that creating the file
+        # later or replacing it atomically is picked up too.
+        async for _changes in awatch(os.path.dirname(path), watch_filter=FileOpsFilter(path)):
+            limit = _read_concurrency_file()
+            if limit is not None:
+                await _set_concurrency(limit)
+
+    log.info(f'Starting Watch File: {path}')
+    bg_tasks.create_task(_watch(), name="watch_concurrency_file")
+
+
+if config.MAX_CONCURRENT_DOWNLOADS_FILE:
+    app.on_startup.append(_watch_concurrency_file)
+
+
 async def _read_json_request(request: web.Request) -> dict:
     try:
         post = await request.json()
@@ -743,6 +1056,7 @@ def parse_download_options(post: dict) -> dict:
     auto_start = post.get('auto_start')
     split_by_chapters = post.get('split_by_chapters')
     sponsorblock = bool(post.get('sponsorblock'))
+    refresh = bool(post.get('refresh'))
     chapter_template = post.get('chapter_template')
     subtitle_language = post.get('subtitle_language')
     subtitle_mode = post.get('subtitle_mode')
@@ -871,6 +1185,7 @@ def parse_download_options(post: dict) -> dict:
         'ytdl_options_overrides': ytdl_options_overrides,
         'clip_start': clip_start,
         'clip_end': clip_end,
+        'refresh': refresh,
     }
 
 
@@ -910,6 +1225,7 @@ async def add(request):
         o['clip_start'],
         o['clip_end'],
         sponsorblock=o['sponsorblock'],
+        refresh=o['refresh'],
     )
     return web.Response(text=serializer.encode(status))
 
@@ -1078,6 +1394,76 @@ async def start(request):
     return web.Response(text=serializer.encode(status))
 
 
+@routes.post(config.URL_PREFIX + 'pause')
+async def pause(request):
+    post = await _read_json_request(request)
+    ids = _require_id_list(post)
+    log.info(f"Received request to pause downloads for ids: {ids}")
+    status = await dqueue.pause(ids)
+    return web.Response(text=serializer.encode(status))
+
+
+@routes.post(config.URL_PREFIX + 'resume')
+async def resume(request):
+    post = await _read_json_request(request)
+    ids = _require_id_list(post)
+    log.info(f"Received request to resume downloads for ids: {ids}")
+    status = await dqueue.resume(ids)
+    return web.Response(text=serializer.encode(status))
+
+
+def _require_priority(post: dict) -> int:
+    value = post.get('priority')
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise web.HTTPBadRequest(reason="'priority' must be an integer")
+    return value
+
+
+@routes.post(config.URL_PREFIX + 'priority')
+async def priority(request):
+    post = await _read_json_request(request)
+    ids = _require_id_list(post)
+    value = _require_priority(post)
+    log.info(f"Received request to set priority {value} for ids: {ids}")
+    status = await dqueue.set_priority(ids, value)
+    return web.Response(text=serializer.encode(status))
+
+
+@routes.get(config.URL_PREFIX + 'concurrency')
+async def get_concurrency(request):
+    return web.Response(text=serializer.encode(_concurrency_status()))
+
+
+@routes.post(config.URL_PREFIX + 'concurrency')
+async def set_concurrency(request):
+    post = await _read_json_request(request)
+    limit = post.get('limit')
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+        raise web.HTTPBadRequest(reason="'limit' must be a positive integer")
+    if dqueue.adaptive is not None:
+        # The controller would overwrite it within a window anyway.
+        raise web.HTTPConflict(reason="ADAPTIVE_CONCURRENCY is on, so the limit is set by the controller "
+                                      "within ADAPTIVE_CONCURRENCY_MIN and ADAPTIVE_CONCURRENCY_MAX")
+    log.info(f"Received request to set download concurrency to {limit}")
+    await _set_concurrency(limit)
+    return web.Response(text=serializer.encode(_concurrency_status()))
+
+
+@routes.get(config.URL_PREFIX + 'drain')
+async def get_drain(request):
+    return web.Response(text=serializer.encode(dqueue.drain_status()))
+
+
+@routes.get(config.URL_PREFIX + 'extract-cache')
+async def get_extract_cache(request):
+    return web.Response(text=serializer.encode(dqueue.extract_cache.metrics()))
+
+
+@routes.get(config.URL_PREFIX + 'executors')
+async def get_executors(request):
+    return web.Response(text=serializer.encode(executors.metrics()))
+
+
 COOKIES_PATH = os.path.join(config.STATE_DIR, 'cookies.txt')
 
 
@@ -1173,8 +1559,95 @@ async def cookie_status(request):
     exists = has_uploaded_cookies or has_configured_cookies
     return web.Response(text=serializer.encode({'status': 'ok', 'has_cookies': exists}))
 
+_HISTORY_SORT_KEYS = ('timestamp', 'title', 'status')
+# Below this a gzip round trip costs more than the bytes it saves.
+_HISTORY_COMPRESS_MIN_BYTES = 1024
+
+
+def _history_etag() -> str:
+    # The event log's epoch tells this process's revisions from those of an
+    # earlier one, which restart from zero.
+    return f'W/"{event_log.epoch}.{dqueue.revision}.{notifier.revision}"'
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # Weak comparison (RFC 9110 8.8.3.2): the W/ prefix is ignored.
+    opaque = etag.removeprefix('W/')
+    return any(
+        candidate.strip() == '*' or candidate.strip().removeprefix('W/') == opaque
+        for candidate in header.split(',')
+    )
+
+
+def _query_int(query, key, *, minimum):
+    raw = query.get(key)
+    if raw is None:
+        return None
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise web.HTTPBadRequest(reason=f'{key} must be an integer') from exc
+    if value < minimum:
+        raise web.HTTPBadRequest(reason=f'{key} must be >= {minimum}')
+    return value
+
+
+def _history_filter(query):
+    """Build the per-list transform for /history's query parameters.
+
+    ``status`` takes a comma-separated list, ``since`` a Unix time in seconds
+    (downloads added at or after it), ``sort`` one of _HISTORY_SORT_KEYS with a
+    leading ``-`` for descending, and ``offset``/``limit`` page the result.
+    Returns None when no parameter is given, so the plain call keeps its
+    original, untouched response.
+    """
+    offset = _query_int(query, 'offset', minimum=0)
+    limit = _query_int(query, 'limit', minimum=1)
+    statuses = {s.strip() for s in query.get('status', '').split(',') if s.strip()}
+    since_ns = None
+    if query.get('since') is not None:
+        try:
+            since_ns = float(query['since']) * 1_000_000_000
+        except ValueError as exc:
+            raise web.HTTPBadRequest(reason='since must be a Unix timestamp') from exc
+    sort = query.get('sort') or None
+    if sort is not None and sort.removeprefix('-') not in _HISTORY_SORT_KEYS:
+        raise web.HTTPBadRequest(reason=f'sort must be one of {", ".join(_HISTORY_SORT_KEYS)}')
+    if offset is None and limit is None and not statuses and since_ns is None and sort is None:
+        return None
+
+    def apply(infos):
+        if statuses:
+            infos = [info for info in infos if getattr(info, 'status', None) in statuses]
+        if since_ns is not None:
+            infos = [info for info in infos if (getattr(info, 'timestamp', None) or 0) >= since_ns]
+        if sort is not None:
+            key = sort.removeprefix('-')
+            infos = sorted(
+                infos,
+                key=lambda info: getattr(info, key, None) or (0 if key == 'timestamp' else ''),
+                reverse=sort.startswith('-'),
+            )
+        total = len(infos)
+        start = offset or 0
+        infos = infos[start:start + limit] if limit is not None else infos[start:]
+        return infos, total
+
+    return apply, offset is not None or limit is not None
+
+
 @routes.get(config.URL_PREFIX + 'history')
 async def history(request):
+    etag = _history_etag()
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    # Checked before anything is collected: an unchanged poll costs nothing.
+    if _etag_matches(request, etag):
+        return web.Response(status=304, headers=headers)
+    transform = _history_filter(request.query)
+
     history = { 'done': [], 'queue': [], 'pending': []}
 
     # Served from the in-memory queues (like the socket 'all' event) rather
@@ -1187,24 +1660,70 @@ async def history(request):
     for _, v in dqueue.pending.items():
         history['pending'].append(v.info)
 
+    if transform is not None:
+        apply, paginated = transform
+        totals = {}
+        for name in ('done', 'queue', 'pending'):
+            history[name], totals[name] = apply(history[name])
+        if paginated:
+            history['total'] = totals
+
     log.info("Sending download history")
-    return web.Response(text=serializer.encode(history))
+    resp = web.Response(text=serializer.encode(history), headers=headers)
+    if len(resp.body) >= _HISTORY_COMPRESS_MIN_BYTES:
+        # Negotiated against Accept-Encoding when the response is sent.
+        resp.enable_compression()
+    return resp
 
 @sio.event
-async def connect(sid, environ):
+async def connect(sid, environ, auth=None):
     log.info(f"Client connected: {sid}")
-    await sio.emit('all', serializer.encode(dqueue.get()), to=sid)
+    # A reconnecting client sends the cursor of the last event it saw. If the
+    # events since are still buffered it gets just those; otherwise, or on a
+    # first connect, the full snapshot with the cursor it is current as of.
+    cursor = auth.get('cursor') if isinstance(auth, dict) else None
+    async with _broadcast_lock:
+        missed = event_log.since(cursor) if cursor is not None else None
+        if missed is None:
+            # Flushed first and encoded back to back, with nothing in between
+            # that could change a download, so the snapshot matches the views
+            # that later deltas are computed against.
+            updates = notifier.take_updates()
+            snapshot = serializer.encode(dqueue.get())
+            if updates is not None:
+                await _emit_locked('updated_batch', updates)
+            await sio.emit('all', (snapshot, event_log.cursor), to=sid)
+        else:
+            log.debug(f"Replaying {len(missed)} missed events to {sid}")
+            for event, payload, event_cursor in missed:
+                await sio.emit(event, (payload, event_cursor), to=sid)
     await sio.emit('subscriptions_all', serializer.encode([s.to_public_dict() for s in submgr.list_all()]), to=sid)
     await sio.emit('configuration', serializer.encode(config.frontend_safe()), to=sid)
+    if dqueue.drain_deadline is not None:
+        await sio.emit('drain', serializer.encode(dqueue.drain_status()), to=sid)
     if config.CUSTOM_DIRS:
         # get_custom_dirs() can walk the whole download tree on a cache miss;
         # keep that off the event loop so a large library doesn't stall every
         # client's connect handshake.
-        dirs = await asyncio.get_running_loop().run_in_executor(None, get_custom_dirs)
+        dirs = await executors.run('fs', get_custom_dirs)
         await sio.emit('custom_dirs', serializer.encode(dirs), to=sid)
     if config.YTDL_OPTIONS_FILE:
         await sio.emit('ytdl_options_changed', serializer.encode(get_options_update_time()), to=sid)
 
+@sio.on('priority')
+async def priority_event(sid, data):
+    """Socket counterpart of POST /priority, for clients that already hold a
+    connection; the result is sent back as the event's acknowledgement."""
+    try:
+        if not isinstance(data, dict):
+            raise web.HTTPBadRequest(reason='priority event data must be an object')
+        ids = _require_id_list(data)
+        value = _require_priority(data)
+    except web.HTTPBadRequest as exc:
+        return {'status': 'error', 'msg': exc.reason}
+    log.info(f"Received priority event from {sid} to set priority {value} for ids: {ids}")
+    return await dqueue.set_priority(ids, value)
+
 def get_custom_dirs():
     cache_ttl_seconds = 5
     now = time.monotonic()
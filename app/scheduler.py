@@ -0,0 +1,321 @@
+import asyncio
+import collections
+import datetime
+import heapq
+import itertools
+from typing import Any, Callable, Hashable, Optional
+from urllib.parse import urlsplit
+
+# Per-host limit that applies to hosts with no entry of their own.
+DEFAULT_HOST_KEY = '*'
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'key', 'token', 'start', 'removed')
+
+    def __init__(self, priority, seq, key, token, start):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.token = token
+        self.start = start
+        self.removed = False
+
+    def __lt__(self, other):
+        # Higher priority first, then first come first served.
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class DownloadScheduler:
+    """Hands out download slots under a global cap and per-host caps.
+
+    Every download is keyed by where it comes from: the entry in *host_limits*
+    naming its yt-dlp extractor (``"youtube"``) or its hostname or a parent
+    domain of it (``"soundcloud.com"``), else its bare hostname, which is
+    limited by the ``"*"`` entry if there is one. A slot is granted when both
+    the global cap and the key's cap have room.
+
+    Waiters are kept in one heap per key, ordered by priority (higher first)
+    and then arrival. A free slot goes to the best waiter among the keys that
+    are below their cap, so a busy host never holds up the waiters of another
+    and an urgent download can be moved ahead of a long backlog with
+    ``set_priority``. A waiter is only a heap entry holding the callable that
+    starts it; nothing runs for it until it is granted a slot, so a backlog of
+    thousands costs no tasks. Whoever was started must ``release`` its slot.
+    """
+
+    def __init__(self, limit: int, host_limits: Optional[dict[str, int]] = None):
+        self.limit = limit
+        self.host_limits = {k.lower(): v for k, v in (host_limits or {}).items()}
+        self.running = 0
+        self.held = False
+        self._active: dict[str, int] = {}
+        self._waiting: dict[str, list[_Waiter]] = {}
+        self._by_token: dict[Hashable, _Waiter] = {}
+        self._seq = itertools.count()
+
+    def key_for(self, url: str, extractor: Optional[str] = None) -> str:
+        if extractor and extractor.lower() in self.host_limits:
+            return extractor.lower()
+        host = (urlsplit(url).hostname or '').lower()
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            domain = '.'.join(labels[i:])
+            if domain in self.host_limits:
+                return domain
+        return host
+
+    @property
+    def waiting(self) -> int:
+        return len(self._by_token)
+
+    def _host_limit(self, key: str) -> Optional[int]:
+        return self.host_limits.get(key, self.host_limits.get(DEFAULT_HOST_KEY))
+
+    def _host_has_room(self, key: str) -> bool:
+        host_limit = self._host_limit(key)
+        return host_limit is None or self._active.get(key, 0) < host_limit
+
+    def _can_run(self, key: str) -> bool:
+        return not self.held and self.running < self.limit and self._host_has_room(key)
+
+    def _grant(self, key: str):
+        self.running += 1
+        self._active[key] = self._active.get(key, 0) + 1
+
+    def _push(self, waiter: _Waiter):
+        heapq.heappush(self._waiting.setdefault(waiter.key, []), waiter)
+        self._by_token[waiter.token] = waiter
+
+    def _head(self, key: str) -> Optional[_Waiter]:
+        heap = self._waiting[key]
+        while heap and heap[0].removed:
+            heapq.heappop(heap)
+        if not heap:
+            del self._waiting[key]
+            return None
+        return heap[0]
+
+    def _dispatch(self):
+        # No waiter is left runnable after a dispatch, which is what lets
+        # submit() start a download straight away whenever its key can run.
+        while not self.held and self.running < self.limit:
+            best = None
+            for key in list(self._waiting):
+                head = self._head(key)
+                if head is not None and self._host_has_room(key) and (best is None or head < best):
+                    best = head
+            if best is None:
+                return
+            heapq.heappop(self._waiting[best.key])
+            del self._by_token[best.token]
+            self._grant(best.key)
+            best.start()
+
+    def submit(self, key: str, start: Callable[[], Any], priority: int = 0, token: Any = None):
+        """Call *start* once a slot for *key* is free, right away if one is.
+        *token* names the waiter for ``set_priority`` and ``discard``."""
+        if token is not None:
+            self.discard(token)
+        if self._can_run(key):
+            self._grant(key)
+            start()
+            return
+        self._push(_Waiter(priority, next(self._seq), key, object() if token is None else token, start))
+
+    def discard(self, token: Any) -> bool:
+        """Drop a waiter that has not started. False if it is not waiting."""
+        waiter = self._by_token.pop(token, None)
+        if waiter is None:
+            return False
+        waiter.removed = True
+        return True
+
+    def set_priority(self, token: Any, priority: int) -> bool:
+        """Move a waiting download to *priority*, keeping its place among
+        downloads of equal priority. False if it is not waiting."""
+        old = self._by_token.get(token)
+        if old is None:
+            return False
+        old.removed = True
+        self._push(_Waiter(priority, old.seq, old.key, token, old.start))
+        return True
+
+    def set_limit(self, limit: int):
+        """Change the global cap. Raising it starts waiters straight away;
+        lowering it lets running downloads finish and starts nothing more
+        until fewer than *limit* are left."""
+        self.limit = limit
+        self._dispatch()
+
+    def hold(self):
+        """Start nothing more. Running downloads keep their slots; new
+        submissions wait."""
+        self.held = True
+
+    def release(self, key: str):
+        self.running -= 1
+        self._active[key] -= 1
+        if not self._active[key]:
+            del self._active[key]
+        self._dispatch()
+
+
+class SlotPool:
+    """A fixed number of slots, handed out first come, first served."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.running = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.running < self.size and not self._waiters:
+            self.running += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            else:
+                # Granted a slot just as we were cancelled; pass it on.
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the next waiter.
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+
+class AdaptiveConcurrency:
+    """AIMD controller for the global download limit.
+
+    Fed the outcome of every finished download and periodic samples of the
+    aggregate download speed, ``decide`` is called once per window and returns
+    the limit to use next:
+
+    * a window in which more than *error_threshold* of the downloads failed
+      (and at least two did) looks like throttling, so the limit is cut by
+      *decrease_factor*;
+    * while every slot is busy and downloads are waiting, the limit grows by
+      one per window, as long as the previous step raised throughput by at
+      least *min_gain*. A step that did not is undone, since bandwidth rather
+      than concurrency is then the bottleneck, and growth pauses for
+      *cooldown* windows.
+
+    The result always stays within *minimum* and *maximum*.
+    """
+
+    def __init__(self, minimum: int, maximum: int, *, decrease_factor: float = 0.5,
+                 error_threshold: float = 0.25, min_gain: float = 0.05, cooldown: int = 10):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.error_threshold = error_threshold
+        self.min_gain = min_gain
+        self.cooldown = cooldown
+        self._succeeded = 0
+        self._failed = 0
+        self._speeds: list[float] = []
+        # Throughput before the last increase, while its effect is measured.
+        self._baseline: Optional[float] = None
+        self._hold_windows = 0
+        self.last = {'decision': None, 'throughput': None, 'error_rate': None}
+        self.decisions = 0
+
+    def record_result(self, ok: bool):
+        if ok:
+            self._succeeded += 1
+        else:
+            self._failed += 1
+
+    def record_speed(self, bytes_per_second: float):
+        self._speeds.append(bytes_per_second)
+
+    def decide(self, limit: int, running: int, waiting: int) -> int:
+        throughput = sum(self._speeds) / len(self._speeds) if self._speeds else 0.0
+        finished = self._succeeded + self._failed
+        error_rate = self._failed / finished if finished else 0.0
+        failed = self._failed
+        self._speeds.clear()
+        self._succeeded = self._failed = 0
+        self._hold_windows = max(0, self._hold_windows - 1)
+
+        baseline, self._baseline = self._baseline, None
+        if failed >= 2 and error_rate > self.error_threshold:
+            new, decision = int(limit * self.decrease_factor), 'decrease: error rate'
+        elif baseline is not None and throughput < baseline * (1 + self.min_gain):
+            new, decision = limit - 1, 'decrease: no throughput gain'
+            self._hold_windows = self.cooldown
+        elif running >= limit and waiting and limit < self.maximum and not self._hold_windows:
+            new, decision = limit + 1, 'increase'
+            self._baseline = throughput
+        else:
+            new, decision = limit, 'hold'
+        new = max(self.minimum, min(self.maximum, new))
+        self.decisions += 1
+        self.last = {'decision': decision, 'throughput': throughput, 'error_rate': error_rate}
+        return new
+
+    def metrics(self) -> dict:
+        return {'minimum': self.minimum, 'maximum': self.maximum, 'decisions': self.decisions, **self.last}
+
+
+class BandwidthBudget:
+    """A server-wide download bandwidth budget, split evenly between the
+    downloads that are running.
+
+    *limit* is in bytes per second, None for no limit. *schedule* maps minutes
+    after midnight (local time) to the limit in force from then until the next
+    entry, wrapping round midnight; when given, it replaces *limit*.
+    """
+
+    def __init__(self, limit: Optional[float] = None, schedule: Optional[dict[int, Optional[float]]] = None):
+        self.limit = limit
+        self.schedule = sorted((schedule or {}).items())
+
+    @staticmethod
+    def _seconds_into_day(now: Optional[datetime.datetime]) -> float:
+        now = now or datetime.datetime.now()
+        return (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+
+    def current(self, now: Optional[datetime.datetime] = None) -> Optional[float]:
+        if not self.schedule:
+            return self.limit
+        elapsed = self._seconds_into_day(now)
+        limit = self.schedule[-1][1]
+        for start, rate in self.schedule:
+            if start * 60 > elapsed:
+                break
+            limit = rate
+        return limit
+
+    def share(self, downloads: int, now: Optional[datetime.datetime] = None) -> Optional[float]:
+        """Each of *downloads* running downloads' share, None for no limit."""
+        total = self.current(now)
+        if total is None or downloads <= 1:
+            return total
+        return total / downloads
+
+    def seconds_until_change(self, now: Optional[datetime.datetime] = None) -> Optional[float]:
+        """Time until the next schedule entry takes over, None without a schedule."""
+        if not self.schedule:
+            return None
+        elapsed = self._seconds_into_day(now)
+        for start, _rate in self.schedule:
+            if start * 60 > elapsed:
+                return start * 60 - elapsed
+        return 24 * 60 * 60 - elapsed + self.schedule[0][0] * 60
@@ -7,7 +7,9 @@ import json
 import logging
 import os
 import shelve
+import sqlite3
 import tempfile
+import threading
 import time
 from datetime import datetime
 from typing import Any, Optional
@@ -15,6 +17,7 @@ from typing import Any, Optional
 log = logging.getLogger("state_store")
 
 STATE_SCHEMA_VERSION = 2
+SQLITE_STATE_FILE = "state.sqlite3"
 _BYTES_MARKER = "__metube_bytes__"
 _DATETIME_MARKER = "__metube_datetime__"
 
@@ -235,3 +238,283 @@ class AtomicJsonStore:
             pass
         finally:
             os.close(fd)
+
+
+class JournaledJsonStore(AtomicJsonStore):
+    """An ``AtomicJsonStore`` snapshot extended by an append-only journal.
+
+    Each mutation is appended to ``<path>.journal`` as one JSON line, so its
+    cost is proportional to the record rather than to the whole document.
+    ``compact`` folds the journal back into the snapshot. Journal records must
+    be idempotent when replayed in order over a snapshot that already contains
+    them (last write per key wins), because a crash between writing the new
+    snapshot and removing the journal replays it onto its own result.
+    """
+
+    def __init__(self, path: str, *, kind: str, schema_version: int = STATE_SCHEMA_VERSION):
+        super().__init__(path, kind=kind, schema_version=schema_version)
+        self.journal_path = f"{path}.journal"
+        self.journal_bytes = self._current_journal_size()
+        # Records appended since the last compaction by this process. Records
+        # left over from a previous run are folded in by the owner on load.
+        self.journal_records = 0
+
+    def _current_journal_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def append(self, records: list[dict[str, Any]]) -> None:
+        """Durably append *records*: one write and one fsync for the batch."""
+        if not records:
+            return
+        self._ensure_parent()
+        data = "".join(self._serialize(record) for record in records).encode("utf-8")
+        created = not os.path.exists(self.journal_path)
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            start = os.fstat(fd).st_size
+            try:
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+                self._best_effort_fsync(fd)
+            except OSError:
+                # Cut a partially written batch back off, so the next append
+                # does not land after half a line and the failed records are
+                # never replayed -- the caller rolls them back in memory.
+                try:
+                    os.ftruncate(fd, start)
+                except OSError:
+                    pass
+                raise
+        finally:
+            os.close(fd)
+        if created:
+            self._fsync_directory(os.path.dirname(self.journal_path) or ".")
+        self.journal_bytes = start + len(data)
+        self.journal_records += len(records)
+
+    def load_journal(self) -> list[dict[str, Any]]:
+        try:
+            with open(self.journal_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return []
+        except OSError as exc:
+            log.warning("Could not read state journal at %s: %s", self.journal_path, exc)
+            return []
+        records = []
+        lines = raw.split(b"\n")
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line is the expected trace of a crash mid-append;
+                # anything else is damage worth mentioning. Either way the
+                # record never completed, so it is skipped rather than guessed at.
+                if index == len(lines) - 1:
+                    log.warning("Ignoring incomplete last record in state journal %s", self.journal_path)
+                else:
+                    log.warning("Skipping unreadable record %d in state journal %s", index + 1, self.journal_path)
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+
+    def compact(self, data: dict[str, Any]) -> None:
+        """Write *data* as the new snapshot and drop the journal it supersedes."""
+        self.save(data)
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._fsync_directory(os.path.dirname(self.journal_path) or ".")
+        self.journal_bytes = 0
+        self.journal_records = 0
+
+
+class SqliteStateStore:
+    """Every state collection as rows of one SQLite database.
+
+    A row is one download or subscription: its record as JSON in ``data``, and
+    beside it the url and status, for looking through the database by hand,
+    and the sort key the collection is loaded in. Everything is read at
+    start-up and then served from memory, so nothing is indexed beyond the
+    key: an index would only slow down the writes. A change is one small
+    transaction instead of a rewrite of the whole collection. WAL mode with
+    ``synchronous=FULL`` keeps a committed change as durable as the fsynced
+    JSON files.
+
+    The connection is shared by the event loop and a writer thread, so it is
+    opened with ``check_same_thread=False`` and every use holds ``_lock``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent and not os.path.isdir(parent):
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError as exc:
+            # A damaged database is set aside like an invalid JSON state file;
+            # the collections are then imported again from the JSON files.
+            self._quarantine(exc)
+            self._conn = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        # Created 0o600 up front: SQLite gives its -wal and -shm files the
+        # database file's mode, and state can contain URLs and option
+        # overrides that must not leak on shared mounts.
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    collection TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    url TEXT,
+                    status TEXT,
+                    sort_key REAL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (collection, key)
+                );
+                CREATE TABLE IF NOT EXISTS imported (
+                    collection TEXT PRIMARY KEY
+                );
+                """
+            )
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _quarantine(self, exc: Exception) -> None:
+        backup_path = f"{self.path}.invalid.{time.strftime('%Y%m%d%H%M%S')}"
+        for suffix in ("-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except OSError:
+                pass
+        try:
+            os.replace(self.path, backup_path)
+            log.warning("State database at %s was invalid (%s); moved it to %s", self.path, exc, backup_path)
+        except OSError as move_exc:
+            log.warning(
+                "State database at %s was invalid (%s) and could not be moved aside: %s",
+                self.path,
+                exc,
+                move_exc,
+            )
+            raise
+
+    @staticmethod
+    def _row(collection: str, row: tuple[str, Optional[str], Optional[str], Optional[float], dict[str, Any]]):
+        key, url, status, sort_key, data = row
+        return (
+            collection,
+            key,
+            url,
+            status,
+            sort_key,
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+        )
+
+    def _write(self, statements) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._conn.executemany(sql, params)
+                    else:
+                        self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load(self, collection: str) -> list[tuple[str, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, data FROM items WHERE collection = ? ORDER BY sort_key, rowid",
+                (collection,),
+            ).fetchall()
+        return self._decode(collection, rows)
+
+    def _decode(self, collection: str, rows) -> list[tuple[str, dict[str, Any]]]:
+        items = []
+        for key, data in rows:
+            try:
+                items.append((key, json.loads(data)))
+            except ValueError as exc:
+                log.warning("Skipping unreadable %s row %s in %s: %s", collection, key, self.path, exc)
+        return items
+
+    def apply(
+        self,
+        collection: str,
+        upserts: list[tuple[str, Optional[str], Optional[str], Optional[float], dict[str, Any]]],
+        deletes: list[str],
+    ) -> None:
+        """Write *upserts* and *deletes* to *collection* in one transaction."""
+        statements = []
+        if deletes:
+            statements.append((
+                "DELETE FROM items WHERE collection = ? AND key = ?",
+                [(collection, key) for key in deletes],
+            ))
+        if upserts:
+            # ON CONFLICT keeps the row's rowid, and with it its place among
+            # rows that share a sort key.
+            statements.append((
+                "INSERT INTO items (collection, key, url, status, sort_key, data)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (collection, key) DO UPDATE SET"
+                " url = excluded.url, status = excluded.status,"
+                " sort_key = excluded.sort_key, data = excluded.data",
+                [self._row(collection, row) for row in upserts],
+            ))
+        if statements:
+            self._write(statements)
+
+    def is_imported(self, collection: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM imported WHERE collection = ?", (collection,)
+            ).fetchone()
+        return row is not None
+
+    def import_collection(
+        self,
+        collection: str,
+        rows: list[tuple[str, Optional[str], Optional[str], Optional[float], dict[str, Any]]],
+    ) -> None:
+        """Replace *collection* with *rows* and mark it imported, atomically.
+
+        Used once per collection to take over the JSON (or legacy shelve)
+        state. The marker commits with the rows, so an interrupted import is
+        simply run again on the next start.
+        """
+        self._write([
+            ("DELETE FROM items WHERE collection = ?", (collection,)),
+            (
+                "INSERT OR REPLACE INTO items (collection, key, url, status, sort_key, data) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._row(collection, row) for row in rows],
+            ),
+            ("INSERT OR IGNORE INTO imported (collection) VALUES (?)", (collection,)),
+        ])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
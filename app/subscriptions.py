@@ -11,14 +11,15 @@ import time
 import types
 import uuid
 from dataclasses import dataclass, field, fields
-from functools import partial
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
 import yt_dlp
 import yt_dlp.networking.impersonate
 import bg_tasks
+import executors
 from dl_formats import merge_ytdl_option_layers
-from state_store import AtomicJsonStore, read_legacy_shelf
+from extraction import compact
+from state_store import SQLITE_STATE_FILE, AtomicJsonStore, SqliteStateStore, read_legacy_shelf
 from url_guard import validate_url
 
 log = logging.getLogger("subscriptions")
@@ -139,6 +140,20 @@ def extract_flat_playlist(
     return info, []
 
 
+# What extract_flat_playlist reads off the config; a worker process is sent
+# just these.
+_EXTRACT_CONFIG_KEYS = ("DOWNLOAD_DIR", "TEMP_DIR", "YTDL_OPTIONS", "ALLOW_PRIVATE_ADDRESSES")
+
+
+def _extract_flat_playlist_compact(config, url: str, playlistend: int, extra_opts: Optional[dict[str, Any]]):
+    """extract_flat_playlist as run in an extraction worker process."""
+    info, entries = extract_flat_playlist(config, url, playlistend, extra_opts=extra_opts)
+    if info is None:
+        return None, []
+    # The entries come back once, as the list.
+    return compact({k: v for k, v in info.items() if k != "entries"}), compact(entries)
+
+
 def _entry_video_url(entry: dict) -> Optional[str]:
     return entry.get("webpage_url") or entry.get("url")
 
@@ -391,6 +406,11 @@ class SubscriptionManager:
         self._legacy_path = os.path.join(pdir, "subscriptions")
         self._path = os.path.join(pdir, "subscriptions.json")
         self._store = AtomicJsonStore(self._path, kind="subscriptions")
+        # With the SQLite backend each subscription is a row, so a check
+        # updates one row instead of rewriting every subscription's seen ids.
+        self._db: Optional[SqliteStateStore] = None
+        if getattr(config, "STATE_BACKEND", "json") == "sqlite":
+            self._db = SqliteStateStore(os.path.join(pdir, SQLITE_STATE_FILE))
         self._subs: dict[str, SubscriptionInfo] = {}
         self._url_index: dict[str, str] = {}  # normalized url -> id
         self._pending_urls: set[str] = set()
@@ -400,8 +420,14 @@ class SubscriptionManager:
         self._load_all()
 
     def close(self) -> None:
-        # No persistent shelf handle to close.
-        return
+        if self._db is not None:
+            self._db.close()
+
+    async def _extract_flat_playlist(self, pool: str, url: str, playlistend: int, extra_opts: dict):
+        if executors.get(pool).processes:
+            config = types.SimpleNamespace(**{k: getattr(self.config, k, None) for k in _EXTRACT_CONFIG_KEYS})
+            return await executors.run(pool, _extract_flat_playlist_compact, config, url, playlistend, extra_opts)
+        return await executors.run(pool, extract_flat_playlist, self.config, url, playlistend, extra_opts=extra_opts)
 
     def _normalize_url(self, url: str) -> str:
         return (url or "").strip()
@@ -414,6 +440,12 @@ class SubscriptionManager:
         return normalized
 
     def _load_all(self) -> None:
+        if self._db is not None and self._db.is_imported("subscriptions"):
+            for sub in self._iter_valid_subs([record for _key, record in self._db.load("subscriptions")]):
+                self._subs[sub.id] = sub
+                self._url_index[self._normalize_url(sub.url)] = sub.id
+            return
+
         payload = self._store.load()
         loaded_from_legacy = False
         if payload is not None:
@@ -432,6 +464,11 @@ class SubscriptionManager:
             self._url_index[self._normalize_url(sub.url)] = sub.id
             compact_records.append(_subscription_to_record(sub))
 
+        if self._db is not None:
+            # One-time import; the JSON file is left as it was.
+            self._db.import_collection("subscriptions", [self._db_row(sub) for sub in loaded_subs])
+            return
+
         if loaded_from_legacy or (
             payload is not None
             and (
@@ -449,7 +486,23 @@ class SubscriptionManager:
                 subs.append(sub)
         return subs
 
-    def _save_locked(self) -> None:
+    @staticmethod
+    def _db_row(sub: SubscriptionInfo):
+        return (sub.id, sub.url, "enabled" if sub.enabled else "disabled", None, _subscription_to_record(sub))
+
+    def _save_locked(
+        self,
+        changed: Sequence[SubscriptionInfo] = (),
+        removed: Sequence[str] = (),
+    ) -> None:
+        """Persist a mutation of ``self._subs``.
+
+        The JSON store rewrites every subscription regardless; the SQLite store
+        only touches the rows named by *changed* and *removed*.
+        """
+        if self._db is not None:
+            self._db.apply("subscriptions", [self._db_row(sub) for sub in changed], list(removed))
+            return
         self._store.save({"items": [_subscription_to_record(sub) for sub in self._subs.values()]})
 
     def _scan_extra_opts(
@@ -621,8 +674,8 @@ class SubscriptionManager:
             return {"status": "error", "msg": "Missing URL"}
         # SSRF guard: block non-http(s) schemes and internal/metadata hosts
         # before yt-dlp fetches the feed. May do a DNS lookup, so run off-loop.
-        url_error = await asyncio.get_running_loop().run_in_executor(
-            None, partial(validate_url, url, allow_private=getattr(self.config, "ALLOW_PRIVATE_ADDRESSES", False)))
+        url_error = await executors.run(
+            "dns", validate_url, url, allow_private=getattr(self.config, "ALLOW_PRIVATE_ADDRESSES", False))
         if url_error is not None:
             log.warning('Rejected subscription URL "%s": %s', url, url_error)
             return {"status": "error", "msg": url_error}
@@ -648,10 +701,7 @@ class SubscriptionManager:
             scan_first = max(int(getattr(self.config, "SUBSCRIPTION_SCAN_PLAYLIST_END", 50)), 1)
             scan_extra_opts = self._scan_extra_opts(ytdl_options_presets, ytdl_options_overrides)
             try:
-                info, entries = await asyncio.get_running_loop().run_in_executor(
-                    None,
-                    partial(extract_flat_playlist, self.config, url, scan_first, extra_opts=scan_extra_opts),
-                )
+                info, entries = await self._extract_flat_playlist("extract", url, scan_first, scan_extra_opts)
             except yt_dlp.utils.YoutubeDLError as exc:
                 return {"status": "error", "msg": str(exc)}
 
@@ -715,7 +765,7 @@ class SubscriptionManager:
                 self._subs[sub.id] = sub
                 self._url_index[url] = sub.id
                 try:
-                    self._save_locked()
+                    self._save_locked(changed=[sub])
                 except Exception:
                     self._subs.pop(sub.id, None)
                     self._url_index.pop(url, None)
@@ -740,7 +790,7 @@ class SubscriptionManager:
                     removed.append(sid)
             if removed:
                 try:
-                    self._save_locked()
+                    self._save_locked(removed=removed)
                 except Exception:
                     self._subs = previous_subs
                     self._url_index = previous_index
@@ -824,7 +874,7 @@ class SubscriptionManager:
                 sub.skip_subscriber_only = validated_skip_so
 
             try:
-                self._save_locked()
+                self._save_locked(changed=[sub])
             except Exception:
                 self._subs[sub_id] = previous
                 raise
@@ -877,10 +927,9 @@ class SubscriptionManager:
         scan_extra_opts = self._scan_extra_opts(sub.ytdl_options_presets, sub.ytdl_options_overrides)
         log.info("Checking subscription: %s", sub.name)
         try:
-            info, entries = await asyncio.get_running_loop().run_in_executor(
-                None,
-                partial(extract_flat_playlist, self.config, sub.url, scan, extra_opts=scan_extra_opts),
-            )
+            # The background pool, so that a burst of checks never holds up
+            # an extraction a user is waiting on.
+            info, entries = await self._extract_flat_playlist("background", sub.url, scan, scan_extra_opts)
         except yt_dlp.utils.YoutubeDLError as exc:
             async with self._lock:
                 cur = self._subs.get(sid)
@@ -889,7 +938,7 @@ class SubscriptionManager:
                     cur.error = str(exc)
                     cur.last_checked = time.time()
                     try:
-                        self._save_locked()
+                        self._save_locked(changed=[cur])
                     except Exception:
                         self._subs[sid] = previous
                         raise
@@ -908,7 +957,7 @@ class SubscriptionManager:
                     cur.error = VIDEO_ONLY_MSG
                     cur.last_checked = time.time()
                     try:
-                        self._save_locked()
+                        self._save_locked(changed=[cur])
                     except Exception:
                         self._subs[sid] = previous
                         raise
@@ -924,7 +973,7 @@ class SubscriptionManager:
                     cur.last_checked = time.time()
                     cur.error = None
                     try:
-                        self._save_locked()
+                        self._save_locked(changed=[cur])
                     except Exception:
                         self._subs[sid] = previous
                         raise
@@ -1054,7 +1103,7 @@ class SubscriptionManager:
             cur.last_checked = time.time()
             cur.error = "; ".join(queue_errors[:3]) if queue_errors else None
             try:
-                self._save_locked()
+                self._save_locked(changed=[cur])
             except Exception:
                 self._subs[sid] = previous
                 raise
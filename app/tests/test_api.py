@@ -13,6 +13,7 @@ from aiohttp import web
 from aiohttp.test_utils import TestClient, TestServer
 
 import main
+from scheduler import DownloadScheduler
 
 
 @pytest.fixture
@@ -24,6 +25,10 @@ def mock_dqueue(monkeypatch):
     d.cancel = AsyncMock(return_value={"status": "ok"})
     d.clear = AsyncMock(return_value={"status": "ok"})
     d.start_pending = AsyncMock(return_value={"status": "ok"})
+    d.set_priority = AsyncMock(return_value={"status": "ok"})
+    d.pause = AsyncMock(return_value={"status": "ok"})
+    d.resume = AsyncMock(return_value={"status": "ok"})
+    d.drain_deadline = None
     d.cancel_add = MagicMock()
     d.queue = MagicMock()
     d.done = MagicMock()
@@ -227,6 +232,49 @@ async def test_start_rejects_malformed_ids(mock_dqueue, body):
     mock_dqueue.start_pending.assert_not_awaited()
 
 
+@pytest.mark.asyncio
+async def test_pause_and_resume_forward_ids(mock_dqueue):
+    resp = await main.pause(_json_request({"ids": ["a"]}))
+    assert resp.status == 200
+    mock_dqueue.pause.assert_awaited_once_with(["a"])
+
+    resp = await main.resume(_json_request({"ids": ["a", "b"]}))
+    assert resp.status == 200
+    mock_dqueue.resume.assert_awaited_once_with(["a", "b"])
+
+
+@pytest.mark.asyncio
+async def test_priority_calls_set_priority(mock_dqueue):
+    req = _json_request({"ids": ["a", "b"], "priority": 5})
+    resp = await main.priority(req)
+    assert resp.status == 200
+    mock_dqueue.set_priority.assert_awaited_once_with(["a", "b"], 5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [{"ids": ["a"]}, {"ids": ["a"], "priority": "5"}, {"ids": ["a"], "priority": True}, {"priority": 1}])
+async def test_priority_rejects_malformed_body(mock_dqueue, body):
+    req = _json_request(body)
+    with pytest.raises(web.HTTPBadRequest):
+        await main.priority(req)
+    mock_dqueue.set_priority.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_priority_event_calls_set_priority(mock_dqueue):
+    ack = await main.priority_event("sid", {"ids": ["a"], "priority": 3})
+    assert ack == {"status": "ok"}
+    mock_dqueue.set_priority.assert_awaited_once_with(["a"], 3)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data", [None, ["a"], {"ids": ["a"], "priority": "5"}, {"priority": 1}])
+async def test_priority_event_rejects_malformed_data(mock_dqueue, data):
+    ack = await main.priority_event("sid", data)
+    assert ack["status"] == "error"
+    mock_dqueue.set_priority.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "body",
@@ -245,9 +293,16 @@ async def test_delete_rejects_malformed_ids(mock_dqueue, body):
     mock_dqueue.clear.assert_not_awaited()
 
 
+def _history_request(query=None, headers=None):
+    req = MagicMock(spec=web.Request)
+    req.query = query or {}
+    req.headers = headers or {}
+    return req
+
+
 @pytest.mark.asyncio
 async def test_history_shape(mock_dqueue):
-    req = MagicMock(spec=web.Request)
+    req = _history_request()
     resp = await main.history(req)
     assert resp.status == 200
     data = json.loads(resp.text)
@@ -266,7 +321,7 @@ async def test_history_reads_in_memory_queues_not_disk_state(mock_dqueue):
     mock_dqueue.done.items.return_value = [("d1", fake_done_dl)]
     mock_dqueue.pending.items.return_value = [("p1", fake_pending_dl)]
 
-    req = MagicMock(spec=web.Request)
+    req = _history_request()
     resp = await main.history(req)
     assert resp.status == 200
     data = json.loads(resp.text)
@@ -278,6 +333,304 @@ async def test_history_reads_in_memory_queues_not_disk_state(mock_dqueue):
     mock_dqueue.pending.saved_items.assert_not_called()
 
 
+def _stamped(id, status, timestamp, title):
+    dl = MagicMock()
+    dl.info = type("Info", (), {})()
+    dl.info.id = id
+    dl.info.title = title or id
+    dl.info.status = status
+    dl.info.timestamp = timestamp
+    dl.info.to_public_dict = lambda: {"id": id, "status": status, "timestamp": timestamp}
+    return (id, dl)
+
+
+@pytest.mark.asyncio
+async def test_history_filters_sorts_and_paginates(mock_dqueue):
+    mock_dqueue.done.items.return_value = [
+        _stamped("a", "finished", 1_000_000_000, "Charlie"),
+        _stamped("b", "error", 2_000_000_000, "Alpha"),
+        _stamped("c", "finished", 3_000_000_000, "Bravo"),
+        _stamped("d", "finished", 4_000_000_000, "Delta"),
+    ]
+
+    resp = await main.history(_history_request({"status": "finished", "since": "2", "sort": "-timestamp"}))
+    data = json.loads(resp.text)
+    assert [i["id"] for i in data["done"]] == ["d", "c"]
+    assert "total" not in data
+
+    resp = await main.history(_history_request({"sort": "title", "offset": "1", "limit": "2"}))
+    data = json.loads(resp.text)
+    assert [i["id"] for i in data["done"]] == ["c", "a"]
+    assert data["total"] == {"done": 4, "queue": 0, "pending": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", [{"limit": "0"}, {"offset": "x"}, {"since": "yesterday"}, {"sort": "url"}])
+async def test_history_rejects_bad_parameters(mock_dqueue, query):
+    with pytest.raises(web.HTTPBadRequest):
+        await main.history(_history_request(query))
+
+
+@pytest.mark.asyncio
+async def test_history_etag_returns_304_until_something_changes(mock_dqueue, monkeypatch):
+    monkeypatch.setattr(mock_dqueue, "revision", 7, raising=False)
+    monkeypatch.setattr(main.notifier, "revision", 0)
+
+    first = await main.history(_history_request())
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    unchanged = await main.history(_history_request(headers={"If-None-Match": etag}))
+    assert unchanged.status == 304
+    mock_dqueue.done.items.reset_mock()
+    await main.history(_history_request(headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'}))
+    mock_dqueue.done.items.assert_not_called()
+
+    main.notifier.revision += 1
+    changed = await main.history(_history_request(headers={"If-None-Match": etag}))
+    assert changed.status == 200
+    assert changed.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_history_enables_compression_for_large_responses(mock_dqueue):
+    mock_dqueue.done.items.return_value = [
+        _stamped(f"id{i}", "finished", i, "A title long enough to add up") for i in range(100)
+    ]
+    resp = await main.history(_history_request())
+    # The encoding itself is negotiated against Accept-Encoding when sent.
+    assert resp.compression
+
+    mock_dqueue.done.items.return_value = []
+    resp = await main.history(_history_request())
+    assert not resp.compression
+
+
+@pytest.fixture
+def socket_events(monkeypatch):
+    emitted = []
+
+    async def fake_emit(event, data=None, to=None, **_kwargs):
+        emitted.append((event, data, to))
+
+    monkeypatch.setattr(main.sio, "emit", fake_emit)
+    monkeypatch.setattr(main, "event_log", main.EventLog(3, epoch="test"))
+    monkeypatch.setattr(main.config, "CUSTOM_DIRS", False)
+    monkeypatch.setattr(main.config, "YTDL_OPTIONS_FILE", "")
+    monkeypatch.setattr(main.submgr, "list_all", lambda: [])
+    return emitted
+
+
+@pytest.mark.asyncio
+async def test_set_concurrency_resizes_and_notifies(mock_dqueue, socket_events):
+    mock_dqueue.scheduler = DownloadScheduler(3)
+    mock_dqueue.adaptive = None
+    mock_dqueue.set_concurrency = MagicMock(side_effect=mock_dqueue.scheduler.set_limit)
+
+    resp = await main.set_concurrency(_json_request({"limit": 8}))
+
+    assert resp.status == 200
+    mock_dqueue.set_concurrency.assert_called_once_with(8)
+    assert json.loads(resp.text) == {"limit": 8, "running": 0, "waiting": 0}
+    assert [(e, json.loads(d)) for e, d, _to in socket_events] == [
+        ("concurrency", {"limit": 8, "running": 0, "waiting": 0}),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [{}, {"limit": 0}, {"limit": "4"}, {"limit": True}])
+async def test_set_concurrency_rejects_bad_limit(mock_dqueue, body):
+    with pytest.raises(web.HTTPBadRequest):
+        await main.set_concurrency(_json_request(body))
+    mock_dqueue.set_concurrency.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_set_concurrency_is_refused_while_adaptive(mock_dqueue, socket_events):
+    mock_dqueue.adaptive = MagicMock()
+
+    with pytest.raises(web.HTTPConflict) as exc:
+        await main.set_concurrency(_json_request({"limit": 8}))
+
+    assert "ADAPTIVE_CONCURRENCY" in exc.value.reason
+    mock_dqueue.set_concurrency.assert_not_called()
+    assert socket_events == []
+
+
+@pytest.mark.asyncio
+async def test_concurrency_file_is_ignored_while_adaptive(mock_dqueue, monkeypatch, tmp_path):
+    path = tmp_path / "concurrency"
+    path.write_text("6")
+    monkeypatch.setattr(main.config, "MAX_CONCURRENT_DOWNLOADS_FILE", str(path))
+    mock_dqueue.adaptive = MagicMock()
+
+    await main._watch_concurrency_file(MagicMock())
+
+    mock_dqueue.set_concurrency.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_drain_reports_status(mock_dqueue):
+    status = {"draining": True, "deadline": 1700000000.0, "running": 2, "waiting": 5}
+    mock_dqueue.drain_status = MagicMock(return_value=status)
+
+    resp = await main.get_drain(MagicMock())
+
+    assert json.loads(resp.text) == status
+
+
+@pytest.mark.asyncio
+async def test_get_extract_cache_reports_counters(mock_dqueue):
+    metrics = {"enabled": True, "entries": 1, "bytes": 120, "hits": 3, "misses": 1, "evictions": 0, "hit_rate": 0.75}
+    mock_dqueue.extract_cache.metrics = MagicMock(return_value=metrics)
+
+    resp = await main.get_extract_cache(MagicMock())
+
+    assert json.loads(resp.text) == metrics
+
+
+@pytest.mark.asyncio
+async def test_get_executors_reports_each_pool(monkeypatch):
+    metrics = {"extract": {"workers": 4, "queued": 2, "running": 4, "completed": 9, "avg_wait": 0.5, "max_wait": 2.0}}
+    monkeypatch.setattr(main.executors, "metrics", MagicMock(return_value=metrics))
+
+    resp = await main.get_executors(MagicMock())
+
+    assert json.loads(resp.text) == metrics
+
+
+def test_concurrency_file_is_read_and_validated(monkeypatch, tmp_path):
+    path = tmp_path / "concurrency"
+    monkeypatch.setattr(main.config, "MAX_CONCURRENT_DOWNLOADS_FILE", str(path))
+
+    assert main._read_concurrency_file() is None
+    path.write_text("6\n")
+    assert main._read_concurrency_file() == 6
+    for bad in ("0", "six", ""):
+        path.write_text(bad)
+        assert main._read_concurrency_file() is None
+
+
+@pytest.mark.asyncio
+async def test_download_events_carry_a_cursor(mock_dqueue, socket_events):
+    await main.notifier.canceled("https://example.com/a")
+    await main.notifier.cleared("https://example.com/b")
+
+    assert [(e, d) for e, d, _to in socket_events] == [
+        ("canceled", ('"https://example.com/a"', "test:1")),
+        ("cleared", ('"https://example.com/b"', "test:2")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_only_missed_events(mock_dqueue, socket_events):
+    await main.notifier.canceled("https://example.com/a")
+    await main.notifier.canceled("https://example.com/b")
+    socket_events.clear()
+
+    await main.connect("sid1", {}, {"cursor": "test:1"})
+
+    download_events = [(e, d) for e, d, _to in socket_events if e in ("all", "canceled")]
+    assert download_events == [("canceled", ('"https://example.com/b"', "test:2"))]
+    assert all(to == "sid1" for _e, _d, to in socket_events)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("auth", [None, {}, {"cursor": "test:0"}, {"cursor": "old-process:1"}])
+async def test_connect_sends_snapshot_when_gap_cannot_be_replayed(mock_dqueue, socket_events, auth):
+    for i in range(4):
+        await main.notifier.canceled(f"https://example.com/{i}")
+    socket_events.clear()
+
+    await main.connect("sid1", {}, auth)
+
+    snapshots = [d for e, d, _to in socket_events if e == "all"]
+    assert snapshots == [(json.dumps([[], []]), "test:4")]
+    assert not [e for e, _d, _to in socket_events if e == "canceled"]
+
+
+class _ProgressInfo:
+    def __init__(self, url, percent):
+        self.url = url
+        self.title = url
+        self.percent = percent
+
+    def to_public_dict(self):
+        return {"url": self.url, "percent": self.percent}
+
+
+@pytest.mark.asyncio
+async def test_progress_updates_are_coalesced_into_one_batch(mock_dqueue, socket_events, monkeypatch):
+    monkeypatch.setattr(main.notifier, "update_interval", 0.01)
+    a = _ProgressInfo("https://example.com/a", 1)
+    b = _ProgressInfo("https://example.com/b", 1)
+    done = _ProgressInfo("https://example.com/done", 1)
+
+    await main.notifier.updated(a)
+    await main.notifier.updated(b)
+    await main.notifier.updated(done)
+    a.percent = 50
+    await main.notifier.updated(a)
+    # Terminal events go out at once and drop the download's pending update.
+    await main.notifier.completed(done)
+    assert [e for e, _d, _to in socket_events] == ["completed"]
+
+    await main.notifier._flush_task
+    event, (payload, _cursor), _to = socket_events[-1]
+    assert event == "updated_batch"
+    assert json.loads(payload) == [
+        {"url": "https://example.com/a", "percent": 50},
+        {"url": "https://example.com/b", "percent": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_updates_after_added_carry_only_changed_keys(mock_dqueue, socket_events, monkeypatch):
+    monkeypatch.setattr(main.notifier, "update_interval", 0)
+    dl = _ProgressInfo("https://example.com/delta", 0)
+    dl.chapters = []
+    dl.to_public_dict = lambda: {"url": dl.url, "title": "Title", "percent": dl.percent, "chapters": dl.chapters}
+
+    await main.notifier.added(dl)
+    dl.percent = 30
+    await main.notifier.updated(dl)
+    await main.notifier.updated(dl)  # nothing changed: nothing sent
+    dl.chapters.append("one")
+    await main.notifier.updated(dl)
+
+    payloads = [json.loads(d[0]) for e, d, _to in socket_events if e == "updated"]
+    assert payloads == [
+        {"url": "https://example.com/delta", "percent": 30},
+        {"url": "https://example.com/delta", "chapters": ["one"]},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_flushes_pending_updates_first(mock_dqueue, socket_events, monkeypatch):
+    monkeypatch.setattr(main.notifier, "update_interval", 60)
+    dl = _ProgressInfo("https://example.com/snap", 0)
+    await main.notifier.added(dl)
+    dl.percent = 70
+    await main.notifier.updated(dl)
+    socket_events.clear()
+
+    await main.connect("sid1", {}, None)
+
+    events = [(e, to) for e, _d, to in socket_events if e in ("updated_batch", "all")]
+    assert events == [("updated_batch", None), ("all", "sid1")]
+    assert json.loads(socket_events[0][1][0]) == [{"url": "https://example.com/snap", "percent": 70}]
+    assert main.notifier.take_updates() is None
+    main.notifier._flush_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_zero_update_interval_sends_each_update(mock_dqueue, socket_events, monkeypatch):
+    monkeypatch.setattr(main.notifier, "update_interval", 0)
+    await main.notifier.updated(_ProgressInfo("https://example.com/a", 1))
+
+    assert [e for e, _d, _to in socket_events] == ["updated"]
+
+
 @pytest.mark.asyncio
 async def test_version_json(mock_dqueue):
     req = MagicMock(spec=web.Request)
@@ -192,6 +192,81 @@ class ConfigTests(unittest.TestCase):
                 with self.assertRaises(SystemExit):
                     Config()
 
+    def test_per_host_limits_are_parsed(self):
+        with patch.dict(os.environ, _base_env(MAX_CONCURRENT_DOWNLOADS_PER_HOST='{"youtube": 2, "*": 1}'), clear=False):
+            c = Config()
+        self.assertEqual(c.MAX_CONCURRENT_DOWNLOADS_PER_HOST, {"youtube": 2, "*": 1})
+
+    def test_invalid_per_host_limits_exit(self):
+        for bad in ("[]", "{", '{"youtube": 0}', '{"youtube": "2"}'):
+            with patch.dict(os.environ, _base_env(MAX_CONCURRENT_DOWNLOADS_PER_HOST=bad), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_adaptive_concurrency_bounds_are_validated(self):
+        for minimum, maximum in (("0", "4"), ("3", "2"), ("1", "many")):
+            env = _base_env(ADAPTIVE_CONCURRENCY_MIN=minimum, ADAPTIVE_CONCURRENCY_MAX=maximum)
+            with patch.dict(os.environ, env, clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_bandwidth_limit_and_schedule_are_parsed(self):
+        env = _base_env(DOWNLOAD_BANDWIDTH_LIMIT="4M", DOWNLOAD_BANDWIDTH_SCHEDULE='{"08:00": "500K", "23:30": 0}')
+        with patch.dict(os.environ, env, clear=False):
+            c = Config()
+        self.assertEqual(c.DOWNLOAD_BANDWIDTH_LIMIT, 4 * 1024 * 1024)
+        self.assertEqual(c.DOWNLOAD_BANDWIDTH_SCHEDULE, {480: 500 * 1024, 1410: None})
+
+    def test_bandwidth_defaults_to_unlimited(self):
+        with patch.dict(os.environ, _base_env(), clear=False):
+            c = Config()
+        self.assertIsNone(c.DOWNLOAD_BANDWIDTH_LIMIT)
+        self.assertEqual(c.DOWNLOAD_BANDWIDTH_SCHEDULE, {})
+
+    def test_invalid_bandwidth_settings_exit(self):
+        for key, bad in (("DOWNLOAD_BANDWIDTH_LIMIT", "fast"), ("DOWNLOAD_BANDWIDTH_LIMIT", "-1"),
+                         ("DOWNLOAD_BANDWIDTH_SCHEDULE", "[]"), ("DOWNLOAD_BANDWIDTH_SCHEDULE", '{"25:00": "1M"}'),
+                         ("DOWNLOAD_BANDWIDTH_SCHEDULE", '{"08:00": "lots"}')):
+            with patch.dict(os.environ, _base_env(**{key: bad}), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_invalid_drain_timeout_exits(self):
+        for bad in ("-1", "soon"):
+            with patch.dict(os.environ, _base_env(DRAIN_TIMEOUT=bad), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_invalid_postprocess_workers_exits(self):
+        for bad in ("-1", "all"):
+            with patch.dict(os.environ, _base_env(POSTPROCESS_WORKERS=bad), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_invalid_extract_cache_settings_exit(self):
+        for key in ("EXTRACT_CACHE_TTL", "EXTRACT_CACHE_MAX_ENTRIES", "EXTRACT_CACHE_MAX_MB"):
+            with patch.dict(os.environ, _base_env(**{key: "-1"}), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_executor_threads_parsed_and_validated(self):
+        with patch.dict(os.environ, _base_env(EXECUTOR_THREADS='{"extract": 6}'), clear=False):
+            self.assertEqual(Config().EXECUTOR_THREADS, {"extract": 6})
+        for bad in ('{"extract": 0}', '{"downloads": 2}', '[4]', "four"):
+            with patch.dict(os.environ, _base_env(EXECUTOR_THREADS=bad), clear=False):
+                with self.assertRaises(SystemExit):
+                    Config()
+
+    def test_invalid_extraction_mode_exits(self):
+        with patch.dict(os.environ, _base_env(EXTRACTION_MODE="fork"), clear=False):
+            with self.assertRaises(SystemExit):
+                Config()
+
+    def test_invalid_state_backend_exits(self):
+        with patch.dict(os.environ, _base_env(STATE_BACKEND="postgres"), clear=False):
+            with self.assertRaises(SystemExit):
+                Config()
+
     def test_invalid_port_exits(self):
         for bad in ("0", "70000", "notaport"):
             with patch.dict(os.environ, _base_env(PORT=bad), clear=False):
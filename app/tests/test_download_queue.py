@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
 import copy
+import gc
 import os
 import re
 import tempfile
@@ -10,8 +12,9 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import time
+import yt_dlp
 
-from ytdl import Download, DownloadInfo, DownloadQueue
+from ytdl import Download, DownloadInfo, DownloadQueue, PersistentQueue
 
 
 @pytest.fixture
@@ -23,10 +26,25 @@ def dq_env():
         os.makedirs(st, exist_ok=True)
         cfg = MagicMock()
         cfg.STATE_DIR = st
+        cfg.STATE_BACKEND = "json"
+        cfg.STATE_COMMIT_MAX_DELAY_MS = "0"
+        cfg.STATE_COMMIT_MAX_BATCH = "256"
         cfg.DOWNLOAD_DIR = dl
         cfg.AUDIO_DOWNLOAD_DIR = dl
         cfg.TEMP_DIR = dl
         cfg.MAX_CONCURRENT_DOWNLOADS = "3"
+        cfg.MAX_CONCURRENT_DOWNLOADS_PER_HOST = {}
+        cfg.DOWNLOAD_WORKERS = "0"
+        cfg.DOWNLOAD_WORKER_MAX_JOBS = "25"
+        cfg.POSTPROCESS_WORKERS = "2"
+        cfg.EXTRACT_CACHE_TTL = "300"
+        cfg.EXTRACT_CACHE_MAX_ENTRIES = "256"
+        cfg.EXTRACT_CACHE_MAX_MB = "64"
+        cfg.ADAPTIVE_CONCURRENCY = False
+        cfg.ADAPTIVE_CONCURRENCY_MIN = "1"
+        cfg.ADAPTIVE_CONCURRENCY_MAX = "10"
+        cfg.DOWNLOAD_BANDWIDTH_LIMIT = None
+        cfg.DOWNLOAD_BANDWIDTH_SCHEDULE = {}
         cfg.YTDL_OPTIONS = {}
         cfg.YTDL_OPTIONS_PRESETS = {}
         cfg.CUSTOM_DIRS = True
@@ -52,17 +70,49 @@ def test_download_queue_has_dedicated_executor_sized_from_config(dq_env):
     notifier = MagicMock()
     dq = DownloadQueue(dq_env, notifier)
     assert dq._download_executor is not None
-    assert dq._download_executor._max_workers == 2 * int(dq_env.MAX_CONCURRENT_DOWNLOADS) + 2
+    assert dq._download_executor._max_workers == (
+        int(dq_env.MAX_CONCURRENT_DOWNLOADS) + int(dq_env.POSTPROCESS_WORKERS) + 2)
     dq.close()
 
 
-def test_close_cancels_running_downloads_before_shutdown(dq_env):
+def test_set_concurrency_resizes_scheduler_and_executor(dq_env):
+    dq = DownloadQueue(dq_env, MagicMock())
+    old_executor = dq._download_executor
+
+    dq.set_concurrency(10)
+
+    assert dq.scheduler.limit == 10
+    assert dq_env.MAX_CONCURRENT_DOWNLOADS == "10"
+    assert dq._download_executor._max_workers == 14
+    assert old_executor._shutdown
+    dq.close()
+
+
+def test_bandwidth_budget_is_split_between_running_downloads(dq_env):
+    dq_env.DOWNLOAD_BANDWIDTH_LIMIT = 6_000_000.0
+    dq = DownloadQueue(dq_env, MagicMock())
+    downloads = [MagicMock(), MagicMock(), MagicMock()]
+
+    dq._fetching.update(downloads)
+    dq._share_bandwidth()
+    for download in downloads:
+        download.set_rate_limit.assert_called_with(2_000_000.0)
+
+    dq._fetching.discard(downloads[0])
+    dq._share_bandwidth()
+    downloads[1].set_rate_limit.assert_called_with(3_000_000.0)
+    downloads[0].set_rate_limit.assert_called_once()
+    dq.close()
+
+
+def test_close_interrupts_running_downloads_before_shutdown(dq_env):
     notifier = MagicMock()
     dq = DownloadQueue(dq_env, notifier)
 
     running = MagicMock()
     running.started.return_value = True
     running.running.return_value = True
+    running.info.partial = None
     idle = MagicMock()
     idle.started.return_value = False
     idle.running.return_value = False
@@ -72,13 +122,67 @@ def test_close_cancels_running_downloads_before_shutdown(dq_env):
 
     dq.close()
 
-    # The active download's subprocess group is killed; the not-started one is
-    # left alone. Executor is shut down afterwards.
-    running.cancel.assert_called_once()
-    idle.cancel.assert_not_called()
+    # The active download's subprocess group is stopped, without canceling
+    # it; the not-started one is left alone. Executor is shut down afterwards.
+    running.interrupt.assert_called_once()
+    running.cancel.assert_not_called()
+    idle.interrupt.assert_not_called()
     assert dq._download_executor._shutdown
 
 
+@pytest.mark.asyncio
+async def test_close_persists_partial_file_and_next_start_measures_it(dq_env):
+    dq = DownloadQueue(dq_env, AsyncMock())
+    download = _make_download(dq_env, status="downloading")
+    await dq.queue.put(download)
+    partial = os.path.join(dq_env.TEMP_DIR, "t.mp4.part")
+    with open(partial, "wb") as f:
+        f.write(b"x" * 1000)
+    download.proc = MagicMock()
+    download.interrupt = MagicMock()
+    download.info.partial = {"tmpfilename": partial, "offset": 900}
+
+    dq.close()
+    # A cleanup that runs after close() must not delete what was kept.
+    await dq._post_download_cleanup(download)
+
+    download.interrupt.assert_called_once()
+    assert os.path.exists(partial)
+    reloaded = PersistentQueue("queue", dq_env.STATE_DIR + "/queue")
+    (_key, info), = reloaded.saved_items()
+    assert info.partial == {"tmpfilename": partial, "offset": 900}
+
+    restarted = DownloadQueue(dq_env, AsyncMock())
+    assert await restarted._measure_partial(info) == 1000
+    assert info.partial["saved"] == 1000
+    os.remove(partial)
+    assert await restarted._measure_partial(info) == 0
+    assert info.partial is None
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_close_reports_a_partial_file_it_could_not_save(dq_env, caplog):
+    unreported = []
+    asyncio.get_running_loop().set_exception_handler(lambda _loop, context: unreported.append(context))
+    dq = DownloadQueue(dq_env, AsyncMock())
+    download = _make_download(dq_env, status="downloading")
+    await dq.queue.put(download)
+    download.proc = MagicMock()
+    download.interrupt = MagicMock()
+    download.info.partial = {"tmpfilename": "t.mp4.part", "offset": 900}
+
+    def fail():
+        raise OSError("disk full")
+
+    with patch.object(dq.queue, "_batch_write", return_value=fail):
+        dq.close()
+    gc.collect()
+
+    assert f"Could not save where {download.info.title} left off: disk full" in caplog.text
+    assert unreported == []
+
+
 def test_get_returns_tuple_of_lists(dq_env):
     notifier = MagicMock()
     dq = DownloadQueue(dq_env, notifier)
@@ -116,6 +220,28 @@ async def test_add_single_video_goes_to_pending_when_auto_start_false(dq_env):
     assert dq.pending.exists("https://example.com/watch?v=1")
 
 
+@pytest.mark.asyncio
+async def test_add_reuses_a_cached_extraction_unless_refreshed(dq_env):
+    calls = []
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        calls.append(url)
+        return {"_type": "video", "id": "vid1", "title": "Test Video", "url": url, "webpage_url": url}
+
+    dq = DownloadQueue(dq_env, AsyncMock())
+    url = "https://example.com/watch?v=1"
+    args = ("video", "auto", "any", "best", "", "", 0)
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        await dq.add(url, *args, auto_start=False)
+        await dq.add(url, *args, auto_start=False)
+        await dq.add(url, *args, auto_start=False, ytdl_options_overrides={"proxy": "http://p"})
+        await dq.add(url, *args, auto_start=False, refresh=True)
+
+    assert len(calls) == 3
+    assert (dq.extract_cache.hits, dq.extract_cache.misses) == (1, 2)
+    dq.close()
+
+
 @pytest.mark.asyncio
 async def test_add_unsupported_url_recorded_as_failed_entry(dq_env):
     """An unsupported/unextractable URL must show up as a red-cross entry in the
@@ -272,6 +398,24 @@ async def test_start_pending_moves_to_queue(dq_env):
     assert not dq.pending.exists(url)
 
 
+@pytest.mark.asyncio
+async def test_set_priority_persists_and_reorders_waiting_download(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    download = _make_download(dq_env, status="pending")
+    await dq.pending.put(download)
+    url = download.info.url
+
+    await dq.set_priority([url, "https://example.com/missing"], 7)
+
+    assert dq.pending.get(url).info.priority == 7
+    reloaded = PersistentQueue("pending", dq_env.STATE_DIR + "/pending")
+    reloaded.load()
+    assert reloaded.get(url).info.priority == 7
+    notifier.updated.assert_awaited_once_with(download.info)
+    dq.close()
+
+
 @pytest.mark.asyncio
 async def test_add_entry_queues_single_video_without_reextracting(dq_env):
     notifier = AsyncMock()
@@ -651,6 +795,208 @@ async def test_playlist_download_not_treated_as_channel(dq_env):
     assert download.output_template.startswith("My Playlist/")
 
 
+async def test_playlist_add_coalesces_queue_writes(dq_env):
+    dq_env.STATE_COMMIT_MAX_BATCH = "10"
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        return {
+            "_type": "playlist",
+            "id": "PLbig",
+            "title": "Big Playlist",
+            "entries": [
+                {"id": f"vid{i}", "title": f"Video {i}", "url": f"https://example.com/watch?v={i}"}
+                for i in range(25)
+            ],
+        }
+
+    dq = DownloadQueue(dq_env, AsyncMock())
+    saves = []
+    orig_save = dq.pending.store.save
+
+    def counting_save(data):
+        saves.append(len(data["items"]))
+        return orig_save(data)
+
+    dq.pending.store.save = counting_save
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        result = await dq.add(
+            "https://www.youtube.com/playlist?list=PLbig",
+            "video",
+            "auto",
+            "any",
+            "best",
+            "",
+            "",
+            0,
+            auto_start=False,
+        )
+
+    assert result["status"] == "ok"
+    assert len(list(dq.pending.items())) == 25
+    # One write per chunk of ten rather than one per entry.
+    assert saves == [10, 20, 25]
+    indexes = [d.info.entry["playlist_index"] for _, d in dq.pending.items()]
+    assert indexes == [f"{i:02d}" for i in range(1, 26)]
+
+
+
+
+async def test_playlist_chunks_are_added_in_bulk(dq_env):
+    dq_env.STATE_COMMIT_MAX_BATCH = "10"
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    entries = [
+        {"id": f"vid{i}", "title": f"Video {i}", "url": f"https://example.com/watch?v={i}"}
+        for i in range(25)
+    ]
+    entries.insert(5, dict(entries[3]))
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        if url.endswith("PLbig"):
+            return {"_type": "playlist", "id": "PLbig", "title": "Big", "entries": copy.deepcopy(entries)}
+        return {**entries[0], "_type": "video"}
+
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        await dq.add("https://example.com/watch?v=0", "video", "auto", "any", "best", "", "", 0, auto_start=False)
+        notifier.reset_mock()
+        result = await dq.add(
+            "https://www.youtube.com/playlist?list=PLbig",
+            "video", "auto", "any", "best", "", "", 0, auto_start=False,
+        )
+
+    assert result["status"] == "ok"
+    assert len(list(dq.pending.items())) == 25
+    notifier.added.assert_not_awaited()
+    batches = [[dl.url for dl in c.args[0]] for c in notifier.added_bulk.await_args_list]
+    # Neither the item already queued nor the repeat within the feed is added again.
+    assert [len(b) for b in batches] == [8, 10, 6]
+    assert "https://example.com/watch?v=0" not in batches[0]
+
+
+async def test_cancel_stops_a_playlist_add_between_chunks(dq_env):
+    dq_env.STATE_COMMIT_MAX_BATCH = "10"
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    notifier.added_bulk.side_effect = lambda _dls: dq.cancel_add()
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        return {
+            "_type": "playlist", "id": "PLbig", "title": "Big",
+            "entries": [
+                {"id": f"vid{i}", "title": f"Video {i}", "url": f"https://example.com/watch?v={i}"}
+                for i in range(25)
+            ],
+        }
+
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        result = await dq.add(
+            "https://www.youtube.com/playlist?list=PLbig",
+            "video", "auto", "any", "best", "", "", 0, auto_start=False,
+        )
+
+    assert result["msg"].startswith("Canceled")
+    assert len(list(dq.pending.items())) == 10
+
+
+async def test_streamed_playlist_is_queued_a_chunk_at_a_time(dq_env):
+    dq_env.STATE_COMMIT_MAX_BATCH = "10"
+    dq_env.OUTPUT_TEMPLATE_PLAYLIST = "%(playlist_index)s - %(title)s.%(ext)s"
+    queued_before = []
+
+    def lazy_entries(dq):
+        for i in range(25):
+            if i % 10 == 0:
+                queued_before.append(len(list(dq.pending.items())))
+            yield {"id": f"vid{i}", "title": f"Video {i}", "url": f"https://example.com/watch?v={i}"}
+
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        return {"_type": "playlist", "id": "PLlazy", "title": "Lazy", "entries": lazy_entries(dq)}
+
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        result = await dq.add(
+            "https://www.youtube.com/playlist?list=PLlazy",
+            "video", "auto", "any", "best", "", "", 0, auto_start=False,
+        )
+
+    assert result["status"] == "ok"
+    # Each chunk was queued before the next one was read.
+    assert queued_before == [0, 10, 20]
+    progress = [c.args[0] for c in notifier.add_progress.await_args_list]
+    assert [(p["added"], p["total"]) for p in progress] == [(10, None), (20, None), (25, None)]
+    # The total, once known, is back-filled into everything still queued.
+    downloads = [d for _, d in dq.pending.items()]
+    assert [d.info.entry["playlist_index"] for d in downloads] == [f"{i:02d}" for i in range(1, 26)]
+    assert {d.info.entry["n_entries"] for d in downloads} == {25}
+    assert downloads[0].output_template == "01 - %(title)s.%(ext)s"
+
+
+
+async def test_streamed_playlist_entries_are_processed_as_they_are_read(dq_env):
+    def raw_playlist(self, url, download=True, process=True, **_kwargs):
+        assert process is False
+        return {
+            "_type": "playlist",
+            "id": "PLmixed",
+            "title": "Mixed",
+            "webpage_url": url,
+            "extractor": "generic",
+            "extractor_key": "Generic",
+            "entries": iter([
+                {"_type": "url", "id": "rel", "url": "//example.com/watch?v=rel"},
+                {
+                    "_type": "video",
+                    "id": "inline",
+                    "title": "Inline",
+                    "formats": [{"format_id": "0", "url": "https://cdn.example.com/inline.mp4", "ext": "mp4"}],
+                },
+            ]),
+        }
+
+    dq = DownloadQueue(dq_env, AsyncMock())
+    with patch.object(yt_dlp.YoutubeDL, "extract_info", raw_playlist):
+        result = await dq.add(
+            "https://example.com/playlist", "video", "auto", "any", "best", "", "", 0, auto_start=False,
+        )
+
+    assert result["status"] == "ok"
+    queued = {d.info.id for _, d in dq.pending.items()}
+    assert queued == {"rel", "inline"}
+    assert dq.pending.exists("https://example.com/watch?v=rel")
+    assert dq.pending.exists("https://cdn.example.com/inline.mp4")
+
+
+async def test_streamed_playlist_stops_reading_at_the_item_limit(dq_env):
+    dq_env.STATE_COMMIT_MAX_BATCH = "10"
+    read = []
+
+    def lazy_entries():
+        for i in range(100):
+            read.append(i)
+            yield {"id": f"vid{i}", "title": f"Video {i}", "url": f"https://example.com/watch?v={i}"}
+
+    def fake_extract(self, url, *_args, **_kwargs):
+        return {"_type": "playlist", "id": "PLlazy", "title": "Lazy",
+                "playlist_count": 100, "entries": lazy_entries()}
+
+    dq = DownloadQueue(dq_env, AsyncMock())
+    with patch.object(DownloadQueue, "_DownloadQueue__extract_info", fake_extract):
+        result = await dq.add(
+            "https://www.youtube.com/playlist?list=PLlazy",
+            "video", "auto", "any", "best", "", "", 15, auto_start=False,
+        )
+
+    assert result["status"] == "ok"
+    assert len(read) == 15
+    downloads = [d for _, d in dq.pending.items()]
+    assert len(downloads) == 15
+    # The reported count stands, since the feed was not read to its end.
+    assert downloads[0].info.entry["playlist_index"] == "001"
+    assert {d.info.entry["playlist_count"] for d in downloads} == {100}
+
+
 def _channel_extraction(entry_id, **extra):
     """A channel yt-dlp reported as a playlist, addressed by *entry_id*."""
     return {
@@ -782,7 +1128,10 @@ async def test_extract_info_preset_null_download_archive_overrides_global(dq_env
         def __init__(self, params=None):
             captured_params.append(params)
 
-        def extract_info(self, url, download=False):
+        def process_ie_result(self, info, download=False):
+            return info
+
+        def extract_info(self, url, download=False, process=True):
             return {
                 "_type": "video",
                 "id": "vid-archive",
@@ -829,7 +1178,10 @@ async def test_extract_info_metube_extract_keys_win_over_preset(dq_env):
         def __init__(self, params=None):
             captured_params.append(params)
 
-        def extract_info(self, url, download=False):
+        def process_ie_result(self, info, download=False):
+            return info
+
+        def extract_info(self, url, download=False, process=True):
             return {
                 "_type": "video",
                 "id": "vid-flat",
@@ -1026,7 +1378,10 @@ async def test_extraction_pass_never_writes_feed_metadata(dq_env):
         def __init__(self, params=None):
             captured.append(params)
 
-        def extract_info(self, url, download=False):
+        def process_ie_result(self, info, download=False):
+            return info
+
+        def extract_info(self, url, download=False, process=True):
             return {"_type": "video", "id": "v", "title": "V", "url": url, "webpage_url": url}
 
     dq = DownloadQueue(dq_env, AsyncMock())
@@ -1436,6 +1791,240 @@ def test_download_close_releases_status_queue_when_process_close_fails(dq_env):
     assert download.status_queue is None
 
 
+@pytest.mark.asyncio
+async def test_queued_downloads_only_get_a_task_once_dispatched(dq_env):
+    import asyncio
+    import bg_tasks
+
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    release = asyncio.Event()
+
+    async def fake_start(self, *_args):
+        await release.wait()
+        self.info.status = "finished"
+
+    downloads = []
+    for i in range(10):
+        download = _make_download(dq_env)
+        download.info.url = download.info.id = f"http://example.com/v{i}"
+        downloads.append(download)
+        await dq.queue.put(download)
+
+    def run_tasks():
+        return [t for t in bg_tasks._TASKS if t.get_name() == "run_download"]
+
+    with patch.object(Download, "start", fake_start), \
+         patch.object(DownloadQueue, "_post_download_cleanup", AsyncMock()):
+        for download in downloads:
+            await dq._DownloadQueue__start_download(download)
+        await asyncio.sleep(0)
+        assert len(run_tasks()) == int(dq_env.MAX_CONCURRENT_DOWNLOADS)
+        assert dq.scheduler.waiting == 7
+
+        await dq.cancel([downloads[-1].info.url])
+        assert dq.scheduler.waiting == 6
+
+        release.set()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert run_tasks() == []
+        assert (dq.scheduler.running, dq.scheduler.waiting) == (0, 0)
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_post_processing_frees_the_download_slot(dq_env):
+    dq_env.MAX_CONCURRENT_DOWNLOADS = "1"
+    dq_env.POSTPROCESS_WORKERS = "1"
+    dq = DownloadQueue(dq_env, AsyncMock())
+    postprocessed = asyncio.Event()
+    release = asyncio.Event()
+
+    first, second = _make_download(dq_env), _make_download(dq_env)
+    second.info.url = second.info.id = "http://example.com/second"
+
+    async def fake_start(self, *_args):
+        if self is second:
+            await release.wait()
+        await self.on_postprocess(self)
+        if self is first:
+            postprocessed.set()
+            await release.wait()
+        self.info.status = "finished"
+
+    with patch.object(Download, "start", fake_start), \
+         patch.object(DownloadQueue, "_post_download_cleanup", AsyncMock()):
+        await dq._DownloadQueue__start_download(first)
+        await dq._DownloadQueue__start_download(second)
+        assert dq.scheduler.waiting == 1
+        assert "started_at" not in second.info.stages["download"]
+        await asyncio.wait_for(postprocessed.wait(), 5)
+
+        # The first is post-processing; the second has its download slot.
+        assert dq.scheduler.running == 1 and dq.scheduler.waiting == 0
+        assert dq.postprocess_pool.running == 1
+        assert dq._fetching == {second}
+        stages = first.info.stages
+        assert stages["download"]["ended_at"] <= stages["postprocess"]["started_at"]
+
+        release.set()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert dq.postprocess_pool.running == 0
+        assert all("ended_at" in d.info.stages["postprocess"] for d in (first, second))
+        assert not dq.active_downloads
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_drain_holds_new_downloads_until_running_ones_finish(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    running = MagicMock()
+    dq.active_downloads.add(running)
+
+    drain = asyncio.create_task(dq.drain(30))
+    await asyncio.sleep(0)
+    assert dq.scheduler.held
+    status = dq.drain_status()
+    assert status["draining"] and status["running"] == 1
+    notifier.drain_changed.assert_awaited()
+    assert not drain.done()
+
+    dq.active_downloads.discard(running)
+    dq._idle.set()
+    assert await asyncio.wait_for(drain, 5) is True
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_at_the_deadline(dq_env):
+    dq = DownloadQueue(dq_env, AsyncMock())
+    dq.active_downloads.add(MagicMock())
+
+    assert await dq.drain(0.01) is False
+    assert dq.drain_status()["running"] == 1
+    dq.active_downloads.clear()
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_paused_download_keeps_partial_file_until_resumed(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    download = _make_download(dq_env, status="downloading")
+    partial = os.path.join(dq_env.TEMP_DIR, "t.mp4.part")
+    with open(partial, "wb") as f:
+        f.write(b"x" * 10)
+    download.tmpfilename = partial
+    await dq.queue.put(download)
+    url = download.info.url
+
+    download.paused = True
+    await dq._post_download_cleanup(download)
+
+    assert os.path.exists(partial)
+    assert download.info.status == "paused"
+    assert not dq.done.exists(url)
+    reloaded = PersistentQueue("queue", dq_env.STATE_DIR + "/queue")
+    reloaded.load()
+    assert reloaded.get(url).info.status == "paused"
+    notifier.updated.assert_awaited_with(download.info)
+
+    with patch.object(DownloadQueue, "_DownloadQueue__start_download", AsyncMock()) as start:
+        await dq.resume([url])
+    start.assert_awaited_once_with(download)
+    assert (download.paused, download.info.status) == (False, "pending")
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_pausing_a_waiting_download_takes_it_out_of_the_scheduler(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    dq.scheduler.set_limit(0)
+    download = _make_download(dq_env, status="pending")
+    await dq.queue.put(download)
+    url = download.info.url
+    dq.scheduler.submit("example.com", MagicMock(), token=url)
+
+    await dq.pause([url])
+
+    assert download.info.status == "paused"
+    assert dq.scheduler.waiting == 0
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_pause_leaves_a_postprocessing_download_alone(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    # The status is set before the download gets a post-processing slot, so
+    # this also covers one that is waiting for a slot.
+    download = _make_download(dq_env, status="postprocessing")
+    download.proc = MagicMock()
+    await dq.queue.put(download)
+
+    with patch.object(download, "interrupt") as interrupt:
+        await dq.pause([download.info.url])
+
+    interrupt.assert_not_called()
+    assert (download.paused, download.info.status) == (False, "postprocessing")
+    notifier.updated.assert_not_awaited()
+    dq.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("action", ["pause", "cancel"])
+async def test_resumed_download_can_be_paused_or_canceled_while_it_waits(dq_env, action):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    download = _make_download(dq_env, status="downloading")
+    download.proc = MagicMock()
+    await dq.queue.put(download)
+    url = download.info.url
+
+    # Its first run ends in a pause, and on resume it waits for a slot.
+    download.paused = True
+    await dq._post_download_cleanup(download)
+    dq.scheduler.set_limit(0)
+    await dq.resume([url])
+    assert dq.scheduler.waiting == 1
+
+    await getattr(dq, action)([url])
+
+    assert dq.scheduler.waiting == 0
+    if action == "pause":
+        assert download.info.status == "paused"
+        notifier.updated.assert_awaited_with(download.info)
+    else:
+        assert not dq.queue.exists(url)
+        notifier.canceled.assert_awaited_once_with(url)
+    dq.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_paused_download_removes_its_partial_file(dq_env):
+    notifier = AsyncMock()
+    dq = DownloadQueue(dq_env, notifier)
+    download = _make_download(dq_env, status="paused")
+    download.proc = MagicMock()
+    partial = os.path.join(dq_env.TEMP_DIR, "t.mp4.part")
+    with open(partial, "wb") as f:
+        f.write(b"x")
+    download.tmpfilename = partial
+    await dq.queue.put(download)
+
+    await dq.cancel([download.info.url])
+
+    download.proc.kill.assert_not_called()
+    assert not os.path.exists(partial)
+    assert not dq.queue.exists(download.info.url)
+    notifier.canceled.assert_awaited_once_with(download.info.url)
+    dq.close()
+
+
 @pytest.mark.asyncio
 async def test_post_download_cleanup_clears_filename_on_error(dq_env):
     notifier = AsyncMock()
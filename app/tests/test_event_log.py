@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import unittest
+
+from event_log import EventLog
+
+
+class EventLogTests(unittest.TestCase):
+    def test_since_returns_events_after_cursor(self):
+        log = EventLog(10, epoch="e")
+        start = log.cursor
+        first = log.append("added", "a")
+        log.append("updated", "b")
+
+        self.assertEqual(start, "e:0")
+        self.assertEqual(log.since(start), [("added", "a", "e:1"), ("updated", "b", "e:2")])
+        self.assertEqual(log.since(first), [("updated", "b", "e:2")])
+        self.assertEqual(log.since(log.cursor), [])
+
+    def test_gap_outside_buffer_needs_snapshot(self):
+        log = EventLog(2, epoch="e")
+        for i in range(4):
+            log.append("updated", str(i))
+
+        self.assertIsNone(log.since("e:1"))
+        self.assertEqual([p for _e, p, _c in log.since("e:2")], ["2", "3"])
+
+    def test_foreign_or_malformed_cursor_needs_snapshot(self):
+        log = EventLog(10, epoch="e")
+        log.append("added", "a")
+
+        for cursor in ("other:0", "e:x", "e:-1", "e:5", "nonsense", None, 3):
+            self.assertIsNone(log.since(cursor), cursor)
+
+    def test_zero_length_buffer_only_resumes_a_current_client(self):
+        log = EventLog(0, epoch="e")
+        log.append("added", "a")
+
+        self.assertEqual(log.since("e:1"), [])
+        self.assertIsNone(log.since("e:0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for the named thread pools."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import unittest
+
+import executors
+import worker_pool
+from executors import BoundedExecutor
+
+
+class BoundedExecutorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = BoundedExecutor("test", 1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    async def test_counts_queued_work_and_its_wait(self):
+        release = threading.Event()
+        blocked = asyncio.ensure_future(self.pool.run(release.wait))
+        waiting = asyncio.ensure_future(self.pool.run(lambda a, b=0: a + b, 1, b=2))
+        await asyncio.sleep(0.05)
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics["queued"], metrics["running"]), (1, 1))
+
+        release.set()
+        self.assertEqual(await waiting, 3)
+        await blocked
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics["queued"], metrics["running"], metrics["completed"]), (0, 0, 2))
+        self.assertGreaterEqual(metrics["max_wait"], 0.04)
+
+    async def test_work_cancelled_before_it_starts_leaves_the_queue(self):
+        release = threading.Event()
+        blocked = asyncio.ensure_future(self.pool.run(release.wait))
+        waiting = asyncio.ensure_future(self.pool.run(release.wait))
+        await asyncio.sleep(0.01)
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        self.assertEqual(self.pool.metrics()["queued"], 0)
+        release.set()
+        await blocked
+
+    async def test_pools_are_kept_apart(self):
+        executors.configure({"background": 1})
+        try:
+            release = threading.Event()
+            scan = asyncio.ensure_future(executors.run("background", release.wait))
+            busy = asyncio.ensure_future(executors.run("background", release.wait))
+            # Background work queueing up does not hold up an extraction.
+            self.assertEqual(await asyncio.wait_for(executors.run("extract", lambda: "ok"), 5), "ok")
+            self.assertEqual(executors.metrics()["background"]["queued"], 1)
+            self.assertEqual(executors.metrics()["extract"]["workers"], executors.DEFAULT_THREADS["extract"])
+            release.set()
+            await asyncio.gather(scan, busy)
+        finally:
+            executors.shutdown()
+
+
+@unittest.skipUnless(worker_pool.available(), "needs a forkserver")
+class ProcessPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def test_work_runs_in_recycled_worker_processes(self):
+        pool = BoundedExecutor("extract", 1, processes=True, max_tasks=1)
+        try:
+            pids = [await asyncio.wait_for(pool.run(os.getpid), 30) for _ in range(2)]
+        finally:
+            pool.shutdown()
+
+        self.assertNotIn(os.getpid(), pids)
+        self.assertNotEqual(pids[0], pids[1])
+        self.assertEqual(pool.metrics()["completed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
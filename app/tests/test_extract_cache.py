@@ -0,0 +1,69 @@
+"""Tests for the extraction result cache."""
+
+from __future__ import annotations
+
+import unittest
+
+from extract_cache import ExtractionCache
+
+
+def _entry(n, pad=0):
+    return {"_type": "video", "id": str(n), "title": "x" * pad}
+
+
+class ExtractionCacheTests(unittest.TestCase):
+    def test_key_depends_on_url_and_options(self):
+        key = ExtractionCache.key_for("https://a/1", {"format": "best", "proxy": None})
+
+        self.assertEqual(key, ExtractionCache.key_for("https://a/1", {"proxy": None, "format": "best"}))
+        self.assertNotEqual(key, ExtractionCache.key_for("https://a/2", {"format": "best", "proxy": None}))
+        self.assertNotEqual(key, ExtractionCache.key_for("https://a/1", {"format": "worst", "proxy": None}))
+
+    def test_hit_returns_a_copy_until_the_ttl_passes(self):
+        cache = ExtractionCache(ttl=60, max_entries=10, max_bytes=10_000)
+        cache.put("k", _entry(1), now=0)
+
+        first = cache.get("k", now=30)
+        first["title"] = "changed"
+        self.assertEqual(cache.get("k", now=59)["title"], "")
+        self.assertIsNone(cache.get("k", now=60))
+        self.assertEqual(cache.metrics()["entries"], 0)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_least_recently_used_is_evicted_first(self):
+        cache = ExtractionCache(ttl=60, max_entries=2, max_bytes=10_000)
+        cache.put("a", _entry(1), now=0)
+        cache.put("b", _entry(2), now=0)
+        cache.get("a", now=1)
+        cache.put("c", _entry(3), now=2)
+
+        self.assertIsNone(cache.get("b", now=3))
+        self.assertIsNotNone(cache.get("a", now=3))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_byte_limit_evicts_and_skips_oversized_results(self):
+        cache = ExtractionCache(ttl=60, max_entries=10, max_bytes=300)
+        cache.put("a", _entry(1, pad=100), now=0)
+        cache.put("b", _entry(2, pad=100), now=0)
+        cache.put("c", _entry(3, pad=100), now=0)
+        self.assertEqual(cache.metrics()["entries"], 2)
+        self.assertLessEqual(cache.size, 300)
+
+        cache.put("big", _entry(4, pad=1000), now=0)
+        self.assertIsNone(cache.get("big", now=0))
+
+    def test_lazy_playlists_and_disabled_cache_store_nothing(self):
+        cache = ExtractionCache(ttl=60, max_entries=10, max_bytes=10_000)
+        cache.put("p", {"_type": "playlist", "entries": (e for e in [])}, now=0)
+        self.assertIsNone(cache.get("p", now=0))
+        cache.put("q", {"_type": "playlist", "entries": iter([_entry(1)])}, now=0)
+        self.assertIsNone(cache.get("q", now=0))
+
+        off = ExtractionCache(ttl=0, max_entries=10, max_bytes=10_000)
+        off.put("k", _entry(1), now=0)
+        self.assertIsNone(off.get("k", now=0))
+        self.assertEqual(off.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
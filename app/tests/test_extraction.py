@@ -0,0 +1,28 @@
+"""Tests for the compact form of extraction results."""
+
+from __future__ import annotations
+
+import threading
+import unittest
+
+from extraction import compact
+
+
+class CompactTests(unittest.TestCase):
+    def test_drops_bulky_keys_at_every_level(self):
+        info = {
+            "id": "v",
+            "formats": [{"url": "x"}],
+            "entries": [{"id": "a", "requested_formats": [], "subtitles": {}, "title": "A"}],
+        }
+
+        self.assertEqual(compact(info), {"id": "v", "entries": [{"id": "a", "title": "A"}]})
+
+    def test_reads_out_lazy_values_and_drops_unpicklable_ones(self):
+        info = {"entries": (e for e in [{"id": "a"}]), "tags": {"x"}, "lock": threading.Lock(), "n": 3}
+
+        self.assertEqual(compact(info), {"entries": [{"id": "a"}], "tags": ["x"], "lock": None, "n": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
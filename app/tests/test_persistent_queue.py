@@ -302,6 +302,266 @@ class PersistentQueueTests(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(pq.get("http://same.example").info.title, "Title")
 
 
+class JournalModeTests(unittest.IsolatedAsyncioTestCase):
+    async def test_mutations_append_to_journal_without_rewriting_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq = PersistentQueue("queue", path, backend="journal")
+            self.addCleanup(pq.close)
+            await pq.put(_FakeDownload(_make_info("http://a.example")))
+            await pq.put(_FakeDownload(_make_info("http://b.example")))
+            await pq.delete("http://a.example")
+
+            self.assertFalse(os.path.exists(path + ".json"))
+            with open(path + ".json.journal", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(
+                [(r["op"], r["key"]) for r in records],
+                [
+                    ("put", "http://a.example"),
+                    ("put", "http://b.example"),
+                    ("delete", "http://a.example"),
+                ],
+            )
+
+    async def test_load_replays_journal_over_snapshot_and_compacts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq1 = PersistentQueue("queue", path)
+            await pq1.put(_FakeDownload(_make_info("http://snap.example")))
+            await pq1.put(_FakeDownload(_make_info("http://gone.example")))
+            pq1.close()
+
+            pq2 = PersistentQueue("queue", path, backend="journal")
+            pq2.load()
+            await pq2.delete("http://gone.example")
+            replaced = _FakeDownload(_make_info("http://snap.example"))
+            replaced.info.title = "Replaced"
+            await pq2.put(replaced)
+            await pq2.put(_FakeDownload(_make_info("http://new.example")))
+            pq2.close()
+
+            pq3 = PersistentQueue("queue", path, backend="journal")
+            pq3.load()
+            self.addCleanup(pq3.close)
+
+            self.assertEqual(sorted(k for k, _ in pq3.items()), ["http://new.example", "http://snap.example"])
+            self.assertEqual(pq3.get("http://snap.example").info.title, "Replaced")
+            self.assertFalse(os.path.exists(path + ".json.journal"))
+            with open(path + ".json", encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)["items"]), 2)
+
+    async def test_torn_last_journal_record_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq1 = PersistentQueue("queue", path, backend="journal")
+            await pq1.put(_FakeDownload(_make_info("http://kept.example")))
+            pq1.close()
+            with open(path + ".json.journal", "a", encoding="utf-8") as f:
+                f.write('{"op":"put","key":"http://torn.example","info":{"url"')
+
+            pq2 = PersistentQueue("queue", path, backend="journal")
+            pq2.load()
+            self.addCleanup(pq2.close)
+
+            self.assertTrue(pq2.exists("http://kept.example"))
+            self.assertFalse(pq2.exists("http://torn.example"))
+
+    async def test_plain_mode_folds_leftover_journal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq1 = PersistentQueue("queue", path, backend="journal")
+            await pq1.put(_FakeDownload(_make_info("http://journaled.example")))
+            pq1.close()
+
+            pq2 = PersistentQueue("queue", path)
+            pq2.load()
+            self.addCleanup(pq2.close)
+
+            self.assertTrue(pq2.exists("http://journaled.example"))
+            self.assertFalse(os.path.exists(path + ".json.journal"))
+
+    async def test_journal_is_compacted_past_the_record_threshold(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq = PersistentQueue("queue", path, backend="journal")
+            self.addCleanup(pq.close)
+            with patch("ytdl._JOURNAL_COMPACT_MIN_RECORDS", 4):
+                # Re-putting one key grows the journal past the live entry count.
+                for _ in range(4):
+                    await pq.put(_FakeDownload(_make_info("http://same.example")))
+                await pq._compaction
+
+            self.assertFalse(os.path.exists(path + ".json.journal"))
+            with open(path + ".json", encoding="utf-8") as f:
+                keys = [item["key"] for item in json.load(f)["items"]]
+            self.assertEqual(keys, ["http://same.example"])
+
+    async def test_put_rollbacks_when_journal_append_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq = PersistentQueue("queue", path, backend="journal")
+            self.addCleanup(pq.close)
+            await pq.put(_FakeDownload(_make_info("http://first.example")))
+
+            def bad_append(store, records):
+                raise OSError("simulated journal failure")
+
+            with patch("ytdl.JournaledJsonStore.append", bad_append):
+                with self.assertRaises(OSError):
+                    await pq.put(_FakeDownload(_make_info("http://second.example")))
+                with self.assertRaises(OSError):
+                    await pq.delete("http://first.example")
+
+            self.assertTrue(pq.exists("http://first.example"))
+            self.assertFalse(pq.exists("http://second.example"))
+
+
+class SqliteBackendTests(unittest.IsolatedAsyncioTestCase):
+    async def test_imports_json_state_once_then_persists_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq1 = PersistentQueue("queue", path)
+            await pq1.put(_FakeDownload(_make_info("http://imported.example")))
+            pq1.close()
+
+            pq2 = PersistentQueue("queue", path, backend="sqlite")
+            pq2.load()
+            self.assertTrue(pq2.exists("http://imported.example"))
+            await pq2.put(_FakeDownload(_make_info("http://new.example")))
+            await pq2.delete("http://imported.example")
+            pq2.close()
+
+            with open(path + ".json", encoding="utf-8") as f:
+                self.assertEqual([i["key"] for i in json.load(f)["items"]], ["http://imported.example"])
+
+            pq3 = PersistentQueue("queue", path, backend="sqlite")
+            pq3.load()
+            self.addCleanup(pq3.close)
+            self.assertEqual([k for k, _ in pq3.items()], ["http://new.example"])
+            self.assertEqual(
+                [record["status"] for _, record in pq3.db.load("queue")],
+                ["pending"],
+            )
+
+    async def test_collections_share_one_database(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = PersistentQueue("queue", os.path.join(tmp, "queue"), backend="sqlite")
+            done = PersistentQueue("completed", os.path.join(tmp, "completed"), backend="sqlite")
+            self.addCleanup(queue.close)
+            self.addCleanup(done.close)
+            queue.load()
+            done.load()
+            await asyncio.gather(
+                queue.put(_FakeDownload(_make_info("http://q.example"))),
+                done.put(_FakeDownload(_make_info("http://d.example"))),
+            )
+
+            self.assertEqual(os.listdir(tmp).count("state.sqlite3"), 1)
+            self.assertEqual([k for k, _ in queue.saved_items()], ["http://q.example"])
+            self.assertEqual([k for k, _ in done.saved_items()], ["http://d.example"])
+
+    async def test_failed_row_write_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pq = PersistentQueue("queue", os.path.join(tmp, "queue"), backend="sqlite")
+            self.addCleanup(pq.close)
+            pq.load()
+
+            def bad_apply(store, collection, upserts, deletes):
+                raise OSError("simulated database failure")
+
+            with patch("ytdl.SqliteStateStore.apply", bad_apply):
+                with self.assertRaises(OSError):
+                    await pq.put(_FakeDownload(_make_info("http://rollback.example")))
+
+            self.assertFalse(pq.exists("http://rollback.example"))
+            self.assertEqual(pq.saved_items(), [])
+
+
+class GroupCommitTests(unittest.IsolatedAsyncioTestCase):
+    def _count_saves(self):
+        orig_save = __import__("state_store").AtomicJsonStore.save
+        saves = []
+
+        def counting_save(store, data):
+            saves.append(len(data["items"]))
+            return orig_save(store, data)
+
+        return saves, patch("ytdl.AtomicJsonStore.save", counting_save)
+
+    async def test_concurrent_puts_share_one_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pq = PersistentQueue("queue", os.path.join(tmp, "queue"))
+            self.addCleanup(pq.close)
+            saves, patcher = self._count_saves()
+            with patcher:
+                await asyncio.gather(*(
+                    pq.put(_FakeDownload(_make_info(f"http://{i}.example"))) for i in range(20)
+                ))
+
+            self.assertEqual(saves, [20])
+
+    async def test_commit_delay_coalesces_back_to_back_mutations(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pq = PersistentQueue("queue", os.path.join(tmp, "queue"), commit_delay=0.05, commit_batch=10)
+            self.addCleanup(pq.close)
+            saves, patcher = self._count_saves()
+            with patcher:
+                first = pq.put_nowait(_FakeDownload(_make_info("http://a.example")))
+                await asyncio.sleep(0.01)
+                second = pq.put_nowait(_FakeDownload(_make_info("http://b.example")))
+                self.assertFalse(first.done())
+                await asyncio.gather(first, second)
+
+            self.assertEqual(saves, [2])
+
+    async def test_full_batch_is_written_without_waiting_out_the_delay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pq = PersistentQueue("queue", os.path.join(tmp, "queue"), commit_delay=30, commit_batch=3)
+            self.addCleanup(pq.close)
+            futures = [pq.put_nowait(_FakeDownload(_make_info(f"http://{i}.example"))) for i in range(3)]
+            await asyncio.wait_for(asyncio.gather(*futures), timeout=5)
+
+    async def test_failed_write_rolls_back_batch_and_later_mutations(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq = PersistentQueue("queue", path)
+            self.addCleanup(pq.close)
+            await pq.put(_FakeDownload(_make_info("http://kept.example")))
+            orig_save = __import__("state_store").AtomicJsonStore.save
+            release = threading.Event()
+
+            def blocked_bad_save(store, data):
+                release.wait(5)
+                raise OSError("simulated state failure")
+
+            with patch("ytdl.AtomicJsonStore.save", blocked_bad_save):
+                in_flight = pq.put_nowait(_FakeDownload(_make_info("http://new.example")))
+                await asyncio.sleep(0.05)
+                # Applied while the failing write is in flight, on top of it.
+                later = pq.delete_nowait("http://kept.example")
+                release.set()
+                results = await asyncio.gather(in_flight, later, return_exceptions=True)
+
+            self.assertTrue(all(isinstance(r, OSError) for r in results))
+            self.assertEqual([k for k, _ in pq.items()], ["http://kept.example"])
+            with patch("ytdl.AtomicJsonStore.save", orig_save):
+                self.assertEqual([k for k, _ in pq.saved_items()], ["http://kept.example"])
+
+    async def test_close_writes_uncommitted_mutations(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue")
+            pq = PersistentQueue("queue", path, commit_delay=30, commit_batch=10)
+            future = pq.put_nowait(_FakeDownload(_make_info("http://late.example")))
+            pq.close()
+
+            self.assertTrue(future.done())
+            pq2 = PersistentQueue("queue", path)
+            self.addCleanup(pq2.close)
+            pq2.load()
+            self.assertTrue(pq2.exists("http://late.example"))
+
+
 class StateWriteOffEventLoopTests(unittest.IsolatedAsyncioTestCase):
     """State writes fsync twice; on a slow disk that must not stall the loop.
 
@@ -0,0 +1,239 @@
+"""Tests for the download slot scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import unittest
+
+from scheduler import AdaptiveConcurrency, BandwidthBudget, DownloadScheduler, SlotPool
+
+
+class KeyTests(unittest.TestCase):
+    def test_extractor_then_domain_then_bare_host(self):
+        s = DownloadScheduler(3, {"youtube": 2, "soundcloud.com": 1})
+
+        self.assertEqual(s.key_for("https://www.youtube.com/watch?v=x", "Youtube"), "youtube")
+        self.assertEqual(s.key_for("https://m.soundcloud.com/a/b"), "soundcloud.com")
+        self.assertEqual(s.key_for("https://Example.org/f.mp4", "Generic"), "example.org")
+
+
+class DispatchTests(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+
+    def _submit(self, s, key, name, priority=0):
+        s.submit(key, lambda: self.started.append(name), priority, name)
+
+    def test_busy_host_does_not_block_other_hosts(self):
+        s = DownloadScheduler(3, {"a": 1})
+        self._submit(s, "a", "a1")
+        self._submit(s, "a", "a2")
+        self._submit(s, "b", "b1")
+
+        self.assertEqual(self.started, ["a1", "b1"])
+        s.release("a")
+        self.assertEqual(self.started, ["a1", "b1", "a2"])
+        self.assertEqual((s.running, s.waiting), (2, 0))
+
+    def test_global_cap_serves_eligible_waiters_in_order(self):
+        s = DownloadScheduler(2, {"a": 1})
+        self._submit(s, "a", "a1")
+        self._submit(s, "b", "b1")
+        for key, name in (("a", "a2"), ("c", "c1"), ("d", "d1")):
+            self._submit(s, key, name)
+
+        s.release("b")
+        # "a2" is first in line but its host is still busy.
+        self.assertEqual(self.started[2:], ["c1"])
+        s.release("a")
+        self.assertEqual(self.started[2:], ["c1", "a2"])
+        s.release("c")
+        self.assertEqual(self.started[2:], ["c1", "a2", "d1"])
+
+    def test_default_host_limit_and_discard(self):
+        s = DownloadScheduler(5, {"*": 1})
+        self._submit(s, "x.com", "x1")
+        self._submit(s, "x.com", "x2")
+
+        self.assertEqual(self.started, ["x1"])
+        self.assertTrue(s.discard("x2"))
+        self.assertFalse(s.discard("x2"))
+        s.release("x.com")
+        self.assertEqual(self.started, ["x1"])
+        self.assertEqual((s.running, s.waiting), (0, 0))
+
+    def test_higher_priority_starts_first_and_can_be_raised(self):
+        s = DownloadScheduler(1)
+        self._submit(s, "h", "running")
+        for name, priority in (("backfill1", 0), ("backfill2", 0), ("urgent", 5), ("late", 0)):
+            self._submit(s, "h", name, priority)
+
+        self.assertTrue(s.set_priority("late", 9))
+        self.assertFalse(s.set_priority("unknown", 9))
+        for _ in range(4):
+            s.release("h")
+
+        self.assertEqual(self.started, ["running", "late", "urgent", "backfill1", "backfill2"])
+
+    def test_discard_after_reprioritize_forgets_the_waiter(self):
+        s = DownloadScheduler(1)
+        self._submit(s, "h", "running")
+        self._submit(s, "h", "t")
+        s.set_priority("t", 3)
+        s.discard("t")
+
+        s.release("h")
+        self.assertEqual(self.started, ["running"])
+        self.assertEqual((s.running, s.waiting), (0, 0))
+
+    def test_set_limit_grows_now_and_shrinks_as_downloads_finish(self):
+        s = DownloadScheduler(1)
+        for name in ("d1", "d2", "d3", "d4"):
+            self._submit(s, name, name)
+
+        s.set_limit(3)
+        self.assertEqual(self.started, ["d1", "d2", "d3"])
+
+        s.set_limit(1)
+        s.release("d1")
+        s.release("d2")
+        self.assertEqual(self.started, ["d1", "d2", "d3"])
+        s.release("d3")
+        self.assertEqual(self.started, ["d1", "d2", "d3", "d4"])
+
+    def test_hold_starts_nothing_more(self):
+        s = DownloadScheduler(2)
+        self._submit(s, "d1", "d1")
+        s.hold()
+        self._submit(s, "d2", "d2")
+        s.release("d1")
+        s.set_limit(5)
+        self.assertEqual(self.started, ["d1"])
+        self.assertEqual((s.running, s.waiting), (0, 1))
+
+    def test_resubmitting_a_waiter_replaces_it(self):
+        s = DownloadScheduler(1)
+        self._submit(s, "h", "running")
+        self._submit(s, "h", "t")
+        self._submit(s, "h", "t")
+
+        s.release("h")
+        s.release("h")
+        self.assertEqual(self.started, ["running", "t"])
+
+
+
+class SlotPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def test_waiters_are_served_in_order(self):
+        pool = SlotPool(1)
+        await pool.acquire()
+        order = []
+
+        async def take(name):
+            await pool.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(take(n)) for n in ("a", "b")]
+        await asyncio.sleep(0)
+        self.assertEqual((pool.running, pool.waiting), (1, 2))
+
+        pool.release()
+        await asyncio.sleep(0)
+        self.assertEqual(order, ["a"])
+        pool.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["a", "b"])
+        pool.release()
+        self.assertEqual((pool.running, pool.waiting), (0, 0))
+
+    async def test_cancelled_waiter_gives_up_its_place_or_its_slot(self):
+        pool = SlotPool(1)
+        await pool.acquire()
+        waiting = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        self.assertEqual(pool.waiting, 0)
+
+        granted = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        pool.release()
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+        self.assertEqual((pool.running, pool.waiting), (0, 0))
+
+
+class AdaptiveConcurrencyTests(unittest.TestCase):
+    def test_failures_cut_the_limit(self):
+        a = AdaptiveConcurrency(1, 10)
+        for ok in (True, False, False):
+            a.record_result(ok)
+        self.assertEqual(a.decide(8, 8, 5), 4)
+        self.assertEqual(a.last["decision"], "decrease: error rate")
+
+    def test_a_single_failure_is_not_throttling(self):
+        a = AdaptiveConcurrency(1, 10)
+        a.record_result(False)
+        self.assertEqual(a.decide(4, 2, 0), 4)
+
+    def test_grows_only_while_saturated_and_backlogged(self):
+        a = AdaptiveConcurrency(1, 10)
+        self.assertEqual(a.decide(3, 2, 5), 3)
+        self.assertEqual(a.decide(3, 3, 0), 3)
+        self.assertEqual(a.decide(3, 3, 5), 4)
+
+    def test_step_without_throughput_gain_is_undone_and_growth_pauses(self):
+        a = AdaptiveConcurrency(1, 10, cooldown=2)
+        a.record_speed(1000)
+        self.assertEqual(a.decide(3, 3, 5), 4)
+        a.record_speed(1020)
+        self.assertEqual(a.decide(4, 4, 5), 3)
+        self.assertEqual(a.decide(3, 3, 5), 3)
+        self.assertEqual(a.decide(3, 3, 5), 4)
+
+    def test_step_with_throughput_gain_keeps_growing(self):
+        a = AdaptiveConcurrency(1, 10)
+        a.record_speed(1000)
+        self.assertEqual(a.decide(3, 3, 5), 4)
+        a.record_speed(1500)
+        self.assertEqual(a.decide(4, 4, 5), 5)
+
+    def test_limit_stays_within_bounds(self):
+        a = AdaptiveConcurrency(2, 4)
+        self.assertEqual(a.decide(4, 4, 5), 4)
+        for _ in range(4):
+            a.record_result(False)
+        self.assertEqual(a.decide(3, 3, 0), 2)
+        self.assertEqual(a.metrics()["decisions"], 2)
+
+
+
+def _at(hour, minute=0):
+    return datetime.datetime(2024, 5, 1, hour, minute)
+
+
+class BandwidthBudgetTests(unittest.TestCase):
+    def test_limit_is_split_evenly(self):
+        b = BandwidthBudget(9000.0)
+        self.assertEqual(b.share(0), 9000.0)
+        self.assertEqual(b.share(3), 3000.0)
+        self.assertIsNone(BandwidthBudget().share(3))
+        self.assertIsNone(b.seconds_until_change())
+
+    def test_schedule_replaces_the_limit_and_wraps_past_midnight(self):
+        b = BandwidthBudget(1.0, {8 * 60: 2000.0, 23 * 60: None})
+        self.assertIsNone(b.current(_at(3)))
+        self.assertEqual(b.current(_at(8)), 2000.0)
+        self.assertEqual(b.share(2, _at(22, 59)), 1000.0)
+        self.assertIsNone(b.current(_at(23, 30)))
+
+    def test_seconds_until_change(self):
+        b = BandwidthBudget(None, {8 * 60: 2000.0, 23 * 60: None})
+        self.assertEqual(b.seconds_until_change(_at(7, 30)), 30 * 60)
+        self.assertEqual(b.seconds_until_change(_at(8)), 15 * 60 * 60)
+        self.assertEqual(b.seconds_until_change(_at(23, 30)), 8.5 * 60 * 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
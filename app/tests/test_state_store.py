@@ -6,7 +6,13 @@ import unittest
 from datetime import datetime
 from unittest.mock import patch
 
-from state_store import AtomicJsonStore, from_json_compatible, to_json_compatible
+from state_store import (
+    AtomicJsonStore,
+    JournaledJsonStore,
+    SqliteStateStore,
+    from_json_compatible,
+    to_json_compatible,
+)
 
 
 class StateStoreTests(unittest.TestCase):
@@ -179,5 +185,85 @@ class StateStoreTests(unittest.TestCase):
         self.assertEqual(restored["items"], [1, 2, 3])
 
 
+class JournaledJsonStoreTests(unittest.TestCase):
+    def test_append_load_and_compact(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue.json")
+            store = JournaledJsonStore(path, kind="persistent_queue:queue")
+            store.append([{"op": "put", "key": "a"}])
+            store.append([{"op": "delete", "key": "a"}, {"op": "put", "key": "b"}])
+
+            self.assertEqual(store.journal_records, 3)
+            self.assertEqual(store.journal_bytes, os.path.getsize(path + ".journal"))
+            self.assertEqual(
+                [r["key"] for r in JournaledJsonStore(path, kind="persistent_queue:queue").load_journal()],
+                ["a", "a", "b"],
+            )
+
+            store.compact({"items": [{"key": "b"}]})
+
+            self.assertFalse(os.path.exists(path + ".journal"))
+            self.assertEqual(store.load_journal(), [])
+            self.assertEqual(store.load()["items"], [{"key": "b"}])
+            self.assertEqual((store.journal_bytes, store.journal_records), (0, 0))
+
+    def test_failed_append_truncates_partial_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "queue.json")
+            store = JournaledJsonStore(path, kind="persistent_queue:queue")
+            store.append([{"op": "put", "key": "a"}])
+            size = os.path.getsize(path + ".journal")
+
+            with patch("state_store.os.fsync", side_effect=OSError(5, "EIO")):
+                with self.assertRaises(OSError):
+                    store.append([{"op": "put", "key": "b"}])
+
+            self.assertEqual(os.path.getsize(path + ".journal"), size)
+            self.assertEqual([r["key"] for r in store.load_journal()], ["a"])
+
+
+class SqliteStateStoreTests(unittest.TestCase):
+    def test_rows_are_upserted_deleted_and_ordered_by_sort_key(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SqliteStateStore(os.path.join(tmp, "state.sqlite3"))
+            self.addCleanup(store.close)
+            store.apply("queue", [
+                ("b", "http://b", "pending", 2, {"n": 1}),
+                ("a", "http://a", "pending", 1, {"n": 1}),
+            ], [])
+            store.apply("queue", [("b", "http://b", "error", 2, {"n": 2})], ["a"])
+            store.apply("completed", [("a", "http://a", "finished", 1, {"n": 3})], [])
+
+            self.assertEqual(store.load("queue"), [("b", {"n": 2})])
+            self.assertEqual(store.load("completed"), [("a", {"n": 3})])
+
+    def test_import_replaces_collection_and_marks_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SqliteStateStore(os.path.join(tmp, "state.sqlite3"))
+            self.addCleanup(store.close)
+            store.apply("queue", [("stale", None, None, None, {})], [])
+            self.assertFalse(store.is_imported("queue"))
+
+            store.import_collection("queue", [("k", "http://k", "pending", 1, {"x": 1})])
+
+            self.assertTrue(store.is_imported("queue"))
+            self.assertFalse(store.is_imported("completed"))
+            self.assertEqual(store.load("queue"), [("k", {"x": 1})])
+
+    def test_invalid_database_is_quarantined(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.sqlite3")
+            with open(path, "wb") as f:
+                f.write(b"not a database" * 100)
+
+            store = SqliteStateStore(path)
+            self.addCleanup(store.close)
+
+            self.assertEqual(store.load("queue"), [])
+            self.assertTrue(
+                any(name.startswith("state.sqlite3.invalid.") for name in os.listdir(tmp))
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -33,6 +33,7 @@ sys.modules.setdefault("yt_dlp.networking.impersonate", fake_impersonate)
 from subscriptions import (
     SubscriptionInfo,
     SubscriptionManager,
+    _extract_flat_playlist_compact,
     _is_subscriber_only_entry,
     coerce_optional_bool,
     extract_flat_playlist,
@@ -1244,6 +1245,45 @@ class SubscriptionPersistenceTests(unittest.IsolatedAsyncioTestCase):
             self.assertTrue(mgr.list_all()[0].skip_subscriber_only)
 
 
+class SqliteSubscriptionPersistenceTests(unittest.IsolatedAsyncioTestCase):
+    def _config(self, tmp):
+        cfg = _Config(tmp)
+        cfg.STATE_BACKEND = "sqlite"
+        return cfg
+
+    def _write_json(self, tmp, *ids):
+        with open(os.path.join(tmp, "subscriptions.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "schema_version": 2,
+                    "kind": "subscriptions",
+                    "items": [
+                        {"id": sid, "name": sid, "url": f"https://example.com/{sid}", "seen_ids": ["a"]}
+                        for sid in ids
+                    ],
+                },
+                f,
+            )
+
+    async def test_imports_json_once_and_updates_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._write_json(tmp, "sub-1", "sub-2")
+            mgr = SubscriptionManager(self._config(tmp), _Queue(), _Notifier())
+            self.addCleanup(mgr.close)
+            self.assertEqual([s.id for s in mgr.list_all()], ["sub-1", "sub-2"])
+
+            self.assertEqual((await mgr.update_subscription("sub-2", {"name": "Renamed"}))["status"], "ok")
+            await mgr.delete_subscriptions(["sub-1"])
+            # Rewriting the JSON afterwards must not re-import it.
+            self._write_json(tmp, "sub-3")
+
+            reloaded = SubscriptionManager(self._config(tmp), _Queue(), _Notifier())
+            self.addCleanup(reloaded.close)
+            self.assertEqual([s.id for s in reloaded.list_all()], ["sub-2"])
+            self.assertEqual(reloaded.get("sub-2").name, "Renamed")
+            self.assertEqual(reloaded.get("sub-2").seen_ids, ["a"])
+
+
 class ExtractFlatPlaylistTests(unittest.TestCase):
     def test_descends_one_level_when_root_entries_are_nested_collections(self):
         responses = iter(
@@ -1336,6 +1376,18 @@ def _make_scan_capturing_fake_ydl(captured_params: list, entries: list[dict]):
     return _FakeYDL
 
 
+class ExtractFlatPlaylistCompactTests(unittest.TestCase):
+    def test_worker_result_carries_the_entries_once_without_bulky_keys(self):
+        entries = [{"_type": "url", "id": "v1", "url": "https://example.com/v1", "formats": [{}]}]
+        cfg = types.SimpleNamespace(DOWNLOAD_DIR="/d", TEMP_DIR="/t", YTDL_OPTIONS={}, ALLOW_PRIVATE_ADDRESSES=False)
+
+        with patch("subscriptions.yt_dlp.YoutubeDL", _make_scan_capturing_fake_ydl([], entries), create=True):
+            info, compact_entries = _extract_flat_playlist_compact(cfg, "https://example.com/c", 5, None)
+
+        self.assertEqual(info, {"_type": "channel", "title": "Channel"})
+        self.assertEqual(compact_entries, [{"_type": "url", "id": "v1", "url": "https://example.com/v1"}])
+
+
 class SubscriptionScanExtraOptsTests(unittest.IsolatedAsyncioTestCase):
     async def test_add_subscription_scan_applies_presets_and_overrides(self):
         captured_params: list = []
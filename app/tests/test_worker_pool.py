@@ -0,0 +1,80 @@
+"""Tests for the pre-started download worker pool."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import time
+import unittest
+
+import worker_pool
+from worker_pool import WorkerPool
+
+
+def _report_pid(status_fd):
+    os.write(status_fd, f"{os.getpid()} {os.getpgrp()}".encode())
+
+
+def _hang(status_fd):
+    os.write(status_fd, b"started")
+    time.sleep(60)
+
+
+def _read_all(fd):
+    chunks = []
+    with os.fdopen(fd, "rb") as f:
+        while chunk := f.read(4096):
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@unittest.skipUnless(worker_pool.available(), "needs a forkserver")
+class WorkerPoolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = WorkerPool(1, 2)
+        self.pool.start()
+
+    def tearDown(self):
+        self.pool.close()
+
+    async def _run(self, target):
+        worker = await self.pool.acquire()
+        read_fd, write_fd = os.pipe()
+        proc = self.pool.submit(worker, target, write_fd)
+        os.close(write_fd)
+        output = await asyncio.get_running_loop().run_in_executor(None, _read_all, read_fd)
+        proc.close()
+        return proc, output
+
+    async def test_jobs_reuse_a_worker_until_recycled(self):
+        pids = []
+        for _ in range(3):
+            _proc, output = await self._run(_report_pid)
+            pid, pgid = output.decode().split()
+            self.assertEqual(pid, pgid)
+            pids.append(pid)
+
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+    async def test_killed_worker_is_replaced(self):
+        worker = await self.pool.acquire()
+        read_fd, write_fd = os.pipe()
+        proc = self.pool.submit(worker, _hang, write_fd)
+        os.close(write_fd)
+        with os.fdopen(read_fd, "rb") as f:
+            self.assertEqual(f.read(7), b"started")
+            self.assertTrue(proc.is_alive())
+            os.killpg(proc.pid, signal.SIGKILL)
+            self.assertEqual(f.read(), b"")
+        killed_pid = proc.pid
+        proc.close()
+
+        self.assertFalse(proc.is_alive())
+        _proc, output = await self._run(_report_pid)
+        self.assertNotEqual(output.decode().split()[0], str(killed_pid))
+
+
+if __name__ == "__main__":
+    unittest.main()
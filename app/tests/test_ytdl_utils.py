@@ -1190,17 +1190,14 @@ class UpdateStatusFileStatTests(unittest.IsolatedAsyncioTestCase):
     """
 
     async def _run_update_status(self, statuses):
-        import queue as _queue
-
         download = _make_test_download()
         download.download_dir = "/tmp"
-        source = _queue.Queue()
+        reader = asyncio.StreamReader()
         for status in statuses:
-            source.put(status)
-        source.put(None)
-        download.status_queue = source
+            reader.feed_data(ytdl._StatusPipe.encode(status))
+        reader.feed_eof()
+        download._status_reader = reader
         download.loop = asyncio.get_running_loop()
-        download._executor = ThreadPoolExecutor(max_workers=1)
         notifier = MagicMock()
         notifier.updated = AsyncMock()
         download.notifier = notifier
@@ -1211,11 +1208,8 @@ class UpdateStatusFileStatTests(unittest.IsolatedAsyncioTestCase):
             stat_calls.append(path)
             return False
 
-        try:
-            with patch("ytdl.os.path.exists", side_effect=record_exists):
-                await download.update_status()
-        finally:
-            download._executor.shutdown(wait=True)
+        with patch("ytdl.os.path.exists", side_effect=record_exists):
+            await download.update_status()
         return download, stat_calls
 
     async def test_downloading_ticks_do_not_stat_the_output_file(self):
@@ -1237,3 +1231,287 @@ class UpdateStatusFileStatTests(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(stat_calls, ["/tmp/v.mp4"])
         self.assertIsNone(download.info.size)
+
+
+class StatusPipeTests(unittest.IsolatedAsyncioTestCase):
+    async def test_truncated_frame_reads_as_end_of_stream(self):
+        frame = ytdl._StatusPipe.encode({"status": "downloading"})
+        reader = asyncio.StreamReader()
+        reader.feed_data(frame + frame[:-1])
+        reader.feed_eof()
+
+        self.assertEqual(await ytdl._StatusPipe.read(reader), {"status": "downloading"})
+        self.assertIsNone(await ytdl._StatusPipe.read(reader))
+
+    @unittest.skipUnless(ytdl._MP_CTX.get_start_method() == "fork", "needs fork")
+    async def test_start_reads_every_status_written_by_the_child(self):
+        download = _make_test_download()
+        download.download_dir = "/tmp"
+        notifier = MagicMock()
+        notifier.updated = AsyncMock()
+        # Larger than PIPE_BUF, so the frame cannot go through in one write.
+        long_msg = "x" * 100_000
+
+        def child(self):
+            for percent in range(1, 4):
+                self.status_queue.put({
+                    "status": "downloading", "downloaded_bytes": percent, "total_bytes": 100,
+                })
+            self.status_queue.put({"status": "error", "msg": long_msg})
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            with patch.object(Download, "_download", child):
+                await asyncio.wait_for(download.start(notifier, executor), 30)
+        finally:
+            executor.shutdown(wait=True)
+            download.close()
+
+        self.assertEqual(download.info.status, "error")
+        self.assertEqual(download.info.msg, long_msg)
+        self.assertEqual(download.info.percent, 3)
+        self.assertIsNone(download._status_transport)
+
+    @unittest.skipUnless(ytdl._MP_CTX.get_start_method() == "fork", "needs fork")
+    async def test_exit_is_awaited_without_an_executor_thread(self):
+        download = _make_test_download()
+        notifier = MagicMock()
+        notifier.updated = AsyncMock()
+        executor = MagicMock()
+
+        def child(self):
+            self.status_queue.put({"status": "finished"})
+
+        try:
+            with patch.object(Download, "_download", child):
+                await asyncio.wait_for(download.start(notifier, executor), 30)
+        finally:
+            download.close()
+
+        executor.submit.assert_not_called()
+        self.assertEqual(download.info.status, "finished")
+
+    @unittest.skipUnless(ytdl._MP_CTX.get_start_method() == "fork", "needs fork")
+    async def test_exit_falls_back_to_join_without_pidfd(self):
+        download = _make_test_download()
+        notifier = MagicMock()
+        notifier.updated = AsyncMock()
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def child(self):
+            self.status_queue.put({"status": "finished"})
+
+        try:
+            with patch.object(Download, "_download", child), \
+                    patch("ytdl.os.pidfd_open", side_effect=OSError("unsupported"), create=True):
+                await asyncio.wait_for(download.start(notifier, executor), 30)
+        finally:
+            executor.shutdown(wait=True)
+            download.close()
+
+        self.assertEqual(download.info.status, "finished")
+        self.assertFalse(download.running())
+
+
+class PartialTrackingTests(unittest.TestCase):
+    def test_progress_records_temp_file_and_offset(self):
+        download = _make_test_download()
+        download._track_partial("/tmp/t.mp4.part", 100)
+        self.assertEqual(download.info.partial, {"tmpfilename": "/tmp/t.mp4.part", "offset": 100})
+        self.assertNotIn("partial", download.info.to_public_dict())
+
+    def test_first_progress_after_restart_reports_whether_partial_file_was_reused(self):
+        download = _make_test_download()
+        download.info.partial = {"tmpfilename": "/tmp/t.mp4.part", "offset": 90, "saved": 100}
+        with self.assertLogs("ytdl", level="INFO") as logs:
+            download._track_partial("/tmp/t.mp4.part", 120)
+            download._track_partial("/tmp/t.mp4.part", 140)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Continued t from 100 bytes", logs.output[0])
+
+        download.info.partial = {"tmpfilename": "/tmp/t.mp4.part", "offset": 90, "saved": 100}
+        with self.assertLogs("ytdl", level="WARNING"):
+            download._track_partial("/tmp/other.mp4.part", 10)
+
+
+class ControlPipeTests(unittest.TestCase):
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        self.pipe = ytdl._ControlPipe(read_fd, 1000.0)
+
+    def tearDown(self):
+        os.close(self.pipe.fd)
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+
+    def _send(self, kind, value=None):
+        return ytdl._ControlPipe.encode(kind, value)
+
+    def test_poll_returns_the_latest_complete_share(self):
+        rate = ytdl._ControlPipe.RATE_LIMIT
+        self.assertEqual(self.pipe.poll(), 1000.0)
+
+        frames = self._send(rate, 500.0) + self._send(rate, 250.0)
+        os.write(self.write_fd, frames + self._send(rate)[:3])
+        self.assertEqual(self.pipe.poll(), 250.0)
+
+        os.write(self.write_fd, self._send(rate)[3:])
+        self.assertIsNone(self.pipe.poll())
+
+    def test_postprocess_grant_is_kept_alongside_rate_updates(self):
+        os.write(self.write_fd, self._send(ytdl._ControlPipe.POSTPROCESS) + self._send(ytdl._ControlPipe.RATE_LIMIT, 50.0))
+
+        self.assertEqual(self.pipe.poll(), 50.0)
+        self.assertTrue(self.pipe.postprocess_granted)
+        self.pipe.wait_for_postprocess()
+
+    def test_wait_for_postprocess_returns_when_the_server_is_gone(self):
+        os.close(self.write_fd)
+        self.write_fd = None
+
+        self.pipe.wait_for_postprocess()
+        self.assertTrue(self.pipe.closed)
+        self.assertFalse(self.pipe.postprocess_granted)
+
+    def test_share_caps_but_never_raises_the_configured_ratelimit(self):
+        download = _make_test_download()
+        download.control = self.pipe
+        download._control_fd = self.write_fd
+        ydl = MagicMock()
+        ydl.params = {"ratelimit": 800.0}
+        apply_rate_limit = download._make_rate_limit_hook(ydl)
+
+        apply_rate_limit()
+        self.assertEqual(ydl.params["ratelimit"], 800.0)
+
+        download.set_rate_limit(300.0)
+        apply_rate_limit({"status": "downloading"})
+        self.assertEqual(ydl.params["ratelimit"], 300.0)
+
+        download.set_rate_limit(None)
+        apply_rate_limit({"status": "downloading"})
+        self.assertEqual(ydl.params["ratelimit"], 800.0)
+        download._control_fd = None
+
+    def test_postprocess_gate_waits_for_a_slot_after_the_download(self):
+        download = _make_test_download()
+        download.control = self.pipe
+        download.status_queue = MagicMock()
+        on_progress, on_postprocessor = download._make_postprocess_gate()
+        os.write(self.write_fd, self._send(ytdl._ControlPipe.POSTPROCESS))
+
+        # Pre-processing, before any bytes are downloaded, is not gated.
+        on_postprocessor({"status": "started", "postprocessor": "MetadataParser"})
+        download.status_queue.put.assert_not_called()
+
+        on_progress({"status": "finished"})
+        on_postprocessor({"status": "started", "postprocessor": "Merger"})
+        on_postprocessor({"status": "started", "postprocessor": "EmbedThumbnail"})
+        download.status_queue.put.assert_called_once_with({"status": "postprocessing"})
+        self.assertTrue(self.pipe.postprocess_granted)
+
+
+class _InlinePool:
+    """Runs a pooled job on a thread of this process, for Download.start."""
+
+    def __init__(self):
+        self.released = []
+        self.threads = []
+
+    async def acquire(self):
+        return "worker"
+
+    def submit(self, worker, target, *fds):
+        # start() closes its copies of the descriptors once this returns.
+        fds = [os.dup(fd) for fd in fds]
+
+        def run():
+            try:
+                target(*fds)
+            finally:
+                for fd in fds:
+                    os.close(fd)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+        proc = MagicMock()
+        proc.close.side_effect = lambda: self.released.append(worker)
+        return proc
+
+    def release(self, worker):
+        self.released.append(worker)
+
+
+class PooledDownloadTests(unittest.IsolatedAsyncioTestCase):
+    async def test_start_runs_the_job_on_a_pool_worker(self):
+        download = _make_test_download()
+        notifier = MagicMock()
+        notifier.updated = AsyncMock()
+        pool = _InlinePool()
+
+        def job(self):
+            self.status_queue.put({"status": "finished"})
+
+        with patch.object(Download, "_download", job):
+            await asyncio.wait_for(download.start(notifier, None, pool), 10)
+        for thread in pool.threads:
+            thread.join()
+
+        self.assertEqual(download.info.status, "finished")
+        self.assertEqual(pool.released, ["worker"])
+
+    async def test_job_post_processes_once_the_server_grants_a_slot(self):
+        download = _make_test_download()
+        notifier = MagicMock()
+        notifier.updated = AsyncMock()
+        pool = _InlinePool()
+        statuses = []
+
+        async def on_postprocess(dl):
+            statuses.append(dl.info.status)
+            await asyncio.sleep(0.05)
+
+        def job(self):
+            self.status_queue.put({"status": "postprocessing"})
+            self.control.wait_for_postprocess()
+            self.status_queue.put({"status": "finished" if self.control.postprocess_granted else "error"})
+
+        download.on_postprocess = on_postprocess
+        with patch.object(Download, "_download", job):
+            await asyncio.wait_for(download.start(notifier, None, pool), 10)
+        for thread in pool.threads:
+            thread.join()
+
+        self.assertEqual(statuses, ["postprocessing"])
+        self.assertEqual(download.info.status, "finished")
+
+    async def test_download_canceled_while_waiting_for_a_worker_is_not_run(self):
+        download = _make_test_download()
+        pool = _InlinePool()
+
+        async def acquire():
+            download.canceled = True
+            return "worker"
+
+        pool.acquire = acquire
+        pool.submit = MagicMock()
+
+        await download.start(MagicMock(), None, pool)
+
+        pool.submit.assert_not_called()
+        self.assertEqual(pool.released, ["worker"])
+
+    def test_pickled_download_leaves_server_state_behind(self):
+        download = _make_test_download()
+        download.loop = asyncio.new_event_loop()
+        download.notifier = MagicMock()
+        try:
+            clone = pickle.loads(pickle.dumps(download))
+        finally:
+            download.loop.close()
+
+        self.assertIsNone(clone.loop)
+        self.assertIsNone(clone.notifier)
+        self.assertEqual(clone.info.url, download.info.url)
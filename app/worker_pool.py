@@ -0,0 +1,162 @@
+import asyncio
+import collections
+import logging
+import multiprocessing
+import multiprocessing.reduction
+import os
+
+log = logging.getLogger('worker_pool')
+
+
+def available() -> bool:
+    """Whether this platform can run a pool: it needs a forkserver and file
+    descriptor passing over Unix sockets."""
+    return 'forkserver' in multiprocessing.get_all_start_methods() and hasattr(os, 'setpgrp')
+
+
+def _worker_main(conn, max_jobs, log_level):
+    logging.basicConfig(level=log_level)
+    # Lead our own process group, like a per-download process does, so
+    # cancelling a job can signal it together with the ffmpeg children it
+    # started. That ends the worker too; the pool starts a fresh one.
+    try:
+        os.setpgrp()
+    except OSError:
+        pass
+    for _ in range(max_jobs):
+        try:
+            target, nfds = conn.recv()
+            fds = [multiprocessing.reduction.recv_handle(conn) for _ in range(nfds)]
+        except EOFError:
+            return
+        for fd in fds:
+            os.set_inheritable(fd, False)
+        try:
+            target(*fds)
+            # Sent before the pipe closes, so the server has it by the time it
+            # sees the job end. A worker that died mid-job never sends it.
+            conn.send(None)
+        finally:
+            # Closing our end of the status pipe is what tells the server the
+            # job is over.
+            for fd in fds:
+                os.close(fd)
+
+
+class _Worker:
+    __slots__ = ('proc', 'conn', 'jobs', 'busy')
+
+    def __init__(self, proc, conn):
+        self.proc = proc
+        self.conn = conn
+        self.jobs = 0
+        self.busy = False
+
+
+class PooledProcess:
+    """Stands in for the ``multiprocessing.Process`` of a job run by a pool
+    worker: enough of its interface to signal the job and check whether it is
+    still running. ``close`` hands the worker back to the pool."""
+
+    def __init__(self, pool, worker):
+        self._pool = pool
+        self._worker = worker
+        self.done = False
+
+    @property
+    def pid(self):
+        return self._worker.proc.pid
+
+    def is_alive(self):
+        return not self.done and self._worker.proc.is_alive()
+
+    def kill(self):
+        self._worker.proc.kill()
+
+    def close(self):
+        if not self.done:
+            self.done = True
+            self._pool.release(self._worker)
+
+
+class WorkerPool:
+    """Long-lived processes that each run one job at a time.
+
+    Workers are forked from multiprocessing's forkserver, a slim process that
+    has imported only the *preload* modules, rather than from the server, so
+    they do not carry copies of the web server and the in-memory queues. A job
+    is a picklable callable, called in the worker with the file descriptors it
+    was submitted with, the first being the write end of a status pipe; the
+    job is over when the worker closes it. Workers are
+    replaced after *max_jobs* jobs, which bounds whatever state or memory a
+    job leaks, and whenever one dies.
+    """
+
+    def __init__(self, size: int, max_jobs: int, preload=()):
+        self.size = size
+        self.max_jobs = max_jobs
+        self._ctx = multiprocessing.get_context('forkserver')
+        if preload:
+            self._ctx.set_forkserver_preload(list(preload))
+        self._idle: collections.deque[_Worker] = collections.deque()
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_jobs, logging.getLogger().getEffectiveLevel()),
+            name='download-worker',
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        return _Worker(proc, parent_conn)
+
+    def start(self):
+        """Start the forkserver and fill the pool. Blocks while the forkserver
+        imports the preload modules, so run it off the event loop."""
+        while len(self._idle) < self.size:
+            self._idle.append(self._spawn())
+        log.info(f"Started {self.size} download worker(s)")
+
+    async def acquire(self) -> _Worker:
+        while self._idle:
+            worker = self._idle.popleft()
+            if worker.proc.is_alive():
+                return worker
+            self._retire(worker)
+        return await asyncio.get_running_loop().run_in_executor(None, self._spawn)
+
+    def submit(self, worker: _Worker, target, status_fd: int, *fds: int) -> PooledProcess:
+        worker.conn.send((target, 1 + len(fds)))
+        for fd in (status_fd, *fds):
+            multiprocessing.reduction.send_handle(worker.conn, fd, worker.proc.pid)
+        worker.jobs += 1
+        worker.busy = True
+        return PooledProcess(self, worker)
+
+    def release(self, worker: _Worker):
+        reusable = self._finished_job(worker) if worker.busy else worker.proc.is_alive()
+        worker.busy = False
+        if reusable and worker.jobs < self.max_jobs and len(self._idle) < self.size:
+            self._idle.append(worker)
+        else:
+            self._retire(worker)
+
+    @staticmethod
+    def _finished_job(worker: _Worker) -> bool:
+        # Right after a kill the worker can still look alive until the
+        # forkserver reaps it, so trust only its acknowledgement of the job.
+        try:
+            return worker.conn.poll() and worker.conn.recv() is None
+        except (EOFError, OSError):
+            return False
+
+    def _retire(self, worker: _Worker):
+        # A worker that is still running sees EOF on its connection and exits;
+        # the forkserver, its parent, reaps it.
+        worker.conn.close()
+
+    def close(self):
+        while self._idle:
+            self._retire(self._idle.popleft())
@@ -4,17 +4,22 @@ import yt_dlp
 import collections
 import collections.abc
 import copy
+import itertools
 import pickle
 from collections import OrderedDict
 import time
 import asyncio
 import multiprocessing
+import multiprocessing.reduction
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 import logging
 import re
+import select
 import signal
+import struct
 import sys
+import threading
 import types
 from typing import Any, Optional
 
@@ -25,8 +30,21 @@ import bg_tasks
 from dl_formats import get_format, get_opts, AUDIO_FORMATS, merge_ytdl_option_layers
 from music_metadata import MusicMetadataPreProcessor
 from datetime import datetime
-from state_store import AtomicJsonStore, from_json_compatible, read_legacy_shelf, to_json_compatible
+from state_store import (
+    SQLITE_STATE_FILE,
+    AtomicJsonStore,
+    JournaledJsonStore,
+    SqliteStateStore,
+    from_json_compatible,
+    read_legacy_shelf,
+    to_json_compatible,
+)
+from extract_cache import ExtractionCache
+from scheduler import AdaptiveConcurrency, BandwidthBudget, DownloadScheduler, SlotPool
 from subscriptions import _entry_id
+import executors
+import extraction
+import worker_pool
 from url_guard import validate_url, install_socket_guard
 from urllib.parse import urlsplit
 
@@ -132,6 +150,13 @@ _MP_CTX = (
 # e.g. when cancelling a livestream) and SIGKILL escalation.
 _CANCEL_GRACE_SECONDS = 15
 
+# The adaptive concurrency controller samples aggregate speed every
+# _ADAPTIVE_SAMPLE_SECONDS and revises the limit once per
+# _ADAPTIVE_SAMPLES_PER_DECISION samples, long enough for a new download to get
+# past extraction and show its effect on throughput.
+_ADAPTIVE_SAMPLE_SECONDS = 5
+_ADAPTIVE_SAMPLES_PER_DECISION = 6
+
 _LIVE_CHECK_INTERVAL = 60
 _LIVE_MAX_CHECK_INTERVAL = 3600
 # Consecutive probe failures (network blips, rate limits, transient extractor
@@ -458,6 +483,18 @@ class DownloadQueueNotifier:
     async def cleared(self, id):
         raise NotImplementedError
 
+    async def concurrency_changed(self):
+        raise NotImplementedError
+
+    async def drain_changed(self):
+        raise NotImplementedError
+
+    async def added_bulk(self, dls):
+        raise NotImplementedError
+
+    async def add_progress(self, progress):
+        raise NotImplementedError
+
 class DownloadInfo:
     def __init__(
         self,
@@ -513,13 +550,22 @@ class DownloadInfo:
         self.clip_end = clip_end
         self.live_status = live_status
         self.live_release_timestamp = live_release_timestamp
+        # Higher starts sooner; equal priorities start in the order queued.
+        self.priority = 0
+        # Temp file and byte offset of a download in progress, kept so that a
+        # restart can continue from the partial data.
+        self.partial = None
+        # When the current run was queued for, started and finished each stage
+        # ('download', then 'postprocess') and how many were waiting ahead of
+        # it. Not persisted; a restart begins a new run.
+        self.stages = {}
         self.subtitle_files = []
 
     # Fields that are useful server-side but must not be broadcast to browser
     # clients: ``entry`` is the full yt-dlp info-dict (potentially large and
     # re-sent on every progress tick) and ``subtitle_files`` is only used
     # internally to derive the primary caption ``filename``.
-    _PUBLIC_EXCLUDED_FIELDS = ("entry", "subtitle_files")
+    _PUBLIC_EXCLUDED_FIELDS = ("entry", "subtitle_files", "partial")
 
     def to_public_dict(self) -> dict:
         """Return the client-facing view, omitting server-only/bulky fields."""
@@ -605,6 +651,12 @@ class DownloadInfo:
             self.live_status = None
         if not hasattr(self, "live_release_timestamp"):
             self.live_release_timestamp = None
+        if not hasattr(self, "priority"):
+            self.priority = 0
+        if not hasattr(self, "partial"):
+            self.partial = None
+        if not hasattr(self, "stages"):
+            self.stages = {}
 
 
 _PERSISTED_DOWNLOAD_FIELDS = (
@@ -629,6 +681,8 @@ _PERSISTED_DOWNLOAD_FIELDS = (
     "clip_end",
     "live_status",
     "live_release_timestamp",
+    "priority",
+    "partial",
     "status",
     "timestamp",
     "error",
@@ -639,6 +693,17 @@ _PERSISTED_DOWNLOAD_FIELDS = (
 )
 
 
+def _entry_error(entry: dict) -> Optional[str]:
+    """The error a new download starts out with: when an upcoming live stream
+    begins, or the message yt-dlp left on the entry."""
+    if "live_status" in entry and "release_timestamp" in entry and entry.get("live_status") == "is_upcoming":
+        # astimezone() makes this an aware datetime in the server's local
+        # zone; a naive datetime's %z renders as an empty string.
+        dt_ts = datetime.fromtimestamp(entry.get("release_timestamp")).astimezone().strftime('%Y-%m-%d %H:%M:%S %z')
+        return f"Live stream is scheduled to start at {dt_ts}"
+    return entry.get("msg")
+
+
 def _short_title_for_failed_url(url: str) -> str:
     """A concise display title for a URL that failed before yt-dlp could extract a
     real title (unsupported URL, SSRF-rejected, extraction error). The full URL
@@ -701,15 +766,117 @@ def _download_info_from_record(record: dict[str, Any]) -> DownloadInfo:
         info.error = None
     return info
 
-class Download:
-    manager = None
+class _StatusPipe:
+    """Write end of the pipe a download process reports its status over.
+
+    Each status is pickled into a frame with a 4-byte big-endian length prefix;
+    the server reads the frames straight off the read end with an asyncio
+    stream. yt-dlp may call the progress hooks from several fragment threads,
+    so writes are serialized: a frame over PIPE_BUF is not written atomically.
+    """
+
+    HEADER = struct.Struct('!I')
+
+    def __init__(self, fd):
+        self.fd = fd
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # Only pickled when the child is spawned rather than forked; DupFd
+        # hands the descriptor over to the new process.
+        return _StatusPipe._rebuild, (multiprocessing.reduction.DupFd(self.fd),)
+
+    @staticmethod
+    def _rebuild(dup_fd):
+        return _StatusPipe(dup_fd.detach())
 
     @classmethod
-    def shutdown_manager(cls):
-        if cls.manager is not None:
-            cls.manager.shutdown()
-            cls.manager = None
+    def encode(cls, status):
+        payload = pickle.dumps(status, protocol=pickle.HIGHEST_PROTOCOL)
+        return cls.HEADER.pack(len(payload)) + payload
 
+    @classmethod
+    async def read(cls, reader: asyncio.StreamReader):
+        """Return the next status from *reader*, or None once every writer has
+        closed the pipe (a frame cut short by a killed process included)."""
+        try:
+            header = await reader.readexactly(cls.HEADER.size)
+            payload = await reader.readexactly(cls.HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            return None
+        return pickle.loads(payload)
+
+    def put(self, status):
+        frame = memoryview(self.encode(status))
+        with self._lock:
+            while frame:
+                frame = frame[os.write(self.fd, frame):]
+
+
+class _ControlPipe:
+    """Read end of the pipe the server steers a running download through.
+
+    Each message is a kind byte and an 8-byte big-endian double. RATE_LIMIT
+    carries the download's share of the bandwidth budget in bytes per second
+    (0 for no limit); POSTPROCESS grants it a post-processing slot. The pipe is
+    non-blocking: the child polls it from its progress hook, so a new share
+    takes effect on the next block downloaded, and only blocks on it while
+    waiting for its post-processing slot.
+    """
+
+    FRAME = struct.Struct('!Bd')
+    RATE_LIMIT = 0
+    POSTPROCESS = 1
+
+    def __init__(self, fd, rate=None):
+        self.fd = fd
+        self.rate = rate
+        self.postprocess_granted = False
+        self.closed = False
+        self._partial = b''
+
+    def __reduce__(self):
+        return _ControlPipe._rebuild, (multiprocessing.reduction.DupFd(self.fd), self.rate)
+
+    @staticmethod
+    def _rebuild(dup_fd, rate):
+        return _ControlPipe(dup_fd.detach(), rate)
+
+    @classmethod
+    def encode(cls, kind, value=None):
+        return cls.FRAME.pack(kind, value or 0)
+
+    def poll(self):
+        """Apply every message sent so far and return the current share,
+        None for no limit."""
+        data = self._partial
+        while True:
+            try:
+                chunk = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            if not chunk:
+                self.closed = True
+                break
+            data += chunk
+        usable = len(data) - len(data) % self.FRAME.size
+        for kind, value in self.FRAME.iter_unpack(data[:usable]):
+            if kind == self.RATE_LIMIT:
+                self.rate = value or None
+            elif kind == self.POSTPROCESS:
+                self.postprocess_granted = True
+        self._partial = data[usable:]
+        return self.rate
+
+    def wait_for_postprocess(self):
+        """Block until the server grants a post-processing slot, or is gone."""
+        self.poll()
+        while not self.postprocess_granted and not self.closed:
+            select.select([self.fd], [], [])
+            self.poll()
+
+
+class Download:
     def __init__(self, download_dir, temp_dir, output_template, output_template_chapter, quality, format, ytdl_opts, info, allow_private=False):
         self.download_dir = download_dir
         self.temp_dir = temp_dir
@@ -735,13 +902,33 @@ class Download:
         if "impersonate" in self.ytdl_opts:
             self.ytdl_opts["impersonate"] = yt_dlp.networking.impersonate.ImpersonateTarget.from_str(self.ytdl_opts["impersonate"])
         self.canceled = False
+        self.paused = False
         self.tmpfilename = None
         self.status_queue = None
+        self._status_reader = None
+        self._status_transport = None
+        # Share of the bandwidth budget in bytes per second, None for no
+        # limit. control carries updates to the running child.
+        self.rate_limit = None
+        self.control = None
+        self._control_fd = None
+        # Awaited once the child has its bytes on disk and is ready to
+        # post-process; set by the queue.
+        self.on_postprocess = None
+        self._postprocess_task = None
         self.proc = None
         self.loop = None
         self.notifier = None
         self._executor = None
 
+    # Server-side runtime state. None of it is meaningful in another process,
+    # and the event loop and pipe transport cannot be pickled to a pool worker.
+    _SERVER_ONLY = ('loop', 'notifier', '_executor', 'proc', '_status_reader', '_status_transport', '_control_fd',
+                    'on_postprocess', '_postprocess_task', 'status_task')
+
+    def __getstate__(self):
+        return {k: (None if k in self._SERVER_ONLY else v) for k, v in self.__dict__.items()}
+
     # Minimum interval between forwarded 'downloading' progress ticks. yt-dlp
     # emits these many times per second; without throttling, each active
     # download broadcasts hundreds of socket.io events/sec to every client.
@@ -771,6 +958,40 @@ class Download:
 
         return put_status
 
+    def _make_rate_limit_hook(self, ydl):
+        # The share caps any ratelimit set through YTDL_OPTIONS; it never
+        # raises it. yt-dlp reads params['ratelimit'] for every block of a
+        # plain HTTP download; fragmented downloads take it when they start.
+        configured = ydl.params.get('ratelimit')
+
+        def apply_rate_limit(_status=None):
+            limits = [rate for rate in (configured, self.control.poll()) if rate]
+            ydl.params['ratelimit'] = min(limits) if limits else None
+
+        return apply_rate_limit
+
+    def _make_postprocess_gate(self):
+        # Post-processing waits for a slot of its own, so that the network
+        # slot goes to the next download as soon as the bytes are on disk.
+        # The gate is at the first postprocessor to start after a file
+        # finished downloading; pre-processing runs before any has, and is
+        # not held up.
+        downloaded = passed = False
+
+        def on_progress(st):
+            nonlocal downloaded
+            if st.get('status') == 'finished':
+                downloaded = True
+
+        def on_postprocessor(d):
+            nonlocal passed
+            if d.get('status') == 'started' and downloaded and not passed:
+                passed = True
+                self.status_queue.put({'status': 'postprocessing'})
+                self.control.wait_for_postprocess()
+
+        return on_progress, on_postprocessor
+
     def _make_youtube_dl(self, params):
         ydl = _ConfinedYoutubeDL(
             params=params,
@@ -903,7 +1124,15 @@ class Download:
                     [(start, end)],
                 )
 
-            ret = self._make_youtube_dl(ytdl_params).download([self.info.url])
+            ydl = self._make_youtube_dl(ytdl_params)
+            if self.control is not None:
+                apply_rate_limit = self._make_rate_limit_hook(ydl)
+                apply_rate_limit()
+                ydl.add_progress_hook(apply_rate_limit)
+                on_progress, on_postprocessor = self._make_postprocess_gate()
+                ydl.add_progress_hook(on_progress)
+                ydl.add_postprocessor_hook(on_postprocessor)
+            ret = ydl.download([self.info.url])
             if ret == 0:
                 self.status_queue.put({'status': 'finished'})
             else:
@@ -914,26 +1143,85 @@ class Download:
             log.error(f"Download error for {self.info.title}: {str(exc)}")
             self.status_queue.put({'status': 'error', 'msg': ytdl_logger.failure_message(str(exc))})
 
-    async def start(self, notifier, executor=None):
+    def _run_in_worker(self, status_fd, control_fd):
+        self.status_queue = _StatusPipe(status_fd)
+        self.control = _ControlPipe(control_fd, self.rate_limit)
+        self._download()
+
+    async def start(self, notifier, executor=None, pool=None):
         log.info(f"Preparing download for: {self.info.title}")
-        if Download.manager is None:
-            Download.manager = _MP_CTX.Manager()
-        self.status_queue = Download.manager.Queue()
-        self.proc = _MP_CTX.Process(target=self._download)
-        self.proc.start()
         self.loop = asyncio.get_running_loop()
+        worker = None
+        if pool is not None:
+            worker = await pool.acquire()
+            if self.canceled or self.paused:
+                pool.release(worker)
+                return
+        read_fd, write_fd = os.pipe()
+        control_read_fd, self._control_fd = os.pipe()
+        os.set_blocking(control_read_fd, False)
+        os.set_blocking(self._control_fd, False)
+        try:
+            if worker is None:
+                self.status_queue = _StatusPipe(write_fd)
+                self.control = _ControlPipe(control_read_fd, self.rate_limit)
+                self.proc = _MP_CTX.Process(target=self._download)
+                self.proc.start()
+            else:
+                self.proc = pool.submit(worker, self._run_in_worker, write_fd, control_read_fd)
+        finally:
+            # The child or worker holds the only write end from here on, so
+            # the reader sees EOF exactly when the download is over.
+            os.close(write_fd)
+            os.close(control_read_fd)
+        self._status_reader = asyncio.StreamReader()
+        self._status_transport, _ = await self.loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(self._status_reader),
+            os.fdopen(read_fd, 'rb', buffering=0),
+        )
         self.notifier = notifier
         self._executor = executor
         self.info.status = 'preparing'
         await self.notifier.updated(self.info)
         self.status_task = asyncio.create_task(self.update_status())
-        await self.loop.run_in_executor(self._executor, self.proc.join)
-        # Signal update_status to stop and wait for it to finish
-        # so that all status updates (including MoveFiles with correct
-        # file size) are processed before _post_download_cleanup runs.
-        if self.status_queue is not None:
-            self.status_queue.put(None)
+        if worker is None:
+            await self._wait_for_exit()
+        # Wait for update_status to read the pipe to EOF so that all status
+        # updates (including MoveFiles with correct file size) are processed
+        # before _post_download_cleanup runs.
         await self.status_task
+        if worker is not None:
+            # The worker closed the pipe: the job is over and it is free.
+            self.proc.close()
+
+    async def _wait_for_exit(self):
+        """Wait for the download process to exit and reap it.
+
+        On Linux a pidfd becomes readable when the process exits, so the event
+        loop itself is told about it and no thread is tied up per download.
+        Elsewhere, or where pidfd_open is unavailable (kernels before 5.3,
+        seccomp profiles that deny it), proc.join runs on the executor.
+        """
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(self.proc.pid)
+            except OSError as exc:
+                log.debug(f"pidfd_open failed, joining in a thread instead: {exc}")
+        if pidfd is None:
+            await self.loop.run_in_executor(self._executor, self.proc.join)
+            return
+        try:
+            exited = self.loop.create_future()
+            self.loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                self.loop.remove_reader(pidfd)
+        finally:
+            os.close(pidfd)
+        # Already exited: this only reaps it and does not block.
+        self.proc.join()
 
     def _signal_group(self, sig):
         """Send *sig* to the download's process group, falling back to the
@@ -968,8 +1256,7 @@ class Download:
             log.info(f"Escalating cancel to SIGKILL for: {self.info.title}")
             self._signal_group(signal.SIGKILL)
 
-    def cancel(self):
-        log.info(f"Cancelling download: {self.info.title}")
+    def interrupt(self):
         if self.running():
             # SIGINT first so yt-dlp/ffmpeg can finalize the partial file
             # (livestream recordings stay playable); SIGKILL after a grace
@@ -979,9 +1266,42 @@ class Download:
                 self.loop.call_later(_CANCEL_GRACE_SECONDS, self._kill_if_alive)
             else:
                 self._kill_if_alive()
+
+    def cancel(self):
+        log.info(f"Cancelling download: {self.info.title}")
+        self.interrupt()
         self.canceled = True
-        if self.status_queue is not None:
-            self.status_queue.put(None)
+
+    def pause(self):
+        """Stop the download process but keep its partial files in the temp
+        directory, so that starting the download again continues from them."""
+        log.info(f"Pausing download: {self.info.title}")
+        self.paused = True
+        self.interrupt()
+
+    def set_rate_limit(self, rate):
+        """Set this download's share of the bandwidth budget, in bytes per
+        second or None for no limit. A running download picks it up on its
+        next progress update."""
+        self.rate_limit = rate
+        self._send_control(_ControlPipe.RATE_LIMIT, rate)
+
+    def _send_control(self, kind, value=None):
+        if self._control_fd is not None:
+            try:
+                os.write(self._control_fd, _ControlPipe.encode(kind, value))
+            except OSError:
+                # The download has exited, or has left the pipe full while
+                # post-processing; it has no use for the message either way.
+                pass
+
+    def _close_pipes(self):
+        if self._status_transport is not None:
+            self._status_transport.close()
+            self._status_transport = None
+        if self._control_fd is not None:
+            os.close(self._control_fd)
+            self._control_fd = None
 
     def close(self):
         log.info(f"Closing download process for: {self.info.title}")
@@ -989,7 +1309,13 @@ class Download:
             if self.started():
                 self.proc.close()
         finally:
+            # A paused download is started again later, and until then it
+            # must not look started: pause and cancel would signal the old,
+            # closed process instead of taking it out of the scheduler.
+            self.proc = None
+            self._close_pipes()
             self.status_queue = None
+            self.control = None
 
     def running(self):
         try:
@@ -1001,21 +1327,51 @@ class Download:
         return self.proc is not None
 
     async def update_status(self):
+        try:
+            await self._consume_statuses()
+        finally:
+            if self._postprocess_task is not None:
+                # Still waiting for a slot when the process ended.
+                self._postprocess_task.cancel()
+                self._postprocess_task = None
+            self._close_pipes()
+
+    async def _start_postprocessing(self):
+        if self.on_postprocess is not None:
+            await self.on_postprocess(self)
+        self._send_control(_ControlPipe.POSTPROCESS)
+
+    def _track_partial(self, tmpfilename, offset):
+        previous = self.info.partial
+        if previous and previous.get('saved') is not None:
+            # First progress since a restart: check that yt-dlp picked up the
+            # partial file rather than starting a new one.
+            if previous['tmpfilename'] == tmpfilename:
+                log.info(f"Continued {self.info.title} from {previous['saved']} bytes of partial data")
+            else:
+                log.warning(f"{self.info.title} did not continue from its partial file "
+                            f"{previous['tmpfilename']}; downloading to {tmpfilename} instead")
+        self.info.partial = {'tmpfilename': tmpfilename, 'offset': offset}
+
+    async def _consume_statuses(self):
         while True:
-            try:
-                status = await self.loop.run_in_executor(self._executor, self.status_queue.get)
-            except RuntimeError:
-                # The download executor was shut down (server shutting down);
-                # stop polling instead of raising a noisy background-task error.
-                log.info(f"Status polling stopped (executor shut down) for: {self.info.title}")
-                return
+            status = await _StatusPipe.read(self._status_reader)
             if status is None:
                 log.info(f"Status update finished for: {self.info.title}")
                 return
-            if self.canceled:
-                log.info(f"Download {self.info.title} is canceled; stopping status updates.")
-                return
+            if self.canceled or self.paused:
+                # Keep draining until the process exits: a full pipe would
+                # block it while it finalizes the partial file after SIGINT.
+                continue
+            if status.get('status') == 'postprocessing':
+                self.info.status = 'postprocessing'
+                self.info.speed = self.info.eta = None
+                self._postprocess_task = asyncio.create_task(self._start_postprocessing())
+                await self.notifier.updated(self.info)
+                continue
             self.tmpfilename = status.get('tmpfilename')
+            if self.tmpfilename and status.get('downloaded_bytes') is not None:
+                self._track_partial(self.tmpfilename, status['downloaded_bytes'])
             if 'filename' in status:
                 fileName = status.get('filename')
                 rel_name = os.path.relpath(fileName, self.download_dir)
@@ -1101,15 +1457,46 @@ class Download:
             log.debug(f"Updating status for {self.info.title}: {status}")
             await self.notifier.updated(self.info)
 
+# Journal mode folds the journal back into the snapshot once it holds more
+# records than the queue has live entries (so replay never does more than twice
+# the work of loading the snapshot), or once it passes a fixed size, whichever
+# comes first. The record floor keeps a near-empty queue from compacting on
+# every other mutation.
+_JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+_JOURNAL_COMPACT_MIN_RECORDS = 256
+
+
+class _Mutation:
+    """A put (``value`` set) or delete (``value`` None) applied in memory but
+    not yet durable, with what it replaced so it can be undone."""
+
+    __slots__ = ("key", "value", "had_old", "old", "future")
+
+    def __init__(self, key, value, had_old, old, future):
+        self.key = key
+        self.value = value
+        self.had_old = had_old
+        self.old = old
+        self.future = future
+
+
 class PersistentQueue:
-    def __init__(self, name, path):
+    def __init__(self, name, path, *, backend="json", commit_delay=0.0, commit_batch=1):
         self.identifier = name
         pdir = os.path.dirname(path)
         if pdir and not os.path.isdir(pdir):
             os.makedirs(pdir, exist_ok=True)
         self.legacy_path = path
         self.path = f"{path}.json"
-        self.store = AtomicJsonStore(self.path, kind=f"persistent_queue:{name}")
+        kind = f"persistent_queue:{name}"
+        # The plain store rewrites the whole file per mutation, which is a
+        # multi-megabyte write for a long completed list. The journaled store
+        # appends one record per mutation and compacts in the background; the
+        # SQLite store updates one row per mutation. With SQLite the JSON
+        # store is only read, once, to import the existing state.
+        self.store = JournaledJsonStore(self.path, kind=kind) if backend == "journal" else AtomicJsonStore(self.path, kind=kind)
+        self.db = SqliteStateStore(os.path.join(pdir or ".", SQLITE_STATE_FILE)) if backend == "sqlite" else None
+        self._compaction: Optional[asyncio.Future] = None
         self.dict = OrderedDict()
         # A state write fsyncs twice (the file and its directory). On a slow or
         # contended filesystem that is seconds, and running it inline in an
@@ -1120,14 +1507,24 @@ class PersistentQueue:
         # its threads for minutes, which is exactly when state writes happen.
         self._store_executor = ThreadPoolExecutor(
             max_workers=1, thread_name_prefix=f"state-{name}")
-        # Guards the mutate-write-rollback section. The write is awaited now, so
-        # without this two callers could interleave between changing self.dict
-        # and persisting it, and a rollback could revert the wrong entry.
-        self._lock = asyncio.Lock()
+        # Group commit: mutations apply to self.dict at once and queue here
+        # until a single flusher task makes them durable, many per write. The
+        # flusher waits up to commit_delay seconds for more to arrive, or until
+        # commit_batch are waiting; mutations made while a write is in flight
+        # always go out together in the next one. Being the only writer, the
+        # flusher also keeps writes in mutation order.
+        self._commit_delay = commit_delay
+        self._commit_batch = max(1, commit_batch)
+        self._uncommitted: list[_Mutation] = []
+        self._batch_full = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        # Counts changes to self.dict, rollbacks included.
+        self.revision = 0
 
     def load(self):
         for k, v in self.saved_items():
             self.dict[k] = Download(None, None, None, None, getattr(v, 'quality', 'best'), getattr(v, 'format', 'any'), {}, v)
+        self.revision += 1
 
     def exists(self, key):
         return key in self.dict
@@ -1164,16 +1561,169 @@ class PersistentQueue:
             for key, download in self.dict.items()
         ]
 
-    async def _save_dict_async(self):
-        # Serialize on the event loop -- it is pure CPU and sub-millisecond --
-        # and hand the finished payload to the writer thread. Serializing in the
-        # thread instead would have it walk live DownloadInfo objects while the
-        # loop mutates them.
+    @property
+    def journaled(self) -> bool:
+        return isinstance(self.store, JournaledJsonStore)
+
+    def _batch_write(self, batch):
+        """Serialize *batch* for the writer thread and return the write to run.
+
+        Runs on the event loop -- it is pure CPU and sub-millisecond -- so the
+        thread never walks live DownloadInfo objects while the loop mutates
+        them. In plain mode the snapshot is taken with nothing else
+        uncommitted, so it holds exactly the mutations in *batch* on top of
+        what is already on disk.
+        """
+        if self.db is not None:
+            latest = {mutation.key: mutation.value for mutation in batch}
+            upserts = [
+                self._db_row(key, _download_info_to_record(
+                    value.info, include_entry=self._should_persist_entry(value.info)))
+                for key, value in latest.items()
+                if value is not None
+            ]
+            deletes = [key for key, value in latest.items() if value is None]
+            return partial(self.db.apply, self.identifier, upserts, deletes)
+        if not self.journaled:
+            return partial(self.store.save, {"items": self._serialize_items()})
+        records = []
+        for mutation in batch:
+            if mutation.value is None:
+                records.append({"op": "delete", "key": mutation.key})
+            else:
+                info = mutation.value.info
+                records.append({
+                    "op": "put",
+                    "key": mutation.key,
+                    "info": _download_info_to_record(
+                        info, include_entry=self._should_persist_entry(info)),
+                })
+        return partial(self.store.append, records)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._uncommitted:
+            if self._commit_delay > 0 and len(self._uncommitted) < self._commit_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self._commit_delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            batch, self._uncommitted = self._uncommitted, []
+            if not batch:
+                continue
+            try:
+                await loop.run_in_executor(self._store_executor, self._batch_write(batch))
+            except Exception as exc:
+                # Whatever was applied after this batch was built on top of it,
+                # so it is undone too, newest first. None of it reached disk:
+                # the state file only ever holds committed mutations.
+                failed, self._uncommitted = batch + self._uncommitted, []
+                self._roll_back(failed, exc)
+                continue
+            for mutation in batch:
+                if not mutation.future.done():
+                    mutation.future.set_result(None)
+            if self.journaled and not self._uncommitted:
+                self._maybe_compact()
+
+    def _roll_back(self, mutations, exc):
+        self.revision += 1
+        for mutation in reversed(mutations):
+            if mutation.had_old:
+                self.dict[mutation.key] = mutation.old
+            else:
+                self.dict.pop(mutation.key, None)
+        for mutation in mutations:
+            if not mutation.future.done():
+                mutation.future.set_exception(exc)
+
+    def _apply(self, key, value):
+        had_old = key in self.dict
+        old = self.dict.get(key)
+        if value is None:
+            del self.dict[key]
+        else:
+            self.dict[key] = value
+        self.revision += 1
+        future = asyncio.get_running_loop().create_future()
+        self._uncommitted.append(_Mutation(key, value, had_old, old, future))
+        if len(self._uncommitted) >= self._commit_batch:
+            self._batch_full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = bg_tasks.create_task(
+                self._flush_loop(), name=f"state_flush_{self.identifier}")
+        return future
+
+    def _maybe_compact(self):
+        if self._compaction is not None and not self._compaction.done():
+            return
+        store = self.store
+        if store.journal_bytes < _JOURNAL_COMPACT_BYTES and (
+            store.journal_records < _JOURNAL_COMPACT_MIN_RECORDS
+            or store.journal_records <= len(self.dict)
+        ):
+            return
+        # Only called with nothing uncommitted, so the snapshot holds exactly
+        # what the journal does. Not awaited: the batch is already durable, and
+        # the single writer thread runs later appends only after the
+        # compaction, which keeps them in the new journal.
         payload = {"items": self._serialize_items()}
-        await asyncio.get_running_loop().run_in_executor(
-            self._store_executor, self.store.save, payload)
+        self._compaction = asyncio.get_running_loop().run_in_executor(
+            self._store_executor, self.store.compact, payload)
+        self._compaction.add_done_callback(self._log_compaction_failure)
+
+    def _log_compaction_failure(self, future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            # The journal is only removed after the snapshot is written, so a
+            # failure here loses nothing; the next mutation tries again.
+            log.warning("PersistentQueue:%s journal compaction failed: %s", self.identifier, exc)
+
+    def _replay_journal(self, items, records):
+        entries = OrderedDict((item["key"], item) for item in items)
+        for record in records:
+            op = record.get("op")
+            key = record.get("key")
+            if not isinstance(key, str):
+                continue
+            if op == "put" and isinstance(record.get("info"), dict):
+                entries[key] = {"key": key, "info": record["info"]}
+            elif op == "delete":
+                entries.pop(key, None)
+        return list(entries.values())
+
+    @staticmethod
+    def _db_row(key, record):
+        return (key, record.get("url"), record.get("status"), record.get("timestamp"), record)
 
     def _load_state_items(self):
+        if self.db is not None:
+            if not self.db.is_imported(self.identifier):
+                # Left in place afterwards: switching STATE_BACKEND back
+                # returns to the state as it was at import.
+                items = self._load_json_items()
+                self.db.import_collection(
+                    self.identifier,
+                    [self._db_row(item["key"], item["info"]) for item in items],
+                )
+            return [{"key": key, "info": info} for key, info in self.db.load(self.identifier)]
+        return self._load_json_items()
+
+    def _load_json_items(self):
+        items = self._load_snapshot_items()
+        # Also checked in plain mode, so switching back from journal mode keeps
+        # whatever had not been compacted yet.
+        journal = self.store if self.journaled else JournaledJsonStore(self.path, kind=self.store.kind)
+        records = journal.load_journal()
+        if records or journal.journal_bytes:
+            items = self._replay_journal(items, records)
+            journal.compact({"items": items})
+        return items
+
+    def _load_snapshot_items(self):
         payload = self.store.load()
         if payload is not None:
             items = payload.get("items")
@@ -1212,55 +1762,123 @@ class PersistentQueue:
         self.store.save({"items": items})
         return items
 
+    def put_nowait(self, value):
+        """Apply a put now; the returned future resolves once it is on disk.
+
+        If the write fails the put is rolled back and the future carries the
+        exception.
+        """
+        return self._apply(value.info.url, value)
+
+    def delete_nowait(self, key):
+        """Apply a delete now; see ``put_nowait``."""
+        if key not in self.dict:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+        return self._apply(key, None)
+
     async def put(self, value):
-        key = value.info.url
-        async with self._lock:
-            old = self.dict.get(key)
-            self.dict[key] = value
-            try:
-                await self._save_dict_async()
-            except Exception:
-                if old is None:
-                    del self.dict[key]
-                else:
-                    self.dict[key] = old
-                raise
+        await self.put_nowait(value)
+
+    async def put_many(self, values):
+        """Put all of *values*. They are applied together, so they reach disk
+        in one write as long as they fit in a commit batch."""
+        await asyncio.gather(*[self.put_nowait(value) for value in values])
+
+    async def flush(self):
+        """Wait until every mutation applied so far is on disk."""
+        if self._flusher is not None and not self._flusher.done():
+            await asyncio.shield(self._flusher)
 
     async def delete(self, key):
-        async with self._lock:
-            if key in self.dict:
-                old = self.dict[key]
-                del self.dict[key]
-                try:
-                    await self._save_dict_async()
-                except Exception:
-                    self.dict[key] = old
-                    raise
+        await self.delete_nowait(key)
 
     def empty(self):
         return not bool(self.dict)
 
     def close(self):
-        # wait=True so a write already in flight reaches disk before the
-        # process exits; there is at most one, and it is the newest state.
+        # Write whatever is still waiting for the flusher behind any write
+        # already in flight, and wait=True so both reach disk before the
+        # process exits.
+        batch, self._uncommitted = self._uncommitted, []
+        pending_write = self._store_executor.submit(self._batch_write(batch)) if batch else None
         self._store_executor.shutdown(wait=True)
+        if self.db is not None:
+            self.db.close()
+        if pending_write is None:
+            return
+        exc = pending_write.exception()
+        if exc is not None:
+            log.error("PersistentQueue:%s could not write state on close: %s", self.identifier, exc)
+        for mutation in batch:
+            if mutation.future.done():
+                continue
+            if exc is None:
+                mutation.future.set_result(None)
+            else:
+                mutation.future.set_exception(exc)
 
 class DownloadQueue:
     def __init__(self, config, notifier):
         self.config = config
         self.notifier = notifier
-        self.queue = PersistentQueue("queue", self.config.STATE_DIR + '/queue')
-        self.done = PersistentQueue("completed", self.config.STATE_DIR + '/completed')
-        self.pending = PersistentQueue("pending", self.config.STATE_DIR + '/pending')
+        state_opts = dict(
+            backend=self.config.STATE_BACKEND,
+            commit_delay=int(self.config.STATE_COMMIT_MAX_DELAY_MS) / 1000,
+            commit_batch=int(self.config.STATE_COMMIT_MAX_BATCH),
+        )
+        self.queue = PersistentQueue("queue", self.config.STATE_DIR + '/queue', **state_opts)
+        self.done = PersistentQueue("completed", self.config.STATE_DIR + '/completed', **state_opts)
+        self.pending = PersistentQueue("pending", self.config.STATE_DIR + '/pending', **state_opts)
         self.active_downloads = set()
-        self.semaphore = asyncio.Semaphore(int(self.config.MAX_CONCURRENT_DOWNLOADS))
-        # Each active download parks two threads for its whole duration
-        # (proc.join + status_queue.get). A dedicated pool keeps those from
-        # starving the default executor, which extract_info/live-probes also use.
-        self._download_executor = ThreadPoolExecutor(
-            max_workers=2 * int(self.config.MAX_CONCURRENT_DOWNLOADS) + 2,
-            thread_name_prefix="dl",
+        # The running downloads still fetching, which share the bandwidth
+        # budget; the rest are post-processing.
+        self._fetching = set()
+        self.scheduler = DownloadScheduler(
+            int(self.config.MAX_CONCURRENT_DOWNLOADS),
+            self.config.MAX_CONCURRENT_DOWNLOADS_PER_HOST,
         )
+        self.adaptive = None
+        if self.config.ADAPTIVE_CONCURRENCY:
+            self.adaptive = AdaptiveConcurrency(
+                int(self.config.ADAPTIVE_CONCURRENCY_MIN),
+                int(self.config.ADAPTIVE_CONCURRENCY_MAX),
+            )
+        self.bandwidth = None
+        if self.config.DOWNLOAD_BANDWIDTH_LIMIT is not None or self.config.DOWNLOAD_BANDWIDTH_SCHEDULE:
+            self.bandwidth = BandwidthBudget(
+                self.config.DOWNLOAD_BANDWIDTH_LIMIT,
+                self.config.DOWNLOAD_BANDWIDTH_SCHEDULE,
+            )
+        self._worker_pool = None
+        workers = int(self.config.DOWNLOAD_WORKERS)
+        if workers > 0:
+            if worker_pool.available():
+                self._worker_pool = worker_pool.WorkerPool(
+                    workers, int(self.config.DOWNLOAD_WORKER_MAX_JOBS), preload=('ytdl',))
+            else:
+                log.warning("DOWNLOAD_WORKERS is set but this platform has no forkserver; "
+                            "forking a process per download instead")
+        # Resubmitting a URL, retrying it or double-clicking Add reuses the
+        # last extraction rather than asking the site again.
+        self.extract_cache = ExtractionCache(
+            int(self.config.EXTRACT_CACHE_TTL),
+            int(self.config.EXTRACT_CACHE_MAX_ENTRIES),
+            int(self.config.EXTRACT_CACHE_MAX_MB) * 1024 * 1024,
+        )
+        # A download gives its MAX_CONCURRENT_DOWNLOADS slot back once its
+        # bytes are on disk and then waits here to be post-processed (merging,
+        # converting, embedding), so CPU-heavy ffmpeg runs neither hold up the
+        # next download nor pile up on the CPUs.
+        self.postprocess_pool = SlotPool(int(self.config.POSTPROCESS_WORKERS) or os.cpu_count() or 1)
+        # Download processes are supervised on the event loop through a pidfd;
+        # only where that is unavailable does each active download park a
+        # thread in proc.join for its whole duration. A dedicated pool keeps
+        # those from starving the default executor, which extract_info and
+        # live-probes also use. Threads are only started when needed.
+        self._download_executor = self._make_download_executor(
+            int(self.config.MAX_CONCURRENT_DOWNLOADS) + self.postprocess_pool.size)
         self.done.load()
         self._add_generation = 0
         self._canceled_urls = set()  # URLs canceled during current playlist add
@@ -1268,6 +1886,35 @@ class DownloadQueue:
         self._scheduled_probe_failures: dict[str, int] = {}
         self._live_monitor_task: Optional[asyncio.Task] = None
         self._live_monitor_wakeup = asyncio.Event()
+        self._closing = False
+        # Epoch time the drain before a restart gives up at; None unless draining.
+        self.drain_deadline = None
+        self._idle = asyncio.Event()
+
+    @staticmethod
+    def _make_download_executor(limit):
+        return ThreadPoolExecutor(max_workers=limit + 2, thread_name_prefix="dl")
+
+    def set_concurrency(self, limit: int):
+        """Change MAX_CONCURRENT_DOWNLOADS without a restart. Running
+        downloads are never interrupted; see DownloadScheduler.set_limit."""
+        if limit == self.scheduler.limit:
+            return
+        log.info(f"Changing download concurrency from {self.scheduler.limit} to {limit}")
+        self.config.MAX_CONCURRENT_DOWNLOADS = str(limit)
+        # Joins already running on the old executor carry on until their
+        # downloads end; shutdown(wait=False) only stops it taking new ones.
+        old_executor = self._download_executor
+        self._download_executor = self._make_download_executor(limit + self.postprocess_pool.size)
+        old_executor.shutdown(wait=False)
+        self.scheduler.set_limit(limit)
+
+    @property
+    def revision(self):
+        """Changes whenever an entry is added to, moved between or removed
+        from the queues. In-place progress updates are not counted; they go
+        through the notifier."""
+        return self.queue.revision + self.done.revision + self.pending.revision
 
     def cancel_add(self):
         self._add_generation += 1
@@ -1304,8 +1951,32 @@ class DownloadQueue:
         return handle in (entry_id, f'@{entry_id}')
 
     async def __import_queue(self):
+        resumed = saved_total = 0
         for k, v in self.queue.saved_items():
+            saved = await self._measure_partial(v)
+            if saved:
+                resumed += 1
+                saved_total += saved
             await self.__add_download(v, True)
+        if resumed:
+            log.info(f"Resuming {resumed} interrupted download(s) from {saved_total} bytes of partial data")
+
+    async def _measure_partial(self, info) -> int:
+        """Size of the partial file a download left behind when the server
+        last stopped, recorded on *info* for the check once it restarts."""
+        partial = getattr(info, 'partial', None)
+        if not partial:
+            return 0
+        try:
+            saved = await executors.run('fs', os.path.getsize, partial['tmpfilename'])
+        except OSError:
+            log.info(f"Partial data for {info.title} is gone; it will be downloaded from the start")
+            info.partial = None
+            return 0
+        partial['saved'] = saved
+        log.info(f"Keeping {saved} bytes of partial data for {info.title} in {partial['tmpfilename']} "
+                 f"(at byte {partial['offset']} when interrupted)")
+        return saved
 
     async def __import_pending(self):
         for k, v in self.pending.saved_items():
@@ -1313,10 +1984,61 @@ class DownloadQueue:
 
     async def initialize(self):
         log.info("Initializing DownloadQueue")
+        if self._worker_pool is not None:
+            bg_tasks.create_task(self._start_worker_pool(), name="start_worker_pool")
+        if self.adaptive is not None:
+            bg_tasks.create_task(self._adaptive_concurrency_loop(), name="adaptive_concurrency")
+        if self.bandwidth is not None and self.bandwidth.schedule:
+            bg_tasks.create_task(self._bandwidth_schedule_loop(), name="bandwidth_schedule")
         self._start_live_monitor()
         bg_tasks.create_task(self.__import_queue(), name="import_queue")
         bg_tasks.create_task(self.__import_pending(), name="import_pending")
 
+    async def _adaptive_concurrency_loop(self) -> None:
+        samples = 0
+        while True:
+            await asyncio.sleep(_ADAPTIVE_SAMPLE_SECONDS)
+            self.adaptive.record_speed(sum(
+                dl.info.speed or 0 for _key, dl in self.queue.items()
+                if dl.info.status == 'downloading'
+            ))
+            samples += 1
+            if samples < _ADAPTIVE_SAMPLES_PER_DECISION:
+                continue
+            samples = 0
+            limit = self.scheduler.limit
+            new_limit = self.adaptive.decide(limit, self.scheduler.running, self.scheduler.waiting)
+            metrics = self.adaptive.last
+            summary = (f"{metrics['decision']}; {metrics['throughput'] / 1e6:.2f} MB/s, "
+                       f"error rate {metrics['error_rate']:.0%}")
+            if new_limit != limit:
+                log.info(f"Adaptive concurrency: {limit} -> {new_limit} ({summary})")
+                self.set_concurrency(new_limit)
+                await self.notifier.concurrency_changed()
+            else:
+                log.debug(f"Adaptive concurrency: {limit} ({summary})")
+
+    async def _bandwidth_schedule_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.bandwidth.seconds_until_change())
+            limit = self.bandwidth.current()
+            log.info("Download bandwidth budget: " + (f"{limit / 1e6:.2f} MB/s" if limit else "unlimited"))
+            self._share_bandwidth()
+
+    def _share_bandwidth(self):
+        if self.bandwidth is None:
+            return
+        share = self.bandwidth.share(len(self._fetching))
+        for download in self._fetching:
+            download.set_rate_limit(share)
+
+    async def _start_worker_pool(self) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._worker_pool.start)
+        except Exception as exc:
+            # Downloads still start workers on demand; just not warm ones.
+            log.error(f"Could not start the download worker pool: {exc}")
+
     def _start_live_monitor(self) -> None:
         if self._live_monitor_task is not None and not self._live_monitor_task.done():
             return
@@ -1395,14 +2117,11 @@ class DownloadQueue:
             return
 
         try:
-            entry = await asyncio.get_running_loop().run_in_executor(
-                None,
-                partial(
-                    self.__extract_info,
-                    url,
-                    getattr(info, 'ytdl_options_presets', None),
-                    getattr(info, 'ytdl_options_overrides', {}) or {},
-                ),
+            entry = await self.__extract(
+                'background',
+                url,
+                getattr(info, 'ytdl_options_presets', None),
+                getattr(info, 'ytdl_options_overrides', {}) or {},
             )
         except Exception as exc:
             # Treat all probe failures (transient network blips, rate limits,
@@ -1454,38 +2173,119 @@ class DownloadQueue:
         info.error = None
         info.msg = None
         await self.notifier.updated(info)
-        bg_tasks.create_task(self.__start_download(download), name="start_download")
+        await self.__start_download(download)
 
     async def _schedule_upcoming_download(self, download: Download) -> None:
         download.info.status = 'scheduled'
         await self.queue.put(download)
         self._register_scheduled(download)
 
-    def _force_start_scheduled(self, download: Download) -> None:
+    async def _force_start_scheduled(self, download: Download) -> None:
         self._unregister_scheduled(download.info.url)
         download.info.status = 'pending'
         download.info.error = None
         download.info.msg = None
-        bg_tasks.create_task(self.__start_download(download), name="start_download")
+        await self.__start_download(download)
 
     async def __start_download(self, download):
+        """Hand a queued download to the scheduler. It waits there as a heap
+        entry, not a task, and is started when a slot frees up for it."""
         if download.canceled:
             log.info(f"Download {download.info.title} was canceled, skipping start.")
             return
-        async with self.semaphore:
+        entry = getattr(download.info, 'entry', None) or {}
+        host_key = self.scheduler.key_for(
+            download.info.url, entry.get('extractor_key') or entry.get('ie_key'))
+        download.info.stages = {'download': {'queued_at': time.time(), 'queue_depth': self.scheduler.waiting}}
+        self.scheduler.submit(
+            host_key,
+            partial(self.__dispatch, download, host_key),
+            download.info.priority,
+            download.info.url,
+        )
+
+    def __dispatch(self, download, host_key):
+        bg_tasks.create_task(self.__run_download(download, host_key), name="run_download")
+
+    async def __run_download(self, download, host_key):
+        stages = download.info.stages
+        network_done = False
+        postprocessing = False
+
+        def end_network_stage():
+            # Once, when the bytes are on disk or the download ends early.
+            nonlocal network_done
+            if network_done:
+                return
+            network_done = True
+            if 'started_at' in stages.get('download', {}):
+                stages['download']['ended_at'] = time.time()
+            self._fetching.discard(download)
+            self._share_bandwidth()
+            self.scheduler.release(host_key)
+
+        async def enter_postprocess(_download):
+            nonlocal postprocessing
+            end_network_stage()
+            stages['postprocess'] = {'queued_at': time.time(), 'queue_depth': self.postprocess_pool.waiting}
+            await self.postprocess_pool.acquire()
+            postprocessing = True
+            stages['postprocess']['started_at'] = time.time()
+
+        try:
             if download.canceled:
                 log.info(f"Download {download.info.title} was canceled, skipping start.")
                 return
-            await download.start(self.notifier, self._download_executor)
+            if download.paused:
+                return
+            stages.setdefault('download', {})['started_at'] = time.time()
+            download.on_postprocess = enter_postprocess
+            self.active_downloads.add(download)
+            self._fetching.add(download)
+            self._share_bandwidth()
+            await download.start(self.notifier, self._download_executor, self._worker_pool)
             await self._post_download_cleanup(download)
+        finally:
+            end_network_stage()
+            if postprocessing:
+                self.postprocess_pool.release()
+                stages['postprocess']['ended_at'] = time.time()
+            if download in self.active_downloads:
+                self.active_downloads.discard(download)
+                if not self.active_downloads:
+                    self._idle.set()
+            if self.drain_deadline is not None:
+                await self.notifier.drain_changed()
+
+    @staticmethod
+    def _remove_partial_file(download):
+        tmpfilename = download.tmpfilename or (download.info.partial or {}).get('tmpfilename')
+        download.info.partial = None
+        if tmpfilename and os.path.isfile(tmpfilename):
+            try:
+                os.remove(tmpfilename)
+            except OSError:
+                pass
+
+    async def _mark_paused(self, download):
+        download.info.status = 'paused'
+        download.info.speed = None
+        download.info.eta = None
+        await self.queue.put(download)
+        await self.notifier.updated(download.info)
 
     async def _post_download_cleanup(self, download):
+        if self._closing:
+            # Interrupted by close(): the queue entry and the partial file
+            # stay for the next start to continue from.
+            return
+        if download.paused and not download.canceled and download.info.status != 'finished':
+            # The partial files stay where they are for resume() to pick up.
+            download.close()
+            await self._mark_paused(download)
+            return
         if download.info.status != 'finished':
-            if download.tmpfilename and os.path.isfile(download.tmpfilename):
-                try:
-                    os.remove(download.tmpfilename)
-                except OSError:
-                    pass
+            self._remove_partial_file(download)
             download.info.status = 'error'
             # A progress tick may have set filename to a temp-directory
             # relative path before the error occurred; clear it so the UI
@@ -1497,6 +2297,9 @@ class DownloadQueue:
             if not (download.info.download_type == 'captions' and has_captured_subtitles):
                 download.info.filename = None
                 download.info.size = None
+        download.info.partial = None
+        if self.adaptive is not None and not download.canceled:
+            self.adaptive.record_result(download.info.status == 'finished')
         download.close()
         if self.queue.exists(download.info.url):
             await self.queue.delete(download.info.url)
@@ -1531,12 +2334,53 @@ class DownloadQueue:
         ))
         return opts
 
+    async def __extract_cached(self, url, ytdl_options_presets=None, ytdl_options_overrides=None, refresh=False):
+        """__extract through the extraction cache; *refresh* skips the lookup
+        but still stores the new result. Live probes do not come through
+        here, since whether the stream has started is their point."""
+        key = ExtractionCache.key_for(url, self._build_ytdl_options(ytdl_options_presets, ytdl_options_overrides))
+        if not refresh:
+            entry = self.extract_cache.get(key)
+            if entry is not None:
+                log.debug(f'Using cached extraction of {url}')
+                return entry
+        entry = await self.__extract('extract', url, ytdl_options_presets, ytdl_options_overrides)
+        self.extract_cache.put(key, entry)
+        return entry
+
+    async def __extract(self, pool, url, ytdl_options_presets=None, ytdl_options_overrides=None):
+        """Run __extract_info on the *pool* executor. With EXTRACTION_MODE
+        set to process that is a worker process, which is handed the plain
+        parameters and sends back a compact result."""
+        if executors.get(pool).processes:
+            params = self.__extract_params(ytdl_options_presets, ytdl_options_overrides)
+            return await executors.run(pool, extraction.extract_info, params, url)
+        return await executors.run(pool, self.__extract_info, url, ytdl_options_presets, ytdl_options_overrides)
+
     def __extract_info(self, url, ytdl_options_presets=None, ytdl_options_overrides=None):
-        # NOTE: extraction runs in the main process, so the connect-time socket
-        # guard (installed only in the download subprocess) does not apply here.
-        # The ingress validate_url check guards the submitted URL, but redirects
-        # followed during extraction are not re-validated. See url_guard's module
-        # docstring for why the guard can't be installed process-wide.
+        # NOTE: extraction runs in the main process (or an extraction worker),
+        # so the connect-time socket guard (installed only in the download
+        # subprocess) does not apply here. The ingress validate_url check
+        # guards the submitted URL, but redirects followed during extraction
+        # are not re-validated. See url_guard's module docstring for why the
+        # guard can't be installed process-wide.
+        params = self.__extract_params(ytdl_options_presets, ytdl_options_overrides)
+        ydl = yt_dlp.YoutubeDL(params=params)
+        info = ydl.extract_info(url, download=False, process=False)
+        if not info or info.get('_type') != 'playlist':
+            return info and ydl.process_ie_result(info, download=False)
+        # A playlist is handed back unprocessed, with its entries as a lazy
+        # iterator that fetches each page when it is read: processing would
+        # list the whole feed before returning. __add_entry reads it a chunk
+        # at a time, queuing each chunk before the next page is fetched.
+        # Each entry is processed as it is read, on the same executor thread,
+        # which sanitizes its URL and selects a format for inline videos.
+        requested = yt_dlp.utils.PlaylistEntries(ydl, info).get_requested_items()
+        processed = (ydl.process_ie_result(item, download=False) for _index, item in requested if item)
+        info['entries'] = (item for item in processed if item)
+        return info
+
+    def __extract_params(self, ytdl_options_presets=None, ytdl_options_overrides=None):
         debug_logging = logging.getLogger().isEnabledFor(logging.DEBUG)
         user_opts = self._build_ytdl_options(ytdl_options_presets, ytdl_options_overrides)
         params = {
@@ -1545,6 +2389,7 @@ class DownloadQueue:
             'verbose': debug_logging,
             'no_color': True,
             'extract_flat': True,
+            'lazy_playlist': True,
             'ignore_no_formats_error': True,
             'noplaylist': True,
             'paths': {"home": self.config.DOWNLOAD_DIR, "temp": self.config.TEMP_DIR},
@@ -1560,7 +2405,7 @@ class DownloadQueue:
         imp = user_opts.get('impersonate')
         if imp is not None:
             params['impersonate'] = yt_dlp.networking.impersonate.ImpersonateTarget.from_str(imp)
-        return yt_dlp.YoutubeDL(params=params).extract_info(url, download=False)
+        return params
 
     def __calc_download_path(self, download_type, folder):
         base_directory = self.config.AUDIO_DOWNLOAD_DIR if download_type == 'audio' else self.config.DOWNLOAD_DIR
@@ -1579,12 +2424,8 @@ class DownloadQueue:
             dldirectory = base_directory
         return dldirectory, None
 
-    async def __add_download(self, dl, auto_start):
-        dldirectory, error_message = self.__calc_download_path(dl.download_type, dl.folder)
-        if error_message is not None:
-            return error_message
+    def __output_template(self, dl):
         output = self.config.OUTPUT_TEMPLATE if len(dl.custom_name_prefix) == 0 else f'{dl.custom_name_prefix}.{self.config.OUTPUT_TEMPLATE}'
-        output_chapter = self.config.OUTPUT_TEMPLATE_CHAPTER
         entry = getattr(dl, 'entry', None)
         if entry is not None and entry.get('playlist_index') is not None:
             if len(self.config.OUTPUT_TEMPLATE_PLAYLIST):
@@ -1596,6 +2437,15 @@ class DownloadQueue:
                 output = self.config.OUTPUT_TEMPLATE_CHANNEL
             sanitized = {k: _sanitize_path_component(v) for k, v in entry.items()}
             output = _resolve_outtmpl_fields(output, sanitized, ('channel',))
+        return output
+
+    def __prepare_download(self, dl):
+        """The Download for *dl*, or the error that stops it being queued."""
+        dldirectory, error_message = self.__calc_download_path(dl.download_type, dl.folder)
+        if error_message is not None:
+            return None, error_message
+        output = self.__output_template(dl)
+        output_chapter = self.config.OUTPUT_TEMPLATE_CHAPTER
         ytdl_options = self._build_ytdl_options(
             getattr(dl, 'ytdl_options_presets', None),
             getattr(dl, 'ytdl_options_overrides', {}) or {},
@@ -1605,16 +2455,28 @@ class DownloadQueue:
             log.info(f'playlist limit is set. Processing only first {playlist_item_limit} entries')
             ytdl_options['playlistend'] = playlist_item_limit
         download = Download(dldirectory, self.config.TEMP_DIR, output, output_chapter, dl.quality, dl.format, ytdl_options, dl, allow_private=self.config.ALLOW_PRIVATE_ADDRESSES)
-        is_upcoming = (
+        return download, None
+
+    @staticmethod
+    def __is_upcoming(dl):
+        return (
             getattr(dl, 'live_status', None) == 'is_upcoming'
             or getattr(dl, 'status', None) == 'scheduled'
         )
+
+    async def __add_download(self, dl, auto_start):
+        download, error_message = self.__prepare_download(dl)
+        if error_message is not None:
+            return error_message
         if auto_start is True:
-            if is_upcoming:
+            if self.__is_upcoming(dl):
                 await self._schedule_upcoming_download(download)
+            elif getattr(dl, 'status', None) == 'paused':
+                download.paused = True
+                await self.queue.put(download)
             else:
                 await self.queue.put(download)
-                bg_tasks.create_task(self.__start_download(download), name="start_download")
+                await self.__start_download(download)
         else:
             await self.pending.put(download)
         await self.notifier.added(dl)
@@ -1683,12 +2545,10 @@ class DownloadQueue:
     async def __write_feed_metadata(self, entry, etype, download_type, folder,
                                     ytdl_options_presets, ytdl_options_overrides):
         try:
-            await asyncio.get_running_loop().run_in_executor(
-                None,
-                partial(
-                    self.__write_feed_metadata_sync, entry, etype, download_type, folder,
-                    ytdl_options_presets, ytdl_options_overrides,
-                ),
+            await executors.run(
+                'fs',
+                self.__write_feed_metadata_sync, entry, etype, download_type, folder,
+                ytdl_options_presets, ytdl_options_overrides,
             )
         except Exception as exc:
             # Supplemental output must never fail the add.
@@ -1717,20 +2577,11 @@ class DownloadQueue:
         _add_gen=None,
         retry_entry=None,
         sponsorblock=False,
+        refresh=False,
     ):
         if not entry:
             return {'status': 'error', 'msg': "Invalid/empty data was given."}
 
-        error = None
-        if "live_status" in entry and "release_timestamp" in entry and entry.get("live_status") == "is_upcoming":
-            # astimezone() makes this an aware datetime in the server's local
-            # zone; a naive datetime's %z renders as an empty string.
-            dt_ts = datetime.fromtimestamp(entry.get("release_timestamp")).astimezone().strftime('%Y-%m-%d %H:%M:%S %z')
-            error = f"Live stream is scheduled to start at {dt_ts}"
-        else:
-            if "msg" in entry:
-                error = entry["msg"]
-
         etype = entry.get('_type') or 'video'
 
         if etype.startswith('url'):
@@ -1761,76 +2612,121 @@ class DownloadQueue:
                 _add_gen,
                 retry_entry,
                 sponsorblock=sponsorblock,
+                refresh=refresh,
             )
         elif etype == 'playlist' or etype == 'channel':
             if etype == 'playlist' and self.__is_channel_extraction(entry):
                 etype = 'channel'
             log.debug(f'Processing as a {etype}')
             entries = entry['entries']
-            # Convert generator to list if needed (for len() and slicing operations)
-            if isinstance(entries, types.GeneratorType):
-                entries = list(entries)
-            total_entries = len(entries)
-            log.info(f'{etype} detected with {total_entries} entries')
+            # A list is a feed extracted in full. Anything else is a lazy
+            # playlist, read a chunk at a time on the extract pool so each
+            # chunk is queued, and can start, while the next page is fetched.
+            streaming = not isinstance(entries, (list, tuple))
+            total_entries = entry.get('playlist_count') if streaming else len(entries)
+            if total_entries is None:
+                log.info(f'{etype} detected, reading its entries as they arrive')
+            else:
+                log.info(f'{etype} detected with {total_entries} entries')
             await self.__write_feed_metadata(
                 entry, etype, download_type, folder,
                 ytdl_options_presets, ytdl_options_overrides,
             )
-            index_digits = len(str(total_entries))
+            # Until the total is known the index is not padded. Items still
+            # waiting when it is get the padding then; see __backfill_counts.
+            index_digits = len(str(total_entries or 0))
             results = []
+            added_keys = []
             if playlist_item_limit > 0:
                 log.info(f'Item limit is set. Processing only first {playlist_item_limit} entries')
-                entries = entries[:playlist_item_limit]
-            for index, etr in enumerate(entries, start=1):
+            # Entries are added a chunk at a time, each chunk with one state
+            # write and one event. Cancellation is checked between chunks.
+            chunk_size = int(self.config.STATE_COMMIT_MAX_BATCH)
+            entries = iter(entries)
+            count = 0
+            exhausted = False
+            while not exhausted:
                 if _add_gen is not None and self._add_generation != _add_gen:
                     log.info(f'Playlist add canceled after processing {len(already)} entries')
+                    await self.__backfill_counts(etype, added_keys, count)
                     return {'status': 'ok', 'msg': f'Canceled - added {len(already)} items before cancel'}
-                if "id" not in etr:
-                    etr["id"] = _entry_id(etr)
-                etr["_type"] = "video"
-                if etype == 'channel':
-                    etr["channel"] = (
-                        entry.get("channel")
-                        or entry.get("uploader")
-                        or entry.get("title")
-                        or entry.get("id")
-                    )
+                wanted = chunk_size
+                if playlist_item_limit > 0:
+                    wanted = min(wanted, playlist_item_limit - count)
+                    if wanted <= 0:
+                        break
+                if streaming:
+                    try:
+                        batch = await executors.run('extract', list, itertools.islice(entries, wanted))
+                    except yt_dlp.utils.YoutubeDLError as exc:
+                        log.warning(f'Reading the {etype} stopped after {count} entries: {exc}')
+                        results.append({'status': 'error', 'msg': str(exc)})
+                        break
                 else:
-                    etr["playlist"] = entry.get("id") or entry.get("channel_id") or entry.get("channel")
-                etr[f"{etype}_index"] = '{{0:0{0:d}d}}'.format(index_digits).format(index)
-                etr[f"{etype}_count"] = total_entries
-                etr[f"{etype}_autonumber"] = index
-                # n_entries: standard yt-dlp field for total count (used by template engine)
-                # __last_playlist_index: yt-dlp internal field for auto-padding autonumber
-                etr["n_entries"] = total_entries
-                etr["__last_playlist_index"] = total_entries
-                for property in ("id", "title", "uploader", "uploader_id"):
-                    if property in entry:
-                        etr[f"{etype}_{property}"] = entry[property]
-                results.append(
-                    await self.__add_entry(
-                        etr,
-                        download_type,
-                        codec,
-                        format,
-                        quality,
-                        folder,
-                        custom_name_prefix,
-                        playlist_item_limit,
-                        auto_start,
-                        split_by_chapters,
-                        chapter_template,
-                        subtitle_language,
-                        subtitle_mode,
-                        ytdl_options_presets,
-                        ytdl_options_overrides,
-                        clip_start,
-                        clip_end,
-                        already,
-                        _add_gen,
-                        sponsorblock=sponsorblock,
-                    )
+                    batch = list(itertools.islice(entries, wanted))
+                exhausted = len(batch) < wanted
+                for index, etr in enumerate(batch, start=count + 1):
+                    if "id" not in etr:
+                        etr["id"] = _entry_id(etr)
+                    etr["_type"] = "video"
+                    if etype == 'channel':
+                        etr["channel"] = (
+                            entry.get("channel")
+                            or entry.get("uploader")
+                            or entry.get("title")
+                            or entry.get("id")
+                        )
+                    else:
+                        etr["playlist"] = entry.get("id") or entry.get("channel_id") or entry.get("channel")
+                    etr[f"{etype}_index"] = '{{0:0{0:d}d}}'.format(index_digits).format(index)
+                    etr[f"{etype}_count"] = total_entries
+                    etr[f"{etype}_autonumber"] = index
+                    # n_entries: standard yt-dlp field for total count (used by template engine)
+                    # __last_playlist_index: yt-dlp internal field for auto-padding autonumber
+                    etr["n_entries"] = total_entries
+                    etr["__last_playlist_index"] = total_entries
+                    for property in ("id", "title", "uploader", "uploader_id"):
+                        if property in entry:
+                            etr[f"{etype}_{property}"] = entry[property]
+                count += len(batch)
+                chunk_results = await self.__add_entries(
+                    batch,
+                    download_type,
+                    codec,
+                    format,
+                    quality,
+                    folder,
+                    custom_name_prefix,
+                    playlist_item_limit,
+                    auto_start,
+                    split_by_chapters,
+                    chapter_template,
+                    subtitle_language,
+                    subtitle_mode,
+                    ytdl_options_presets,
+                    ytdl_options_overrides,
+                    clip_start,
+                    clip_end,
+                    sponsorblock=sponsorblock,
                 )
+                results.extend(chunk_results)
+                if streaming:
+                    added_keys.extend(
+                        etr.get('webpage_url') or etr['url']
+                        for etr, res in zip(batch, chunk_results)
+                        if res == {'status': 'ok'}
+                    )
+                await self.notifier.add_progress({
+                    'title': entry.get('title') or entry.get('id'),
+                    'added': count,
+                    'total': total_entries,
+                })
+            if streaming:
+                # A feed read to its end has exactly the entries read; one cut
+                # short by the item limit keeps the count it reported, if any.
+                if exhausted or total_entries is None:
+                    total_entries = count
+                await self.__backfill_counts(etype, added_keys, total_entries)
             if any(res['status'] == 'error' for res in results):
                 return {'status': 'error', 'msg': ', '.join(res['msg'] for res in results if res['status'] == 'error' and 'msg' in res)}
             return {'status': 'ok'}
@@ -1846,35 +2742,185 @@ class DownloadQueue:
                 # fresh DownloadInfo built from possibly-different args.
                 title = entry.get('title') or key
                 return {'status': 'ok', 'msg': f'Already in queue: {title}'}
-            dl = DownloadInfo(
-                id=entry['id'],
-                title=entry.get('title') or entry['id'],
-                url=key,
-                quality=quality,
-                download_type=download_type,
-                codec=codec,
-                format=format,
-                folder=folder,
-                custom_name_prefix=custom_name_prefix,
-                error=error,
-                entry=entry,
-                playlist_item_limit=playlist_item_limit,
-                split_by_chapters=split_by_chapters,
-                chapter_template=chapter_template,
-                subtitle_language=subtitle_language,
-                subtitle_mode=subtitle_mode,
-                ytdl_options_presets=ytdl_options_presets,
-                ytdl_options_overrides=ytdl_options_overrides,
-                clip_start=clip_start,
-                clip_end=clip_end,
-                live_status=entry.get('live_status'),
-                live_release_timestamp=entry.get('release_timestamp'),
-                sponsorblock=sponsorblock,
+            dl = self.__download_info(
+                entry,
+                key,
+                download_type,
+                codec,
+                format,
+                quality,
+                folder,
+                custom_name_prefix,
+                playlist_item_limit,
+                split_by_chapters,
+                chapter_template,
+                subtitle_language,
+                subtitle_mode,
+                ytdl_options_presets,
+                ytdl_options_overrides,
+                clip_start,
+                clip_end,
+                sponsorblock,
             )
             await self.__add_download(dl, auto_start)
             return {'status': 'ok'}
         return {'status': 'error', 'msg': f'Unsupported resource "{etype}"'}
 
+    @staticmethod
+    def __download_info(
+        entry,
+        key,
+        download_type,
+        codec,
+        format,
+        quality,
+        folder,
+        custom_name_prefix,
+        playlist_item_limit,
+        split_by_chapters,
+        chapter_template,
+        subtitle_language,
+        subtitle_mode,
+        ytdl_options_presets,
+        ytdl_options_overrides,
+        clip_start,
+        clip_end,
+        sponsorblock,
+    ):
+        return DownloadInfo(
+            id=entry['id'],
+            title=entry.get('title') or entry['id'],
+            url=key,
+            quality=quality,
+            download_type=download_type,
+            codec=codec,
+            format=format,
+            folder=folder,
+            custom_name_prefix=custom_name_prefix,
+            error=_entry_error(entry),
+            entry=entry,
+            playlist_item_limit=playlist_item_limit,
+            split_by_chapters=split_by_chapters,
+            chapter_template=chapter_template,
+            subtitle_language=subtitle_language,
+            subtitle_mode=subtitle_mode,
+            ytdl_options_presets=ytdl_options_presets,
+            ytdl_options_overrides=ytdl_options_overrides,
+            clip_start=clip_start,
+            clip_end=clip_end,
+            live_status=entry.get('live_status'),
+            live_release_timestamp=entry.get('release_timestamp'),
+            sponsorblock=sponsorblock,
+        )
+
+    async def __add_entries(
+        self,
+        entries,
+        download_type,
+        codec,
+        format,
+        quality,
+        folder,
+        custom_name_prefix,
+        playlist_item_limit,
+        auto_start,
+        split_by_chapters,
+        chapter_template,
+        subtitle_language,
+        subtitle_mode,
+        ytdl_options_presets,
+        ytdl_options_overrides,
+        clip_start,
+        clip_end,
+        sponsorblock=False,
+    ):
+        """Add many video entries at once, as __add_entry would one by one,
+        but with one state write per queue and one 'added_bulk' event for
+        the lot. Returns __add_entry's result for each entry, in order."""
+        results = [{'status': 'ok'}] * len(entries)
+        keys = set()
+        new = []
+        for i, entry in enumerate(entries):
+            key = entry.get('webpage_url') or entry.get('url')
+            if not key:
+                results[i] = {'status': 'error', 'msg': f'No URL to download {entry.get("title") or entry["id"]} from'}
+                continue
+            if key in self._canceled_urls:
+                log.info(f'Skipping canceled URL: {entry.get("title") or key}')
+                continue
+            if key in keys or self.queue.exists(key) or self.pending.exists(key):
+                results[i] = {'status': 'ok', 'msg': f'Already in queue: {entry.get("title") or key}'}
+                continue
+            keys.add(key)
+            dl = self.__download_info(
+                entry,
+                key,
+                download_type,
+                codec,
+                format,
+                quality,
+                folder,
+                custom_name_prefix,
+                playlist_item_limit,
+                split_by_chapters,
+                chapter_template,
+                subtitle_language,
+                subtitle_mode,
+                ytdl_options_presets,
+                ytdl_options_overrides,
+                clip_start,
+                clip_end,
+                sponsorblock,
+            )
+            download, error_message = self.__prepare_download(dl)
+            if error_message is not None:
+                results[i] = error_message
+                continue
+            new.append(download)
+        if not new:
+            return results
+
+        queued = []
+        pending = []
+        for download in new:
+            if not auto_start:
+                pending.append(download)
+                continue
+            if self.__is_upcoming(download.info):
+                download.info.status = 'scheduled'
+            queued.append(download)
+        await asyncio.gather(self.queue.put_many(queued), self.pending.put_many(pending))
+        for download in queued:
+            if download.info.status == 'scheduled':
+                self._register_scheduled(download)
+            else:
+                await self.__start_download(download)
+        await self.notifier.added_bulk([download.info for download in new])
+        return results
+
+    async def __backfill_counts(self, etype, keys, total):
+        """Give the items queued from a streamed playlist the total that was
+        not known yet when they were queued, and the index padding that goes
+        with it. An item that has started keeps the file name it started
+        with; the rest are re-resolved against their output template."""
+        index_digits = len(str(total))
+        writes = []
+        for key in keys:
+            queue = self.queue if self.queue.exists(key) else self.pending if self.pending.exists(key) else None
+            if queue is None:
+                continue
+            download = queue.get(key)
+            entry = download.info.entry
+            if not entry or entry.get(f'{etype}_count') == total:
+                continue
+            entry[f'{etype}_index'] = '{{0:0{0:d}d}}'.format(index_digits).format(entry[f'{etype}_autonumber'])
+            entry[f'{etype}_count'] = entry['n_entries'] = entry['__last_playlist_index'] = total
+            if not download.started():
+                download.output_template = self.__output_template(download.info)
+            writes.append(queue.put_nowait(download))
+        if writes:
+            await asyncio.gather(*writes)
+
     async def __record_add_failure(
         self,
         url,
@@ -1951,6 +2997,7 @@ class DownloadQueue:
         _add_gen=None,
         retry_entry=None,
         sponsorblock=False,
+        refresh=False,
     ):
         if ytdl_options_presets is None:
             ytdl_options_presets = []
@@ -1970,9 +3017,9 @@ class DownloadQueue:
             already.add(url)
         # SSRF guard: reject non-http(s) schemes and hosts resolving to
         # internal/loopback/link-local/metadata addresses before yt-dlp fetches
-        # anything. run_in_executor because validate_url may perform a DNS lookup.
-        url_error = await asyncio.get_running_loop().run_in_executor(
-            None, partial(validate_url, url, allow_private=self.config.ALLOW_PRIVATE_ADDRESSES))
+        # anything. Off the loop because validate_url may perform a DNS lookup.
+        url_error = await executors.run(
+            'dns', validate_url, url, allow_private=self.config.ALLOW_PRIVATE_ADDRESSES)
         if url_error is not None:
             log.warning('Rejected URL "%s": %s', url, url_error)
             await self.__record_add_failure(
@@ -1983,10 +3030,7 @@ class DownloadQueue:
             )
             return {'status': 'error', 'msg': url_error}
         try:
-            entry = await asyncio.get_running_loop().run_in_executor(
-                None,
-                partial(self.__extract_info, url, ytdl_options_presets, ytdl_options_overrides),
-            )
+            entry = await self.__extract_cached(url, ytdl_options_presets, ytdl_options_overrides, refresh)
         except yt_dlp.utils.YoutubeDLError as exc:
             msg = str(exc)
             await self.__record_add_failure(
@@ -2021,6 +3065,7 @@ class DownloadQueue:
             _add_gen,
             retry_entry,
             sponsorblock=sponsorblock,
+            refresh=refresh,
         )
 
     async def retry(self, id):
@@ -2108,6 +3153,38 @@ class DownloadQueue:
             sponsorblock=sponsorblock,
         )
 
+    def drain_status(self) -> dict:
+        return {
+            'draining': self.drain_deadline is not None,
+            'deadline': self.drain_deadline,
+            'running': len(self.active_downloads),
+            'waiting': self.scheduler.waiting,
+        }
+
+    async def drain(self, timeout: float) -> bool:
+        """Start no more downloads, wait up to *timeout* seconds for the
+        running ones to finish, then flush the queue state to disk. Returns
+        whether every running download finished in time; any still running
+        are left for close() to interrupt, to be continued after a restart."""
+        self.scheduler.hold()
+        self.drain_deadline = time.time() + timeout
+        log.info(f"Draining: waiting up to {timeout} seconds for {len(self.active_downloads)} running download(s)")
+        await self.notifier.drain_changed()
+        try:
+            await asyncio.wait_for(self._wait_idle(), timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            log.warning(f"Drain deadline passed with {len(self.active_downloads)} download(s) still running")
+            drained = False
+        for queue in (self.queue, self.pending, self.done):
+            await queue.flush()
+        return drained
+
+    async def _wait_idle(self):
+        while self.active_downloads:
+            self._idle.clear()
+            await self._idle.wait()
+
     async def start_pending(self, ids):
         for id in ids:
             if self.pending.exists(id):
@@ -2117,16 +3194,65 @@ class DownloadQueue:
                     await self._schedule_upcoming_download(dl)
                 else:
                     await self.queue.put(dl)
-                    bg_tasks.create_task(self.__start_download(dl), name="start_download")
+                    await self.__start_download(dl)
                 continue
             if self.queue.exists(id):
                 dl = self.queue.get(id)
                 if dl.info.status == 'scheduled':
-                    self._force_start_scheduled(dl)
+                    await self._force_start_scheduled(dl)
                 continue
             log.warning(f'requested start for non-existent download {id}')
         return {'status': 'ok'}
 
+    async def set_priority(self, ids, priority):
+        for id in ids:
+            store = self.queue if self.queue.exists(id) else self.pending if self.pending.exists(id) else None
+            if store is None:
+                log.warning(f'requested priority change for non-existent download {id}')
+                continue
+            dl = store.get(id)
+            dl.info.priority = priority
+            await store.put(dl)
+            self.scheduler.set_priority(id, priority)
+            await self.notifier.updated(dl.info)
+        return {'status': 'ok'}
+
+    async def pause(self, ids):
+        for id in ids:
+            if not self.queue.exists(id):
+                log.warning(f'requested pause for non-existent download {id}')
+                continue
+            dl = self.queue.get(id)
+            if dl.info.status in ('paused', 'scheduled') or dl.paused:
+                continue
+            if dl.info.status == 'postprocessing':
+                # Set as soon as the bytes are on disk, including while the
+                # download waits for a post-processing slot. Interrupting it
+                # now would leave the partial files merged or renamed, so
+                # resuming could only start over.
+                log.info(f'Not pausing {dl.info.title}: it is already post-processing')
+                continue
+            if dl.started():
+                dl.pause()
+            else:
+                dl.paused = True
+                self.scheduler.discard(id)
+                await self._mark_paused(dl)
+        return {'status': 'ok'}
+
+    async def resume(self, ids):
+        for id in ids:
+            if not self.queue.exists(id) or self.queue.get(id).info.status != 'paused':
+                log.warning(f'requested resume for download {id} that is not paused')
+                continue
+            dl = self.queue.get(id)
+            dl.paused = False
+            dl.info.status = 'pending'
+            await self.queue.put(dl)
+            await self.notifier.updated(dl.info)
+            await self.__start_download(dl)
+        return {'status': 'ok'}
+
     async def cancel(self, ids):
         for id in ids:
             # Track URL so playlist add loop won't re-queue it
@@ -2141,10 +3267,12 @@ class DownloadQueue:
             dl = self.queue.get(id)
             if dl.info.status == 'scheduled':
                 self._unregister_scheduled(id)
-            if dl.started():
+            if dl.started() and dl.info.status != 'paused':
                 dl.cancel()
             else:
                 dl.canceled = True
+                self.scheduler.discard(id)
+                self._remove_partial_file(dl)
                 await self.queue.delete(id)
                 await self.notifier.canceled(id)
         return {'status': 'ok'}
@@ -2193,15 +3321,27 @@ class DownloadQueue:
                 list((k, v.info) for k, v in self.done.items()))
 
     def close(self):
-        # Kill any still-running download subprocesses (and their ffmpeg
+        # Stop any still-running download subprocesses (and their ffmpeg
         # children) before tearing down the executor, so they aren't orphaned
-        # when the server exits. Their queue entries stay persisted and are
-        # re-imported/restarted on next startup.
+        # when the server exits. They are interrupted, not canceled: their
+        # queue entries stay persisted, along with where their partial files
+        # are, and are re-imported on next startup to continue from them.
+        self._closing = True
+        saves = []
         for _key, download in list(self.queue.items()):
             if download.started() and download.running():
-                download.cancel()
+                download.interrupt()
+                if download.info.partial:
+                    saves.append((download, self.queue.put_nowait(download)))
         self._download_executor.shutdown(wait=False, cancel_futures=True)
+        if self._worker_pool is not None:
+            self._worker_pool.close()
         # Unlike the download executor these are drained, not cancelled: a
         # queued write is the newest state and must reach disk before exit.
         for queue in (self.queue, self.pending, self.done):
             queue.close()
+        # The drain above settles these writes; a failed one is reported here,
+        # against its download, rather than as an exception never retrieved.
+        for download, save in saves:
+            if save.done() and save.exception() is not None:
+                log.error(f"Could not save where {download.info.title} left off: {save.exception()}")
@@ -21,6 +21,7 @@ class DownloadsServiceStub {
   ytdlOptionsChanged = new Subject<Record<string, unknown>>();
   updated = new Subject<void>();
   retryCalls: string[] = [];
+  priorityCalls: [string[], number][] = [];
 
   getCookieStatus() {
     return of({ status: 'ok', has_cookies: false });
@@ -47,6 +48,11 @@ class DownloadsServiceStub {
     return of({});
   }
 
+  setPriority(ids: string[], priority: number) {
+    this.priorityCalls.push([ids, priority]);
+    return of({ status: 'ok' as const });
+  }
+
   delById() {
     return of({});
   }
@@ -367,6 +373,17 @@ describe('App', () => {
     expect(downloads.retryCalls).toEqual([download.url]);
   });
 
+  it('moves a queued download above every other one', () => {
+    const fixture = TestBed.createComponent(App);
+    const app = fixture.componentInstance;
+    downloads.queue.set('a', { url: 'a', status: 'pending', priority: 2 });
+    downloads.queue.set('b', { url: 'b', status: 'pending' });
+
+    app.moveToTop('b');
+
+    expect(downloads.priorityCalls).toEqual([[['b'], 3]]);
+  });
+
   it('blocks subscribe with invalid title regex', () => {
     const toasts = TestBed.inject(ToastService);
     const errorSpy = vi.spyOn(toasts, 'error').mockImplementation(() => undefined);
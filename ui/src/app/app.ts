@@ -7,7 +7,7 @@ import { takeUntilDestroyed } from '@angular/core/rxjs-interop';
 import { FontAwesomeModule } from '@fortawesome/angular-fontawesome';
 import { NgbModule, NgbTypeahead } from '@ng-bootstrap/ng-bootstrap';
 import { NgSelectModule } from '@ng-select/ng-select';
-import { faTrashAlt, faCheckCircle, faTimesCircle, faRedoAlt, faSun, faMoon, faCheck, faCircleHalfStroke, faDownload, faExternalLinkAlt, faFileImport, faFileExport, faCopy, faClock, faTachometerAlt, faSortAmountDown, faSortAmountUp, faChevronRight, faChevronDown, faUpload, faPause, faPlay, faShareNodes } from '@fortawesome/free-solid-svg-icons';
+import { faTrashAlt, faCheckCircle, faTimesCircle, faRedoAlt, faSun, faMoon, faCheck, faCircleHalfStroke, faDownload, faExternalLinkAlt, faFileImport, faFileExport, faCopy, faClock, faTachometerAlt, faSortAmountDown, faSortAmountUp, faChevronRight, faChevronDown, faUpload, faPause, faPlay, faShareNodes, faArrowUp } from '@fortawesome/free-solid-svg-icons';
 import { faGithub } from '@fortawesome/free-brands-svg-icons';
 import { CookieService } from 'ngx-cookie-service';
 import { AddDownloadPayload, DownloadsService } from './services/downloads.service';
@@ -32,6 +32,7 @@ import {
   CAPTION_FORMATS,
   THUMBNAIL_FORMATS,
   State,
+  AddProgress,
 } from './interfaces';
 import { EtaPipe, SpeedPipe, FileSizePipe } from './pipes';
 import { SelectAllCheckboxComponent, ItemCheckboxComponent, ToastContainerComponent } from './components/';
@@ -96,6 +97,7 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
   ytdlOptionsOverrides: string;
   ytdlOptionPresetNames: string[] = [];
   addInProgress = false;
+  addProgress: AddProgress | null = null;
   cancelRequested = false;
   subscribeInProgress = false;
   checkIntervalMinutes = 60;
@@ -202,6 +204,7 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
   faPause = faPause;
   faPlay = faPlay;
   faShareNodes = faShareNodes;
+  faArrowUp = faArrowUp;
   subtitleLanguages = [
     { id: 'en', text: 'English' },
     { id: 'ar', text: 'Arabic' },
@@ -327,6 +330,13 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
     });
     this.getConfiguration();
     this.getYtdlOptionsUpdateTime();
+    this.downloads.addProgress.pipe(takeUntilDestroyed(this.destroyRef)).subscribe(progress => {
+      // Entries of a playlist or channel are queued as they are read.
+      if (this.addInProgress) {
+        this.addProgress = progress;
+        this.cdr.markForCheck();
+      }
+    });
     this.getYtdlOptionPresets();
     this.setTheme(this.activeTheme!);
 
@@ -1176,6 +1186,7 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
   private resetAddState() {
     this.addRequestSub = undefined;
     this.addInProgress = false;
+    this.addProgress = null;
     this.cancelRequested = false;
     this.cdr.markForCheck();
   }
@@ -1184,6 +1195,24 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
     this.downloads.startById([id]).subscribe((res) => this.handleActionResult(res, 'Start download failed'));
   }
 
+  pauseDownload(id: string) {
+    this.downloads.pauseById([id]).subscribe((res) => this.handleActionResult(res, 'Pause download failed'));
+  }
+
+  resumeDownload(id: string) {
+    this.downloads.resumeById([id]).subscribe((res) => this.handleActionResult(res, 'Resume download failed'));
+  }
+
+  moveToTop(id: string) {
+    // Higher priorities start sooner; one above every queued download puts
+    // this one first in line without reordering the rest.
+    let top = 0;
+    this.downloads.queue.forEach((download) => {
+      top = Math.max(top, download.priority ?? 0);
+    });
+    this.downloads.setPriority([id], top + 1).subscribe((res) => this.handleActionResult(res, 'Move to top failed'));
+  }
+
   liveCountdownSeconds(download: Download): number | null {
     const ts = download.live_release_timestamp;
     if (ts == null || download.status !== 'scheduled') {
@@ -1697,7 +1726,7 @@ export class App implements AfterViewInit, OnInit, OnDestroy {
       if (download.status === 'downloading') {
         active++;
         speed += download.speed || 0;
-      } else if (download.status === 'preparing') {
+      } else if (download.status === 'preparing' || download.status === 'postprocessing') {
         active++;
       } else if (download.status === 'pending' || download.status === 'scheduled') {
         queued++;
@@ -21,6 +21,7 @@ export interface Download {
   clip_end?: number;
   live_status?: string;
   live_release_timestamp?: number;
+  priority?: number;
   status: string;
   msg: string;
   percent: number;
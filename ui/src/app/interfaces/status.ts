@@ -2,3 +2,9 @@ export interface Status {
   status: string;
   msg?: string;
 }
+
+export interface AddProgress {
+  title: string;
+  added: number;
+  total: number | null;
+}
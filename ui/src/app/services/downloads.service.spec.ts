@@ -140,6 +140,22 @@ describe('DownloadsService', () => {
     req.flush({});
   });
 
+  it('setPriority posts ids and priority', () => {
+    service.setPriority(['a'], 5).subscribe();
+    const req = httpMock.expectOne('priority');
+    expect(req.request.body).toEqual({ ids: ['a'], priority: 5 });
+    req.flush({});
+  });
+
+  it('pauseById and resumeById post ids', () => {
+    service.pauseById(['a']).subscribe();
+    expect(httpMock.expectOne('pause').request.body).toEqual({ ids: ['a'] });
+    service.resumeById(['a']).subscribe();
+    const req = httpMock.expectOne('resume');
+    expect(req.request.body).toEqual({ ids: ['a'] });
+    req.flush({});
+  });
+
   it('delById marks items deleting and posts delete', () => {
     const dl: Download = {
       id: '1',
@@ -290,6 +306,34 @@ describe('DownloadsService', () => {
     expect(updated?.deleting).toBe(true);
   });
 
+  it('socket updated merges a partial update into the existing row', () => {
+    service.queue.set('u1', {
+      id: '1',
+      title: 'Kept title',
+      url: 'u1',
+      download_type: 'video',
+      quality: 'best',
+      format: 'any',
+      folder: 'music',
+      custom_name_prefix: '',
+      playlist_item_limit: 0,
+      status: 'downloading',
+      msg: '',
+      percent: 10,
+      speed: 0,
+      eta: 0,
+      filename: '',
+      checked: true,
+    });
+    socket.emit('updated', JSON.stringify({ url: 'u1', percent: 42, speed: 1000 }));
+    const updated = service.queue.get('u1');
+    expect(updated?.percent).toBe(42);
+    expect(updated?.speed).toBe(1000);
+    expect(updated?.title).toBe('Kept title');
+    expect(updated?.folder).toBe('music');
+    expect(updated?.checked).toBe(true);
+  });
+
   it('socket updated ignores events for urls not already in the queue', () => {
     expect(service.queue.has('unknown-url')).toBe(false);
     socket.emit(
@@ -299,6 +343,55 @@ describe('DownloadsService', () => {
     expect(service.queue.has('unknown-url')).toBe(false);
   });
 
+  it('socket updated_batch applies every known entry and skips unknown ones', () => {
+    for (const url of ['u1', 'u2']) {
+      service.queue.set(url, {
+        id: url,
+        title: 't',
+        url,
+        download_type: 'video',
+        quality: 'best',
+        format: 'any',
+        folder: '',
+        custom_name_prefix: '',
+        playlist_item_limit: 0,
+        status: 'pending',
+        msg: '',
+        percent: 0,
+        speed: 0,
+        eta: 0,
+        filename: '',
+        checked: url === 'u1',
+      });
+    }
+    let refreshes = 0;
+    service.updated.subscribe(() => refreshes++);
+    socket.emit(
+      'updated_batch',
+      JSON.stringify([
+        { url: 'u1', title: 't', status: 'downloading', percent: 10 },
+        { url: 'u2', title: 't', status: 'downloading', percent: 20 },
+        { url: 'gone', title: 't', status: 'downloading' },
+      ]),
+    );
+    expect(service.queue.get('u1')?.percent).toBe(10);
+    expect(service.queue.get('u1')?.checked).toBe(true);
+    expect(service.queue.get('u2')?.percent).toBe(20);
+    expect(service.queue.has('gone')).toBe(false);
+    expect(refreshes).toBe(1);
+  });
+
+  it('socket added_bulk adds every entry with one queue change', () => {
+    let changes = 0;
+    service.queueChanged.subscribe(() => changes++);
+    socket.emit('added_bulk', JSON.stringify([
+      { url: 'u1', title: 'one', status: 'pending' },
+      { url: 'u2', title: 'two', status: 'pending' },
+    ]));
+    expect([...service.queue.keys()]).toEqual(['u1', 'u2']);
+    expect(changes).toBe(1);
+  });
+
   it('socket completed moves entry to done', () => {
     service.queue.set('u1', {
       id: '1',
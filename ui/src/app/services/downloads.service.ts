@@ -3,7 +3,7 @@ import { HttpClient, HttpErrorResponse } from '@angular/common/http';
 import { of, Subject } from 'rxjs';
 import { catchError } from 'rxjs/operators';
 import { MeTubeSocket } from './metube-socket.service';
-import { Download, Status, State } from '../interfaces';
+import { AddProgress, Download, Status, State } from '../interfaces';
 import { takeUntilDestroyed } from '@angular/core/rxjs-interop';
 
 export interface AddDownloadPayload {
@@ -40,6 +40,7 @@ export class DownloadsService {
   customDirsChanged = new Subject<Record<string, string[]>>();
   ytdlOptionsChanged = new Subject<Record<string, unknown>>();
   configurationChanged = new Subject<Record<string, unknown>>();
+  addProgress = new Subject<AddProgress>();
   updated = new Subject<void>();
 
   configuration: Record<string, unknown> = {};
@@ -65,21 +66,30 @@ export class DownloadsService {
       this.queue.set(data.url, data);
       this.queueChanged.next();
     });
+    this.socket.fromEvent('added_bulk')
+    .pipe(takeUntilDestroyed())
+    .subscribe((strdata: string) => {
+      const data: Download[] = JSON.parse(strdata);
+      data.forEach(dl => this.queue.set(dl.url, dl));
+      this.queueChanged.next();
+    });
     this.socket.fromEvent('updated')
     .pipe(takeUntilDestroyed())
     .subscribe((strdata: string) => {
-      const data: Download = JSON.parse(strdata);
-      const dl: Download | undefined  = this.queue.get(data.url);
-      // An 'added' event always precedes legitimate updates. If the row is
-      // gone (canceled/completed already processed), this update is stale —
-      // applying it would resurrect a ghost row until the next full refresh.
-      if (!dl) {
-        return;
+      const data: Partial<Download> & Pick<Download, 'url'> = JSON.parse(strdata);
+      if (this.applyUpdate(data)) {
+        this.updated.next();
+      }
+    });
+    this.socket.fromEvent('updated_batch')
+    .pipe(takeUntilDestroyed())
+    .subscribe((strdata: string) => {
+      const data: (Partial<Download> & Pick<Download, 'url'>)[] = JSON.parse(strdata);
+      // Applied together, so the view refreshes once per batch.
+      const changed = data.map(entry => this.applyUpdate(entry));
+      if (changed.some(Boolean)) {
+        this.updated.next();
       }
-      data.checked = !!dl.checked;
-      data.deleting = !!dl.deleting;
-      this.queue.set(data.url, data);
-      this.updated.next();
     });
     this.socket.fromEvent('completed')
     .pipe(takeUntilDestroyed())
@@ -120,6 +130,12 @@ export class DownloadsService {
       this.customDirs = data;
       this.customDirsChanged.next(data);
     });
+    this.socket.fromEvent('add_progress')
+    .pipe(takeUntilDestroyed())
+    .subscribe((strdata: string) => {
+      const data: AddProgress = JSON.parse(strdata);
+      this.addProgress.next(data);
+    });
     this.socket.fromEvent('ytdl_options_changed')
     .pipe(takeUntilDestroyed())
     .subscribe((strdata: string) => {
@@ -128,6 +144,20 @@ export class DownloadsService {
     });
   }
 
+  private applyUpdate(data: Partial<Download> & Pick<Download, 'url'>): boolean {
+    const dl: Download | undefined  = this.queue.get(data.url);
+    // An 'added' event always precedes legitimate updates. If the row is
+    // gone (canceled/completed already processed), this update is stale —
+    // applying it would resurrect a ghost row until the next full refresh.
+    if (!dl) {
+      return false;
+    }
+    // Updates carry only the fields that changed since the last event, so
+    // they are merged into the row rather than replacing it.
+    this.queue.set(data.url, { ...dl, ...data, checked: !!dl.checked, deleting: !!dl.deleting });
+    return true;
+  }
+
   handleHTTPError(error: HttpErrorResponse) {
     const msg = error.error instanceof ErrorEvent
       ? error.error.message
@@ -183,6 +213,24 @@ export class DownloadsService {
     );
   }
 
+  public pauseById(ids: string[]) {
+    return this.http.post<Status>('pause', {ids: ids}).pipe(
+      catchError(this.handleHTTPError)
+    );
+  }
+
+  public resumeById(ids: string[]) {
+    return this.http.post<Status>('resume', {ids: ids}).pipe(
+      catchError(this.handleHTTPError)
+    );
+  }
+
+  public setPriority(ids: string[], priority: number) {
+    return this.http.post<Status>('priority', {ids: ids, priority: priority}).pipe(
+      catchError(this.handleHTTPError)
+    );
+  }
+
   public delById(where: State, ids: string[]) {
     const map = this[where];
     if (map) {
@@ -6,12 +6,26 @@ import { Socket } from 'ngx-socket-io';
   { providedIn: 'root' }
 )
 export class MeTubeSocket extends Socket {
+  // Cursor of the last download event (or 'all' snapshot) received. It is
+  // sent on every reconnect so the server can replay only what was missed
+  // instead of sending the whole queue again.
+  private static lastCursor: string | null = null;
 
   constructor() {
     const appRef = inject(ApplicationRef);
 
     const path =
       document.location.pathname.replace(/share-target/, '') + 'socket.io';
-    super({ url: '', options: { path } }, appRef);
+    const auth = (cb: (data: Record<string, string>) => void) =>
+      cb(MeTubeSocket.lastCursor ? { cursor: MeTubeSocket.lastCursor } : {});
+    super({ url: '', options: { path, auth } }, appRef);
+
+    // Download events carry their cursor as a second argument, which the
+    // per-event handlers ignore.
+    this.ioSocket.onAny((_event: string, ...args: unknown[]) => {
+      if (typeof args[1] === 'string') {
+        MeTubeSocket.lastCursor = args[1];
+      }
+    });
   }
 }